@@ -0,0 +1,892 @@
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import zipfile
+import hmac
+import argparse
+import tempfile
+import threading
+import subprocess
+from collections import deque
+
+from src.utils import safe_listdir
+from src.runner import *
+
+# Worker-local store of fetched input files, named by their SHA-256 content hash.
+BLOB_CACHE_DIR = ".cache/blobs"
+
+DEFAULT_QUEUE_PORT = 7077
+
+# Environment variable holding the shared token of a TCP queue, required when it listens beyond localhost.
+QUEUE_TOKEN_ENV = "OPENDC_QUEUE_TOKEN"
+
+# Delay before a worker reconnects to an unreachable coordinator, doubled up to the maximum.
+CONNECT_RETRY_SEC = 0.5
+CONNECT_RETRY_MAX_SEC = 10
+
+# Seconds a worker keeps reconnecting to an unreachable coordinator before it gives up.
+DEFAULT_CONNECT_TIMEOUT_SEC = 300
+
+# Seconds between two lease renewals of a worker running a job; lease_sec should be a few times this.
+LEASE_RENEW_SEC = 10
+
+# Seconds a stopping coordinator keeps serving until its workers have learned the queue is closed.
+QUEUE_CLOSE_GRACE_SEC = 10
+
+
+def list_input_files(selection, experiments_dir="experiments", manifest=None):
+    """
+    List every file an experiment needs, expanding input folders (e.g. workload traces) into their files.
+
+    Args:
+        selection: Queued experiment selection dictionary.
+        experiments_dir: Directory where experiment files are stored.
+        manifest: Experiment manifest shared by a whole queue (see collect_experiment_files()).
+
+    Returns:
+        Sorted list of normalized relative file paths.
+    """
+
+    files = set()
+    for path in collect_experiment_files([selection], experiments_dir, manifest):
+        if os.path.isdir(path):
+            for root, _, filenames in os.walk(path):
+                files.update(os.path.normpath(os.path.join(root, fn)) for fn in filenames)
+        elif os.path.isfile(path):
+            files.add(os.path.normpath(path))
+        else:
+            print(f"WARNING: Input {path} of {selection['name']} not found, it is not shipped to workers")
+    return sorted(files)
+
+
+def build_jobs(experiment_queue, experiments_dir="experiments"):
+    """
+    Turn queued experiments into jobs referencing their inputs by content hash.
+
+    Jobs are ordered longest-first (see order_longest_first()), so workers claim the
+    longest experiments first.
+
+    Args:
+        experiment_queue: List of queued experiments.
+        experiments_dir: Directory where experiment files are stored.
+
+    Returns:
+        Tuple of (jobs, blobs): jobs maps job ids to {'id', 'selection', 'files'} where 'files'
+        maps each input path to its hash, and blobs maps every hash to one local path.
+    """
+
+    profiles = []
+    for exp in experiment_queue:
+        try:
+            with open(os.path.join(experiments_dir, exp["name"])) as f:
+                profiles.append((exp, *get_experiment_profile(json.load(f))))
+        except Exception:
+            profiles.append((exp, None, 0))
+
+    jobs = {}
+    blobs = {}
+    manifest = load_experiment_manifest()
+    for index, exp in enumerate(order_longest_first(profiles, load_run_history())):
+        files = {}
+        for path in list_input_files(exp, experiments_dir, manifest):
+            digest = hash_file(path)
+            files[path] = digest
+            blobs[digest] = path
+        job_id = f"{index:05d}"
+        jobs[job_id] = {"id": job_id, "selection": exp, "files": files}
+    save_experiment_manifest(manifest)
+    return jobs, blobs
+
+
+def copy_atomic(src, dst):
+    os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+    tmp_path = f"{dst}.{os.getpid()}.{threading.get_ident()}.tmp"
+    shutil.copyfile(src, tmp_path)
+    os.replace(tmp_path, dst)
+
+
+def write_json_atomic(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def copy_exact(src, dst, size):
+    """Copy exactly size bytes between two binary file objects."""
+
+    while size > 0:
+        chunk = src.read(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("Connection closed during transfer")
+        dst.write(chunk)
+        size -= len(chunk)
+
+
+def pack_output(output_dir, zip_path):
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_STORED, allowZip64=True) as zipf:
+        for root, _, files in os.walk(output_dir):
+            for fn in files:
+                full_path = os.path.join(root, fn)
+                zipf.write(full_path, arcname=os.path.relpath(full_path, output_dir))
+
+
+def unpack_output(zip_path, output_dir):
+    if os.path.isdir(output_dir):
+        shutil.rmtree(output_dir)
+    with zipfile.ZipFile(zip_path) as zipf:
+        zipf.extractall(output_dir)
+
+
+# ---------------------------------------------------------------------------
+# Directory queue: a folder shared by the coordinator and all workers (e.g. over NFS).
+#
+#   blobs/<hash>          input files, published once per content hash
+#   pending/<id>.json     jobs waiting for a worker
+#   claimed/<id>.json     jobs taken by a worker (claimed with an atomic rename, its mtime
+#                         renewed by the worker while the job runs)
+#   results/<id>.json     result record, written after results/<id>.zip with the outputs
+#   closed                created by the coordinator once every result is in
+# ---------------------------------------------------------------------------
+
+def publish_directory_queue(queue_dir, jobs, blobs):
+    # Jobs and results of an earlier run are dropped, published blobs are kept for reuse.
+    for sub in ("pending", "claimed", "results"):
+        shutil.rmtree(os.path.join(queue_dir, sub), ignore_errors=True)
+    for sub in ("blobs", "pending", "claimed", "results"):
+        os.makedirs(os.path.join(queue_dir, sub), exist_ok=True)
+    if os.path.exists(os.path.join(queue_dir, "closed")):
+        os.remove(os.path.join(queue_dir, "closed"))
+
+    for digest, path in blobs.items():
+        blob_path = os.path.join(queue_dir, "blobs", digest)
+        if not os.path.exists(blob_path):
+            copy_atomic(path, blob_path)
+    for job_id, job in jobs.items():
+        write_json_atomic(os.path.join(queue_dir, "pending", f"{job_id}.json"), job)
+
+
+def poll_directory_queue(queue_dir, jobs, collected, lease_sec=None):
+    """
+    Collect new results from a directory queue and requeue jobs whose lease expired.
+
+    Args:
+        queue_dir: Queue folder.
+        jobs: Published jobs.
+        collected: Job ids whose results were already collected.
+        lease_sec: Seconds without lease renewal after which a claimed job is handed out again (optional).
+
+    Returns:
+        Dictionary mapping job ids to (record, output zip path or None).
+    """
+
+    results = {}
+    for job_id in jobs:
+        result_path = os.path.join(queue_dir, "results", f"{job_id}.json")
+        if job_id in collected or not os.path.exists(result_path):
+            continue
+        with open(result_path) as f:
+            record = json.load(f)
+        zip_path = os.path.join(queue_dir, "results", f"{job_id}.zip")
+        results[job_id] = (record, zip_path if os.path.exists(zip_path) else None)
+        # A requeued copy of the job does not need to run again.
+        try:
+            os.remove(os.path.join(queue_dir, "pending", f"{job_id}.json"))
+        except OSError:
+            pass
+
+    if lease_sec:
+        for fn in safe_listdir(os.path.join(queue_dir, "claimed")):
+            job_id = os.path.splitext(fn)[0]
+            claimed_path = os.path.join(queue_dir, "claimed", fn)
+            if job_id in collected or job_id in results:
+                continue
+            try:
+                if time.time() - os.path.getmtime(claimed_path) > lease_sec:
+                    os.rename(claimed_path, os.path.join(queue_dir, "pending", fn))
+                    print(f"Lease of {jobs[job_id]['selection']['name']} expired, job requeued")
+            except (OSError, KeyError):
+                continue
+    return results
+
+
+def close_directory_queue(queue_dir):
+    for fn in safe_listdir(os.path.join(queue_dir, "pending")):
+        try:
+            os.remove(os.path.join(queue_dir, "pending", fn))
+        except OSError:
+            continue
+    open(os.path.join(queue_dir, "closed"), "w").close()
+
+
+def new_directory_transport(queue_dir):
+    """
+    Create the worker side of a directory queue.
+
+    Returns:
+        Transport dictionary with 'claim', 'renew', 'fetch_blob' and 'push_result' callables.
+    """
+
+    def claim(worker_id):
+        pending_dir = os.path.join(queue_dir, "pending")
+        for fn in sorted(safe_listdir(pending_dir)):
+            claimed_path = os.path.join(queue_dir, "claimed", fn)
+            try:
+                os.rename(os.path.join(pending_dir, fn), claimed_path)
+            except OSError:
+                continue
+            os.utime(claimed_path)
+            with open(claimed_path) as f:
+                return json.load(f), False
+        return None, os.path.exists(os.path.join(queue_dir, "closed"))
+
+    def renew(job_id, worker_id):
+        # Fails once the lease expired and the job was requeued.
+        os.utime(os.path.join(queue_dir, "claimed", f"{job_id}.json"))
+
+    def fetch_blob(digest, dest):
+        copy_atomic(os.path.join(queue_dir, "blobs", digest), dest)
+
+    def push_result(job_id, record, zip_path):
+        results_dir = os.path.join(queue_dir, "results")
+        if zip_path:
+            copy_atomic(zip_path, os.path.join(results_dir, f"{job_id}.zip"))
+        write_json_atomic(os.path.join(results_dir, f"{job_id}.json"), record)
+
+    return {"claim": claim, "renew": renew, "fetch_blob": fetch_blob, "push_result": push_result}
+
+
+# ---------------------------------------------------------------------------
+# TCP queue: the coordinator serves jobs, blobs and results over one connection per request.
+# Every request and response is one JSON line, optionally followed by 'size' raw bytes.
+# ---------------------------------------------------------------------------
+
+def parse_address(address):
+    host, _, port = address.rpartition(":")
+    return (host or "localhost", int(port or DEFAULT_QUEUE_PORT))
+
+
+def is_local_address(address):
+    return parse_address(address)[0] in ("localhost", "127.0.0.1", "::1")
+
+
+def send_message(wfile, message, payload_path=None):
+    size = os.path.getsize(payload_path) if payload_path else 0
+    wfile.write((json.dumps({**message, "size": size}) + "\n").encode())
+    if payload_path:
+        with open(payload_path, "rb") as f:
+            shutil.copyfileobj(f, wfile)
+    wfile.flush()
+
+
+def receive_payload(rfile, message, dest):
+    tmp_path = f"{dest}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        copy_exact(rfile, f, message["size"])
+    os.replace(tmp_path, dest)
+
+
+def handle_queue_connection(state, conn):
+    """
+    Answer one worker request: 'claim' a job, 'renew' its lease, fetch a 'blob' or push a 'result'.
+
+    Requests without the server's token are refused. A lease is only renewed for the worker
+    currently holding the job. A result is only accepted from a worker that claimed the job at
+    some point, checked before any of its payload is read, and is stored under the
+    coordinator's own job id; the first result of a job is kept, later ones are dropped.
+
+    Args:
+        state: Server state from start_queue_server().
+        conn: Accepted socket.
+    """
+
+    with conn, conn.makefile("rb") as rfile, conn.makefile("wb") as wfile:
+        try:
+            request = json.loads(rfile.readline())
+            op = request.get("op")
+
+            if state["token"] and not hmac.compare_digest(str(request.get("token", "")), state["token"]):
+                send_message(wfile, {"error": "invalid token"})
+
+            elif op == "claim":
+                worker = request.get("worker")
+                with state["lock"]:
+                    state["workers"].add(worker)
+                    if state["pending"]:
+                        job_id = state["pending"].popleft()
+                        state["claimed"][job_id] = (worker, time.time())
+                        state["holders"].setdefault(job_id, set()).add(worker)
+                        response = {"job": state["jobs"][job_id], "closed": False}
+                    else:
+                        response = {"job": None, "closed": state["closed"]}
+                send_message(wfile, response)
+                if response["closed"]:
+                    with state["lock"]:
+                        state["notified"].add(worker)
+
+            elif op == "renew":
+                with state["lock"]:
+                    claim = state["claimed"].get(request.get("job_id"))
+                    renewed = claim is not None and claim[0] == request.get("worker")
+                    if renewed:
+                        state["claimed"][request["job_id"]] = (claim[0], time.time())
+                send_message(wfile, {"ok": True} if renewed else {"error": "job not claimed by this worker"})
+
+            elif op == "blob":
+                path = state["blobs"].get(request.get("hash"))
+                if path is None:
+                    send_message(wfile, {"error": "unknown blob"})
+                else:
+                    send_message(wfile, {"ok": True}, path)
+
+            elif op == "result":
+                with state["lock"]:
+                    job = state["jobs"].get(request.get("job_id"))
+                    held = job is not None and request.get("worker") in state["holders"].get(job["id"], ())
+                    done = held and job["id"] in state["results"]
+                if not held:
+                    send_message(wfile, {"error": "job not claimed by this worker"})
+                    return
+                if done:
+                    send_message(wfile, {"ok": True})
+                    return
+
+                zip_path = None
+                if request["size"]:
+                    zip_path = os.path.join(state["result_dir"], f"{job['id']}.{threading.get_ident()}.zip")
+                    receive_payload(rfile, request, zip_path)
+                with state["lock"]:
+                    if job["id"] not in state["results"]:
+                        state["results"][job["id"]] = (request["record"], zip_path)
+                        state["claimed"].pop(job["id"], None)
+                        if job["id"] in state["pending"]:
+                            state["pending"].remove(job["id"])
+                send_message(wfile, {"ok": True})
+
+            else:
+                send_message(wfile, {"error": f"unknown op {op}"})
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Queue request failed: {e}")
+
+
+def start_queue_server(address, jobs=None, blobs=None, token=None):
+    """
+    Serve jobs to workers over TCP from a background thread.
+
+    Jobs can also be published once the server runs (see publish_queue_jobs()); until then,
+    workers are told to wait.
+
+    Args:
+        address: 'host:port' to listen on (e.g. 'localhost:7077' for local workers, or
+            '0.0.0.0:7077' with a token for remote ones; the host defaults to localhost).
+        jobs: Jobs from build_jobs() (optional).
+        blobs: Blobs from build_jobs() (optional).
+        token: Shared secret every worker request must carry (optional).
+
+    Returns:
+        Server state; stop it with stop_queue_server().
+    """
+
+    server_socket = socket.create_server(parse_address(address))
+    state = {
+        "jobs": {},
+        "blobs": {},
+        "pending": deque(),
+        "claimed": {},
+        "holders": {},
+        "results": {},
+        "closed": False,
+        "workers": set(),
+        "notified": set(),
+        "token": token,
+        "lock": threading.Lock(),
+        "socket": server_socket,
+        "result_dir": tempfile.mkdtemp(prefix="opendc_results_"),
+    }
+
+    def serve():
+        while True:
+            try:
+                conn, _ = server_socket.accept()
+            except OSError:
+                break
+            threading.Thread(target=handle_queue_connection, args=(state, conn), daemon=True).start()
+
+    threading.Thread(target=serve, daemon=True).start()
+    print(f"Listening for workers on {address}")
+    if jobs:
+        publish_queue_jobs(state, jobs, blobs or {})
+    return state
+
+
+def publish_queue_jobs(state, jobs, blobs):
+    with state["lock"]:
+        state["jobs"].update(jobs)
+        state["blobs"].update(blobs)
+        state["pending"].extend(jobs)
+    print(f"Serving {len(jobs)} job(s)")
+
+
+def poll_queue_server(state, collected, lease_sec=None):
+    """
+    Collect new results from a TCP queue and requeue jobs whose lease expired.
+
+    Args:
+        state: Server state from start_queue_server().
+        collected: Job ids whose results were already collected.
+        lease_sec: Seconds without lease renewal after which a claimed job is handed out again (optional).
+
+    Returns:
+        Dictionary mapping job ids to (record, output zip path or None).
+    """
+
+    with state["lock"]:
+        results = {job_id: result for job_id, result in state["results"].items() if job_id not in collected}
+        if lease_sec:
+            for job_id, (_, renewed_at) in list(state["claimed"].items()):
+                if time.time() - renewed_at > lease_sec:
+                    del state["claimed"][job_id]
+                    state["pending"].append(job_id)
+                    print(f"Lease of {state['jobs'][job_id]['selection']['name']} expired, job requeued")
+    return results
+
+
+def stop_queue_server(state, grace_sec=QUEUE_CLOSE_GRACE_SEC):
+    with state["lock"]:
+        state["pending"].clear()
+        state["closed"] = True
+    # Keep serving until every worker has been told the queue is closed, as workers keep
+    # reconnecting to a coordinator that went away without closing the queue.
+    deadline = time.time() + grace_sec
+    while time.time() < deadline:
+        with state["lock"]:
+            if state["workers"] <= state["notified"]:
+                break
+        time.sleep(0.1)
+    state["socket"].close()
+    shutil.rmtree(state["result_dir"], ignore_errors=True)
+
+
+def new_tcp_transport(address, token=None, connect_timeout_sec=DEFAULT_CONNECT_TIMEOUT_SEC):
+    """
+    Create the worker side of a TCP queue.
+
+    Refused or reset connections are retried with exponential backoff, so workers can be
+    started before the coordinator listens and survive its restarts. The queue only counts
+    as closed once the coordinator says so.
+
+    Args:
+        address: 'host:port' of the coordinator.
+        token: Shared token of the queue (default from the OPENDC_QUEUE_TOKEN environment variable).
+        connect_timeout_sec: Seconds a request keeps retrying before it raises ConnectionError.
+
+    Returns:
+        Transport dictionary with 'claim', 'renew', 'fetch_blob' and 'push_result' callables.
+    """
+
+    server_address = parse_address(address)
+    token = token or os.environ.get(QUEUE_TOKEN_ENV)
+
+    def send_request(message, payload_path, response_path):
+        with socket.create_connection(server_address) as conn, \
+                conn.makefile("rb") as rfile, conn.makefile("wb") as wfile:
+            send_message(wfile, {**message, "token": token} if token else message, payload_path)
+            line = rfile.readline()
+            if not line:
+                raise ConnectionResetError("Coordinator closed the connection")
+            response = json.loads(line)
+            if "error" in response:
+                raise RuntimeError(f"Coordinator error: {response['error']}")
+            if response_path is not None:
+                receive_payload(rfile, response, response_path)
+            return response
+
+    def request(message, payload_path=None, response_path=None):
+        deadline = time.time() + connect_timeout_sec
+        delay = CONNECT_RETRY_SEC
+        while True:
+            try:
+                return send_request(message, payload_path, response_path)
+            except ConnectionError as e:
+                if time.time() + delay > deadline:
+                    raise ConnectionError(f"Coordinator {address} unreachable for {connect_timeout_sec} s: {e}")
+                time.sleep(delay)
+                delay = min(delay * 2, CONNECT_RETRY_MAX_SEC)
+
+    def claim(worker_id):
+        response = request({"op": "claim", "worker": worker_id})
+        return response["job"], response["closed"]
+
+    def renew(job_id, worker_id):
+        request({"op": "renew", "job_id": job_id, "worker": worker_id})
+
+    def fetch_blob(digest, dest):
+        request({"op": "blob", "hash": digest}, response_path=dest)
+
+    def push_result(job_id, record, zip_path):
+        request({"op": "result", "job_id": job_id, "worker": record.get("worker"), "record": record},
+                payload_path=zip_path)
+
+    return {"claim": claim, "renew": renew, "fetch_blob": fetch_blob, "push_result": push_result}
+
+
+# ---------------------------------------------------------------------------
+# Worker
+# ---------------------------------------------------------------------------
+
+def materialize_inputs(files, fetch_blob):
+    """
+    Place the input files of a job in the worker's capsule folder.
+
+    Files already present with the right content are kept. Others are linked from the local
+    blob store, so every content hash is fetched from the coordinator at most once.
+
+    Args:
+        files: Dictionary mapping input paths to content hashes.
+        fetch_blob: Callable (hash, destination path) downloading a blob.
+
+    Returns:
+        Number of blobs fetched.
+    """
+
+    fetched = 0
+    for path, digest in files.items():
+        if os.path.isfile(path) and hash_file(path) == digest:
+            continue
+
+        blob_path = os.path.join(BLOB_CACHE_DIR, digest)
+        if not os.path.exists(blob_path):
+            os.makedirs(BLOB_CACHE_DIR, exist_ok=True)
+            fetch_blob(digest, blob_path)
+            fetched += 1
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if os.path.exists(path):
+            os.remove(path)
+        try:
+            os.link(blob_path, path)
+        except OSError:
+            shutil.copyfile(blob_path, path)
+    return fetched
+
+
+def start_lease_renewal(transport, job_id, worker_id):
+    """
+    Renew the lease of a claimed job every LEASE_RENEW_SEC seconds from a background thread,
+    so the coordinator does not hand out a job that is still running.
+
+    Returns:
+        Event stopping the renewals once set.
+    """
+
+    stop = threading.Event()
+
+    def renew():
+        while not stop.wait(LEASE_RENEW_SEC):
+            try:
+                transport["renew"](job_id, worker_id)
+            except (OSError, RuntimeError) as e:
+                print(f"Lease of job {job_id} not renewed: {e}")
+
+    threading.Thread(target=renew, daemon=True).start()
+    return stop
+
+
+def push_job_result(transport, job, record, zip_path):
+    try:
+        transport["push_result"](job["id"], record, zip_path)
+    except (OSError, RuntimeError) as e:
+        # E.g. the coordinator already stopped or never handed this job to the worker.
+        print(f"Result of {job['selection']['name']} was not accepted: {e}")
+
+
+def run_job(job, transport, worker_id, context):
+    """
+    Run one claimed job and push its result record and output folder back to the coordinator.
+
+    The job's lease is renewed while its inputs are fetched and it runs.
+
+    Args:
+        job: Job from build_jobs().
+        transport: Worker transport.
+        worker_id: Name of this worker, stored in the record.
+        context: Run settings from new_run_context().
+    """
+
+    exp = job["selection"]
+    stop_renewal = start_lease_renewal(transport, job["id"], worker_id)
+    zip_path = None
+    try:
+        try:
+            fetched = materialize_inputs(job["files"], transport["fetch_blob"])
+            with open(os.path.join(context["experiments_dir"], exp["name"])) as f:
+                experiment = json.load(f)
+        except Exception as e:
+            print(f"Failed to fetch the inputs of {exp['name']}: {e}")
+            record = {"name": exp["name"], "status": "not_started", "attempts": 0, "duration_sec": None,
+                      "returncode": None, "completed": False, "stderr_tail": [str(e)]}
+            push_job_result(transport, job, {**record, "worker": worker_id}, None)
+            return
+
+        context["heap_estimates"][exp["name"]] = estimate_heap_mb(experiment)
+        record = run_timed_experiment(exp, context)
+        record = {**record, "worker": worker_id, "fetched_inputs": fetched}
+
+        output_dir = get_output_dir(experiment)
+        if record["completed"] and os.path.isdir(output_dir):
+            zip_path = os.path.join(tempfile.gettempdir(), f"opendc_{worker_id}_{job['id']}.zip")
+            pack_output(output_dir, zip_path)
+        push_job_result(transport, job, record, zip_path)
+    finally:
+        stop_renewal.set()
+        if zip_path:
+            os.remove(zip_path)
+
+
+def run_worker(transport, worker_id=None, poll_interval_sec=1.0, log_dir="logs", timeout_sec=None,
+               idle_timeout_sec=None, max_retries=2, retry_backoff_sec=5, tune_jvm=False,
+               experiments_dir="experiments"):
+    """
+    Pull jobs from a queue and run them one by one until the coordinator closes the queue
+    (or a TCP coordinator stays unreachable, see new_tcp_transport()).
+
+    Must be run from a capsule folder with an OpenDCExperimentRunner; inputs are fetched
+    into it on demand.
+
+    Args:
+        transport: Worker transport from new_directory_transport() or new_tcp_transport().
+        worker_id: Name of this worker (default '<hostname>-<pid>').
+        poll_interval_sec: Delay between two claims while the queue is empty but not closed.
+        log_dir, timeout_sec, idle_timeout_sec, max_retries, retry_backoff_sec, tune_jvm: As in run_all_experiments().
+        experiments_dir: Directory of the experiment files, the same as the coordinator's.
+
+    Returns:
+        Number of jobs run.
+    """
+
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    context = new_run_context(
+        log_dir, timeout_sec=timeout_sec, idle_timeout_sec=idle_timeout_sec, max_retries=max_retries,
+        retry_backoff_sec=retry_backoff_sec,
+        jvm_budget=new_jvm_budget(1) if tune_jvm else None, experiments_dir=experiments_dir
+    )
+    done = 0
+
+    while True:
+        try:
+            job, closed = transport["claim"](worker_id)
+        except ConnectionError as e:
+            print(f"Worker {worker_id} stopped: {e}")
+            break
+        if job is None:
+            if closed:
+                break
+            time.sleep(poll_interval_sec)
+            continue
+        print(f"Worker {worker_id} claimed {job['selection']['name']}")
+        run_job(job, transport, worker_id, context)
+        done += 1
+
+    print(f"Worker {worker_id} finished after {done} job(s)")
+    return done
+
+
+def start_local_workers(count, queue_dir=None, address=None, work_root=".cache/workers", token=None,
+                        experiments_dir="experiments"):
+    """
+    Start worker processes on this machine, each in its own capsule folder under work_root.
+
+    The folders share this capsule's OpenDCExperimentRunner through a symlink and receive their
+    inputs through the queue, which makes them a test bed for remote workers.
+
+    Args:
+        count: Number of workers.
+        queue_dir: Directory queue to pull from.
+        address: 'host:port' of a TCP queue to pull from (used if queue_dir is None).
+        work_root: Folder receiving one capsule folder per worker.
+        token: Shared token of the TCP queue, if it has one (optional).
+        experiments_dir: Directory of the experiment files, as passed to run_distributed().
+
+    Returns:
+        List of worker subprocess.Popen objects.
+    """
+
+    capsule_root = os.path.abspath(".")
+    queue_args = ["--queue-dir", os.path.abspath(queue_dir)] if queue_dir else ["--connect", address]
+    if token:
+        queue_args += ["--token", token]
+    queue_args += ["--experiments-dir", experiments_dir]
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([capsule_root, os.environ.get("PYTHONPATH", "")])}
+
+    workers = []
+    for index in range(count):
+        work_dir = os.path.join(work_root, f"worker{index}")
+        os.makedirs(work_dir, exist_ok=True)
+        runner_link = os.path.join(work_dir, "OpenDCExperimentRunner")
+        if not os.path.exists(runner_link):
+            os.symlink(os.path.join(capsule_root, "OpenDCExperimentRunner"), runner_link)
+        workers.append(subprocess.Popen(
+            [sys.executable, "-m", "src.distributed", "worker", *queue_args, "--worker-id", f"local{index}"],
+            cwd=work_dir, env=env
+        ))
+    return workers
+
+
+# ---------------------------------------------------------------------------
+# Coordinator
+# ---------------------------------------------------------------------------
+
+def run_distributed(experiment_queue, queue_dir=None, address=None, lease_sec=None, poll_interval_sec=1.0,
+                    journal_path=JOURNAL_PATH, token=None, experiments_dir="experiments"):
+    """
+    Runs the queued experiments on remote or local workers and collects their results.
+
+    The coordinator publishes one job per experiment, either to a directory queue shared with
+    the workers or through a TCP server. Inputs (experiment, topology, trace files) are
+    published once per content hash, so a worker never fetches the same file twice; parametric
+    topologies are materialized first. Workers
+    push back their run records and output folders, which are unpacked into the local output
+    folder as if the experiments had run here.
+
+    Removes the completed experiments from the queue, like run_all_experiments().
+
+    Args:
+        experiment_queue: List of queued experiments.
+        queue_dir: Shared folder used as directory queue.
+        address: 'host:port' the TCP queue listens on (used if queue_dir is None).
+        lease_sec: Seconds without a lease renewal after which a claimed job is handed out again
+            (optional). Workers renew their lease every LEASE_RENEW_SEC seconds while a job runs,
+            so only jobs of dead or unreachable workers expire; of a job run twice, the first
+            result is kept.
+        poll_interval_sec: Delay between two checks for new results.
+        journal_path: Journal file recording the state of every experiment (None disables it).
+        token: Shared token workers must send to a TCP queue (default from the OPENDC_QUEUE_TOKEN
+            environment variable); required unless the queue listens on localhost only.
+        experiments_dir: Directory the queued experiment files are read from (default 'experiments');
+            workers must use the same one.
+
+    Returns:
+        A dictionary with the run records under 'experiments' (each with the 'worker' that ran it),
+        the total wall-clock time under 'total_duration_sec' and the number of workers under 'max_workers'.
+    """
+
+    if not experiment_queue:
+        print("No experiments added")
+        return
+    if not queue_dir and not address:
+        print("ERROR: Either a queue directory or a TCP address is required")
+        return
+    token = token or os.environ.get(QUEUE_TOKEN_ENV)
+    if not queue_dir and not token and not is_local_address(address):
+        print(f"ERROR: A TCP queue listening beyond localhost requires a token (token=... or {QUEUE_TOKEN_ENV})")
+        return
+
+    # The TCP server listens before the (possibly slow) job build, so workers started along
+    # with the coordinator wait for jobs instead of finding nobody listening.
+    state = None if queue_dir else start_queue_server(address, token=token)
+    journal = None
+    jobs = {}
+    collected = {}
+    start_time = time.time()
+    try:
+        prepare_experiment_topologies(experiment_queue, experiments_dir)
+        jobs, blobs = build_jobs(experiment_queue, experiments_dir)
+        journal = open_journal(journal_path) if journal_path else None
+        for job in jobs.values():
+            append_journal_event(journal, job["selection"]["name"], QUEUED, selection=job["selection"])
+
+        if queue_dir:
+            publish_directory_queue(queue_dir, jobs, blobs)
+            print(f"Published {len(jobs)} job(s) and {len(blobs)} input file(s) to {queue_dir}")
+            poll = lambda collected: poll_directory_queue(queue_dir, jobs, collected, lease_sec)
+        else:
+            publish_queue_jobs(state, jobs, blobs)
+            poll = lambda collected: poll_queue_server(state, collected, lease_sec)
+
+        start_time = time.time()
+        while len(collected) < len(jobs):
+            for job_id, (record, zip_path) in poll(collected).items():
+                exp = jobs[job_id]["selection"]
+                if zip_path:
+                    with open(os.path.join(experiments_dir, exp["name"])) as f:
+                        output_dir = get_output_dir(json.load(f))
+                    unpack_output(zip_path, output_dir)
+                    write_output_checksums(output_dir)
+                journal_finished_run(journal, record)
+                collected[job_id] = record
+                print(f"{record['status'].capitalize()}: {exp['name']} on {record.get('worker', 'unknown')} "
+                      f"({len(collected)}/{len(jobs)})")
+            if len(collected) < len(jobs):
+                time.sleep(poll_interval_sec)
+    except KeyboardInterrupt:
+        print("Interrupted: pending jobs are withdrawn, results of running ones are not collected.")
+    finally:
+        if queue_dir:
+            if os.path.isdir(os.path.join(queue_dir, "pending")):
+                close_directory_queue(queue_dir)
+        else:
+            stop_queue_server(state)
+        close_journal(journal)
+
+    total_duration = time.time() - start_time
+    records = [collected[job_id] for job_id in jobs if job_id in collected]
+    completed = {record["name"] for record in records if record.get("completed")}
+    experiment_queue[:] = [exp for exp in experiment_queue if exp["name"] not in completed]
+
+    if experiment_queue:
+        print(f"{len(experiment_queue)} experiment(s) did not complete and stay in the queue.")
+    else:
+        print("All experiments completed.")
+    print(f"Total wall-clock time: {round(total_duration, 2)} seconds")
+
+    return {
+        "experiments": records,
+        "total_duration_sec": round(total_duration, 2),
+        "max_workers": len({record.get("worker") for record in records}) or 1
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distributed OpenDC experiment runner")
+    parser.add_argument("role", choices=["worker", "coordinator"])
+    parser.add_argument("experiments", nargs="*", help="Experiment file names to run (coordinator only)")
+    parser.add_argument("--queue-dir", help="Shared directory queue")
+    parser.add_argument("--connect", help="host:port of the TCP queue (workers connect, the coordinator listens)")
+    parser.add_argument("--work-dir", default=".", help="Capsule folder of the worker")
+    parser.add_argument("--worker-id")
+    parser.add_argument("--experiments-dir", default="experiments", help="Directory of the experiment files")
+    parser.add_argument("--lease-sec", type=float,
+                        help=f"Seconds without lease renewal before a job is requeued (workers renew every {LEASE_RENEW_SEC} s)")
+    parser.add_argument("--timeout-sec", type=float)
+    parser.add_argument("--idle-timeout-sec", type=float)
+    parser.add_argument("--max-retries", type=int, default=2)
+    parser.add_argument("--tune-jvm", action="store_true", help="Choose the JVM heap and GC per experiment")
+    parser.add_argument("--token", help=f"Shared token of the TCP queue (default from {QUEUE_TOKEN_ENV})")
+    parser.add_argument("--connect-timeout-sec", type=float, default=DEFAULT_CONNECT_TIMEOUT_SEC,
+                        help="Seconds a worker keeps reconnecting to an unreachable coordinator")
+    args = parser.parse_args()
+
+    if not args.queue_dir and not args.connect:
+        parser.error("either --queue-dir or --connect is required")
+    if args.queue_dir:
+        args.queue_dir = os.path.abspath(args.queue_dir)
+    os.chdir(args.work_dir)
+
+    if args.role == "coordinator":
+        run_distributed([{"name": name} for name in args.experiments], args.queue_dir, args.connect, args.lease_sec,
+                        token=args.token, experiments_dir=args.experiments_dir)
+        return
+
+    if args.queue_dir:
+        transport = new_directory_transport(args.queue_dir)
+    else:
+        transport = new_tcp_transport(args.connect, args.token, args.connect_timeout_sec)
+    run_worker(transport, args.worker_id, timeout_sec=args.timeout_sec, idle_timeout_sec=args.idle_timeout_sec,
+               max_retries=args.max_retries, tune_jvm=args.tune_jvm, experiments_dir=args.experiments_dir)
+
+
+if __name__ == "__main__":
+    main()
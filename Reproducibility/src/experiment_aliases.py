@@ -0,0 +1,181 @@
+import os
+import json
+import shutil
+import hashlib
+
+ALIAS_MANIFEST_PATH = "experiment_aliases.json"
+
+# Fields that name an experiment or its output location but do not change what is simulated.
+NON_SEMANTIC_FIELDS = ("name", "outputFolder")
+
+
+def get_canonical_hash(experiment):
+    """
+    Hash the simulated content of an experiment, ignoring its name and output folder.
+
+    Keys are sorted and whitespace is dropped, so experiments that only differ in formatting
+    or field order hash equally.
+
+    Args:
+        experiment: Experiment dictionary.
+
+    Returns:
+        Hex digest of the canonical experiment content.
+    """
+
+    content = {k: v for k, v in experiment.items() if k not in NON_SEMANTIC_FIELDS}
+    return hashlib.sha256(json.dumps(content, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def load_alias_manifest(path=ALIAS_MANIFEST_PATH):
+    """
+    Load the alias manifest.
+
+    Returns:
+        Dictionary with 'hashes' (canonical hash -> primary experiment file), 'aliases'
+        (primary experiment file -> list of {'name', 'experimentName', 'outputFolder', 'hash'}
+        aliases) and the reverse indexes 'files' (primary experiment file -> canonical hash) and
+        'aliasOf' (alias file -> primary experiment file).
+    """
+
+    manifest = {"hashes": {}, "aliases": {}}
+    if os.path.exists(path):
+        try:
+            with open(path) as f:
+                manifest = json.load(f)
+        except Exception as e:
+            print(f"Failed to load alias manifest: {e}")
+
+    # Manifests written before the reverse indexes existed get them rebuilt once.
+    if "files" not in manifest:
+        manifest["files"] = {primary: digest for digest, primary in manifest["hashes"].items()}
+    if "aliasOf" not in manifest:
+        manifest["aliasOf"] = {
+            alias["name"]: primary for primary, aliases in manifest["aliases"].items() for alias in aliases
+        }
+    return manifest
+
+
+def save_alias_manifest(manifest, path=ALIAS_MANIFEST_PATH):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+def drop_aliases(manifest, primary):
+    for alias in manifest["aliases"].pop(primary, []):
+        manifest["aliasOf"].pop(alias["name"], None)
+
+
+def register_experiment(manifest, filename, experiment, experiments_dir="experiments", pending=()):
+    """
+    Record a generated experiment in the manifest and find out whether it duplicates an earlier one.
+
+    An experiment whose canonical hash matches an existing experiment file becomes an alias of
+    that file. Mappings of an earlier, different version of the same file are dropped. Lookups
+    go through the reverse indexes of the manifest, so registering stays constant time however
+    many experiments are recorded.
+
+    Args:
+        manifest: Manifest from load_alias_manifest(), updated in place.
+        filename: File name the experiment would be saved as.
+        experiment: Experiment dictionary.
+        experiments_dir: Directory where experiment files are stored.
+        pending: File names queued for writing but possibly not on disk yet.
+
+    Returns:
+        The file name of the experiment that should be run: filename itself, or the primary
+        experiment it is an alias of.
+    """
+
+    digest = get_canonical_hash(experiment)
+
+    stale = manifest["files"].get(filename)
+    if stale is not None and stale != digest:
+        if manifest["hashes"].get(stale) == filename:
+            del manifest["hashes"][stale]
+        del manifest["files"][filename]
+        drop_aliases(manifest, filename)
+
+    previous_primary = manifest["aliasOf"].pop(filename, None)
+    if previous_primary is not None:
+        aliases = manifest["aliases"].get(previous_primary, [])
+        aliases[:] = [alias for alias in aliases if alias["name"] != filename]
+
+    primary = manifest["hashes"].get(digest)
+    if primary and primary != filename and (primary in pending or os.path.exists(os.path.join(experiments_dir, primary))):
+        manifest["aliases"].setdefault(primary, []).append({
+            "name": filename,
+            "experimentName": experiment.get("name"),
+            "outputFolder": experiment.get("outputFolder", "output"),
+            "hash": digest,
+        })
+        manifest["aliasOf"][filename] = primary
+        return primary
+
+    manifest["hashes"][digest] = filename
+    manifest["files"][filename] = digest
+    return filename
+
+
+def get_aliases(manifest, filename):
+    return manifest.get("aliases", {}).get(filename, [])
+
+
+def link_alias_outputs(manifest, filename, output_dir, experiments_dir="experiments"):
+    """
+    Make the outputs of an experiment available under the output folders of its aliases.
+
+    Files are hard-linked where possible, so aliases take no extra disk space. The primary
+    experiment file is hashed again first: if it was edited since its aliases were recorded,
+    its outputs no longer belong to them, and the aliases are dropped instead of linked.
+
+    Args:
+        manifest: Manifest from load_alias_manifest(), updated in place if aliases are dropped.
+        filename: File name of the primary experiment.
+        output_dir: Output folder of the primary experiment.
+        experiments_dir: Directory where experiment files are stored.
+
+    Returns:
+        True if aliases were dropped and the manifest has to be saved, False otherwise.
+    """
+
+    aliases = get_aliases(manifest, filename)
+    if not aliases or not os.path.isdir(output_dir):
+        return False
+
+    try:
+        with open(os.path.join(experiments_dir, filename)) as f:
+            digest = get_canonical_hash(json.load(f))
+    except Exception as e:
+        print(f"Failed to read {filename}, its aliases are not linked: {e}")
+        return False
+
+    stale = [alias for alias in aliases if alias.get("hash", manifest["files"].get(filename)) != digest]
+    if stale:
+        print(f"WARNING: {filename} changed since {len(stale)} alias(es) were recorded, dropping them")
+        for alias in stale:
+            manifest["aliasOf"].pop(alias["name"], None)
+        aliases[:] = [alias for alias in aliases if alias not in stale]
+        recorded = manifest["files"].get(filename)
+        if recorded != digest:
+            if manifest["hashes"].get(recorded) == filename:
+                del manifest["hashes"][recorded]
+            manifest["files"][filename] = digest
+            manifest["hashes"].setdefault(digest, filename)
+
+    for alias in aliases:
+        alias_dir = os.path.join(alias["outputFolder"], alias["experimentName"] or "")
+        if os.path.abspath(alias_dir) == os.path.abspath(output_dir):
+            continue
+        shutil.rmtree(alias_dir, ignore_errors=True)
+
+        def link_or_copy(src, dst):
+            try:
+                os.link(src, dst)
+            except OSError:
+                shutil.copy2(src, dst)
+
+        shutil.copytree(output_dir, alias_dir, copy_function=link_or_copy)
+    return bool(stale)
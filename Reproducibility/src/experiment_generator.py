@@ -2,6 +2,23 @@ import os
 import json
 
 from src.utils import *
+from src.experiment_aliases import *
+from src.experiment_manifest import *
+from src.json_writer import *
+
+# Axes of a sweep, with the tag that marks their value in the experiment name. Seeds and runs
+# are already named by iter_experiments() ('_s<seed>_r<runs>').
+SWEEP_AXES = {
+    "topology": "t",
+    "workload": "w",
+    "failure": "f",
+    "policy": "p",
+    "seed": None,
+    "runs": None,
+    "export_interval": "ei",
+    "print_frequency": "pf",
+    "max_failures": "mf",
+}
 
 
 def build_entry(folder, file, original_entry=None, default_type=None):
@@ -46,7 +63,8 @@ def update_experiment_values(
     runs=None,
     max_failures=None,
     output_folder=None,
-    group_by_topology_folder=False
+    group_by_topology_folder=False,
+    compact_json=False
 ):
     
     """
@@ -62,54 +80,19 @@ def update_experiment_values(
         List of experiment selections (metadata for queueing/exporting).
     """
 
-    if experiment_template:
-        try:
-            with open(f"{exp_template_path}{experiment_template}", 'r') as f:
-                base_experiment = json.load(f)
-        except Exception as e:
-            print(f"Failed to load base experiment: {e}")
-            return []
-    else:
-        base_experiment = {}
+    base_experiment = load_base_experiment(exp_template_path, experiment_template)
+    if base_experiment is None:
+        return []
 
     base_name = name or base_experiment.get("name", "custom_experiment")
     all_selections = []
 
-    if group_by_topology_folder and topologies:
-        grouped = {}
-        for topo in topologies:
-            key = get_topology_group_prefix(topo)
-            grouped.setdefault(key, []).append(topo)
-
-        for group_key, group_topos in grouped.items():
-            group_name = f"{group_key}/{base_name}"
-            all_selections.extend(
-                generate_experiments(
-                    name=group_name,
-                    base=base_experiment,
-                    topologies=group_topos,
-                    workloads=workloads,
-                    failures=failures,
-                    prefab_types=prefab_types,
-                    checkpoint_interval=checkpoint_interval,
-                    checkpoint_duration=checkpoint_duration,
-                    checkpoint_scaling=checkpoint_scaling,
-                    export_intervals=export_intervals,
-                    print_frequencies=print_frequencies,
-                    files_to_export=files_to_export,
-                    seeds=seeds,
-                    runs=runs,
-                    max_failures=max_failures,
-                    output_folder=output_folder
-                )
-            )
-        print("Generation finished")
-    else:
+    for group_name, group_topos in get_generation_groups(base_name, topologies, group_by_topology_folder):
         all_selections.extend(
             generate_experiments(
-                name=base_name,
+                name=group_name,
                 base=base_experiment,
-                topologies=topologies,
+                topologies=group_topos,
                 workloads=workloads,
                 failures=failures,
                 prefab_types=prefab_types,
@@ -122,16 +105,104 @@ def update_experiment_values(
                 seeds=seeds,
                 runs=runs,
                 max_failures=max_failures,
-                output_folder=output_folder
+                output_folder=output_folder,
+                compact_json=compact_json
             )
         )
-        
-        print("Generation finished")
 
+    print("Generation finished")
     return all_selections
-    
 
-def generate_experiments(
+
+def load_base_experiment(exp_template_path=None, experiment_template=None):
+    """
+    Load the template experiment the variants are derived from.
+
+    Args:
+        exp_template_path: Folder of the template files.
+        experiment_template: Template file name in exp_template_path, or an already parsed template.
+
+    Returns:
+        The parsed template, an empty dict without template, or None if it cannot be loaded.
+    """
+
+    if not experiment_template:
+        return {}
+    if isinstance(experiment_template, dict):
+        return dict(experiment_template)
+    try:
+        with open(f"{exp_template_path}{experiment_template}", 'r') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Failed to load base experiment: {e}")
+        return None
+
+
+def get_generation_groups(base_name, topologies, group_by_topology_folder=False):
+    """
+    Split the topologies into the groups that get their own experiments.
+
+    Returns:
+        List of (experiment name, topologies) tuples; a single group unless grouping is enabled.
+    """
+
+    if not (group_by_topology_folder and topologies):
+        return [(base_name, topologies)]
+
+    grouped = {}
+    for topo in topologies:
+        key = get_topology_group_prefix(topo)
+        grouped.setdefault(key, []).append(topo)
+    return [(f"{group_key}/{base_name}", group_topos) for group_key, group_topos in grouped.items()]
+
+
+def iter_experiment_values(
+    exp_template_path=None,
+    experiment_template=None,
+    topologies=None,
+    workloads=None,
+    failures=None,
+    prefab_types=None,
+    checkpoint_interval=None,
+    checkpoint_duration=None,
+    checkpoint_scaling=None,
+    export_intervals=None,
+    print_frequencies=None,
+    files_to_export=None,
+    name=None,
+    seeds=None,
+    runs=None,
+    max_failures=None,
+    output_folder=None,
+    group_by_topology_folder=False
+):
+    """
+    Lazily generate the same experiments as update_experiment_values(), without writing them.
+
+    The result can be passed to run_generated_experiments() to run the experiments directly,
+    or to save_experiments() to write them to 'experiments/' for exporting.
+
+    Args:
+        Based on the names
+
+    Yields:
+        Tuples of (filename, experiment).
+    """
+
+    base_experiment = load_base_experiment(exp_template_path, experiment_template)
+    if base_experiment is None:
+        return
+
+    base_name = name or base_experiment.get("name", "custom_experiment")
+    for group_name, group_topos in get_generation_groups(base_name, topologies, group_by_topology_folder):
+        yield from iter_experiments(
+            group_name, base_experiment, group_topos, workloads, failures, prefab_types, checkpoint_interval,
+            checkpoint_duration, checkpoint_scaling, export_intervals, print_frequencies, files_to_export,
+            seeds, runs, max_failures, output_folder
+        )
+
+
+def iter_experiments(
     name,
     base,
     topologies,
@@ -150,20 +221,19 @@ def generate_experiments(
     output_folder
 ):
     """
-    Generate experiment JSON files for a specific group or flat configuration.
+    Lazily generate the experiment variants of a specific group or flat configuration.
 
-    This helper function creates one or more experiment variants based on seed/run combinations
-    and writes them to disk under 'experiments/'. It uses a base experiment config and overrides
-    its fields with the provided parameters.
+    Variants are built on demand from the base experiment, overriding its fields with the
+    provided parameters, and nothing is written to disk. Variants are shallow copies sharing
+    the unchanged parts of the base, so consumers must not modify the yielded experiments.
 
     Args:
         Based on the names
 
-    Returns:
-        List of selections (experiment metadata for tracking/queueing).
+    Yields:
+        Tuples of (filename, experiment) with the filename ending in '.json'.
     """
-    selections_list = []
-    base_experiment = json.loads(json.dumps(base))
+    base_experiment = dict(base)
 
     # Topologies: no default type  
     if topologies is not None:
@@ -189,6 +259,27 @@ def generate_experiments(
             for index, file in enumerate(failures)
         ]
 
+    policies = []
+
+    for idx in range(len(prefab_types or [])):
+        policy_type = get_val(prefab_types, idx)
+        
+        if policy_type:
+            policy = {
+                "type": "prefab",
+                "policyName": policy_type
+            }
+
+        policies.append(policy)
+    
+    checkpoint_models = None
+    if checkpoint_interval is not None and checkpoint_duration is not None and checkpoint_scaling is not None:
+        checkpoint_models = [{
+            "checkpointInterval": int(checkpoint_interval),
+            "checkpointDuration": int(checkpoint_duration),
+            "checkpointIntervalScaling": float(checkpoint_scaling)
+        }]
+
     max_length = max(
         len(seeds or []),
         len(runs or []),
@@ -198,7 +289,7 @@ def generate_experiments(
     )
 
     for i in range(max_length):
-        experiment = json.loads(json.dumps(base_experiment))
+        experiment = dict(base_experiment)
 
         seed = get_val(seeds, i)
         run = get_val(runs, i)
@@ -213,29 +304,11 @@ def generate_experiments(
 
         experiment["name"] = full_name
 
-        policies = []
-
-        for idx in range(len(prefab_types or [])):
-            policy_type = get_val(prefab_types, idx)
-            
-            if policy_type:
-                policy = {
-                    "type": "prefab",
-                    "policyName": policy_type
-                }
-
-            policies.append(policy)
-        
         if policies:
             experiment["allocationPolicies"] = policies
 
-    
-        if checkpoint_interval is not None and checkpoint_duration is not None and checkpoint_scaling is not None:
-            experiment["checkpointModels"] = [{
-                "checkpointInterval": int(checkpoint_interval),
-                "checkpointDuration": int(checkpoint_duration),
-                "checkpointIntervalScaling": float(checkpoint_scaling)
-            }]
+        if checkpoint_models is not None:
+            experiment["checkpointModels"] = checkpoint_models
 
         if max_failures:
             experiment["maxNumFailures"] = [int(mf) for mf in max_failures]
@@ -243,61 +316,196 @@ def generate_experiments(
         interval = get_val(export_intervals, i)
         freq = get_val(print_frequencies, i)
 
+        # Only the first export model is modified, so only that one is copied per variant.
         if "exportModels" in experiment and experiment["exportModels"]:
-            if interval is not None:
-                experiment["exportModels"][0]["exportInterval"] = int(interval)
-            if freq is not None:
-                experiment["exportModels"][0]["printFrequency"] = int(freq)
-            if files_to_export:
-                experiment["exportModels"][0]["filesToExport"] = files_to_export
-       
+            export_entry = dict(experiment["exportModels"][0])
+            experiment["exportModels"] = [export_entry] + experiment["exportModels"][1:]
         else:
             export_entry = {}
-            if interval is not None:
-                export_entry["exportInterval"] = int(interval)
-            if freq is not None:
-                export_entry["printFrequency"] = int(freq)
-            if files_to_export:
-                export_entry["filesToExport"] = files_to_export
-            if export_entry:
-                experiment["exportModels"] = [export_entry]
-        
+
+        if interval is not None:
+            export_entry["exportInterval"] = int(interval)
+        if freq is not None:
+            export_entry["printFrequency"] = int(freq)
+        if files_to_export:
+            export_entry["filesToExport"] = files_to_export
+        if export_entry and not experiment.get("exportModels"):
+            experiment["exportModels"] = [export_entry]
+
         if output_folder is not None:
             experiment["outputFolder"] = output_folder
 
         filename = f"{full_name}.json" if not full_name.endswith(".json") else full_name
 
-        save_experiment(experiment, filename)
+        yield filename, experiment
 
-        selections_list.append({
-            "name": filename,
-            "topology": topologies,
-            "workload": workloads,
-            "failures": failures
-        })
-    
-    return selections_list
 
+def generate_experiments(
+    name,
+    base,
+    topologies,
+    workloads,
+    failures,
+    prefab_types,
+    checkpoint_interval,
+    checkpoint_duration,
+    checkpoint_scaling,
+    export_intervals,
+    print_frequencies,
+    files_to_export,
+    seeds,
+    runs,
+    max_failures,
+    output_folder,
+    compact_json=False
+):
+    """
+    Generate experiment JSON files for a specific group or flat configuration.
+
+    This helper function writes the variants of iter_experiments() to disk under 'experiments/'.
+    Variants identical to an existing experiment apart from their name and output folder are
+    not saved; they are recorded as aliases of it in the alias manifest and that experiment is
+    queued instead (see write_experiment_files()).
 
-def save_experiment(experiment, new_name):
+    Args:
+        Based on the names
+
+    Returns:
+        List of selections (experiment metadata for tracking/queueing).
+    """
+    primaries = write_experiment_files(iter_experiments(
+        name, base, topologies, workloads, failures, prefab_types, checkpoint_interval,
+        checkpoint_duration, checkpoint_scaling, export_intervals, print_frequencies,
+        files_to_export, seeds, runs, max_failures, output_folder
+    ), compact_json)
+
+    return [
+        {"name": primary, "topology": topologies, "workload": workloads, "failures": failures}
+        for primary in primaries
+    ]
+
+
+def write_experiment_files(experiments, compact_json=False):
     """
-    Save a single experiment configuration to disk.
+    Register experiments in the alias manifest and write the ones that are not duplicates.
+
+    Written experiments are indexed in the experiment manifest. Files are written in batches
+    on a thread pool, without indentation if compact_json is True.
 
     Args:
-        experiment: The experiment JSON content.
-        new_name: Filename to save as (it can include / characters to have folder structure).
+        experiments: Iterable of (filename, experiment) tuples.
+        compact_json: Write the files without indentation.
+
+    Returns:
+        List of the experiment files to run, in generation order without repeats: every
+        experiment's own file, or the primary experiment it is an alias of.
     """
-    new_path = f"experiments/{new_name}"
-    os.makedirs(os.path.dirname(new_path), exist_ok=True)
 
-    try:
-        with open(new_path, 'w') as f:
-            json.dump(experiment, f, indent=4)
-        # print(f"Generated {new_name}") disabled for large experiment
-    except Exception as e:
-        print(f"Error saving {new_name}: {e}")
+    manifest = load_alias_manifest()
+    index = load_experiment_manifest()
+    writer = new_json_writer(compact=compact_json)
+    saved = {}
+    pending = set()
+    primaries = {}
+    duplicates = 0
+
+    for filename, experiment in experiments:
+        primary = register_experiment(manifest, filename, experiment, pending=pending)
+        if primary == filename:
+            pending.add(filename)
+            saved[f"experiments/{filename}"] = experiment
+            write_json(writer, f"experiments/{filename}", experiment)
+        else:
+            duplicates += 1
+        primaries.setdefault(primary, None)
+
+    for path in close_json_writer(writer, "experiments"):
+        index_experiment(index, path, saved[path])
+    save_alias_manifest(manifest)
+    save_experiment_manifest(index)
+    if duplicates:
+        print(f"{duplicates} duplicate experiment(s) recorded as aliases instead of being generated again")
+    return list(primaries)
+
+
+def save_experiments(experiments, compact_json=False):
+    """
+    Write lazily generated experiments to disk, e.g. before exporting them.
+
+    Duplicates are recorded as aliases like in generate_experiments().
+
+    Args:
+        experiments: Iterable of (filename, experiment) tuples, e.g. from iter_experiment_values().
+        compact_json: Write the files without indentation.
+
+    Returns:
+        List of selections (experiment metadata for tracking/queueing).
+    """
+
+    return [{"name": primary} for primary in write_experiment_files(experiments, compact_json)]
+
+
+def get_sweep_label(value):
+    return os.path.splitext(str(value))[0].replace("/", "-").replace("\\", "-")
 
 
+def iter_experiment_sweep(
+    exp_template_path=None,
+    experiment_template=None,
+    name=None,
+    pairs=None,
+    checkpoint_interval=None,
+    checkpoint_duration=None,
+    checkpoint_scaling=None,
+    files_to_export=None,
+    output_folder=None,
+    group_by_topology_folder=False,
+    shard=None,
+    **axes
+):
+    """
+    Lazily generate a full design-of-experiments sweep: one experiment per combination of axis values.
+
+    Unlike update_experiment_values(), which aligns values by index, every experiment gets exactly
+    one value of each given axis (see SWEEP_AXES), combined as a Cartesian product except for the
+    zipped pairs. Axes with more than one value are added to the experiment names.
+
+    Args:
+        pairs: List of axis name pairs that vary together instead of being combined.
+        shard: Optional (index, count) tuple to only generate one shard of the combinations.
+        axes: Value lists per axis, e.g. topology=[...], policy=[...], seed=[...], max_failures=[...].
+        Others: As in update_experiment_values().
 
+    Yields:
+        Tuples of (filename, experiment).
+    """
+
+    for axis in axes:
+        if axis not in SWEEP_AXES:
+            print(f"[Skipped] Unknown sweep axis {axis}, expected one of {', '.join(SWEEP_AXES)}")
 
+    base_experiment = load_base_experiment(exp_template_path, experiment_template)
+    if base_experiment is None:
+        return
 
+    base_name = name or base_experiment.get("name", "custom_experiment")
+    inputs = {axis: list(axes.get(axis) or []) for axis in SWEEP_AXES}
+    varying = {axis for axis, values in inputs.items() if len(set(values)) > 1}
+
+    for values in iter_combinations(inputs, pairs, shard):
+        full_name = base_name
+        for axis, tag in SWEEP_AXES.items():
+            if tag and axis in varying and axis in values:
+                full_name += f"_{tag}{get_sweep_label(values[axis])}"
+        if group_by_topology_folder and values.get("topology"):
+            full_name = f"{get_topology_group_prefix(values['topology'])}/{full_name}"
+
+        def single(axis, default=None):
+            return [values[axis]] if axis in values else default
+
+        yield from iter_experiments(
+            full_name, base_experiment, single("topology"), single("workload"), single("failure"),
+            single("policy"), checkpoint_interval, checkpoint_duration, checkpoint_scaling,
+            single("export_interval", []), single("print_frequency", []), files_to_export,
+            single("seed", []), single("runs", []), single("max_failures"), output_folder
+        )
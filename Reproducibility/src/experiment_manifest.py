@@ -0,0 +1,156 @@
+import os
+import json
+import hashlib
+
+EXPERIMENT_MANIFEST_PATH = ".cache/experiment_manifest.json"
+
+# Experiment JSON keys listing input files, as checked by the validator.
+INPUT_KEYS = ("topologies", "workloads", "failureModels")
+
+
+def load_experiment_manifest(path=EXPERIMENT_MANIFEST_PATH):
+    """
+    Load the experiment manifest, an index of what every experiment and topology file references.
+
+    Returns:
+        Manifest dictionary with 'experiments' and 'topologies' entries keyed by file path.
+    """
+
+    if os.path.exists(path):
+        try:
+            with open(path) as f:
+                manifest = json.load(f)
+            return {"experiments": manifest["experiments"], "topologies": manifest["topologies"], "dirty": False}
+        except Exception as e:
+            print(f"Failed to load experiment manifest, rebuilding it: {e}")
+    return {"experiments": {}, "topologies": {}, "dirty": False}
+
+
+def save_experiment_manifest(manifest, path=EXPERIMENT_MANIFEST_PATH):
+    if not manifest["dirty"]:
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"experiments": manifest["experiments"], "topologies": manifest["topologies"]}, f,
+                  separators=(",", ":"))
+    os.replace(tmp_path, path)
+    manifest["dirty"] = False
+
+
+def get_file_stamp(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def read_json_with_hash(path):
+    with open(path, "rb") as f:
+        content = f.read()
+    return json.loads(content), hashlib.sha256(content).hexdigest()
+
+
+def index_experiment(manifest, path, experiment=None):
+    """
+    Add or refresh the manifest entry of an experiment file.
+
+    Args:
+        manifest: Manifest from load_experiment_manifest(), updated in place.
+        path: Path to the experiment JSON file.
+        experiment: Parsed content of the file, if the caller has it (e.g. a generator that just
+            saved it); the file is parsed otherwise.
+
+    Returns:
+        The manifest entry with the file 'stamp', content 'hash', 'name', 'outputFolder' and the
+        'inputs' paths per INPUT_KEYS (None for entries without 'pathToFile').
+    """
+
+    stamp = get_file_stamp(path)
+    if experiment is None:
+        experiment, digest = read_json_with_hash(path)
+    else:
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+
+    entry = {
+        "stamp": stamp,
+        "hash": digest,
+        "name": experiment.get("name"),
+        "outputFolder": experiment.get("outputFolder"),
+        "inputs": {key: [item.get("pathToFile") for item in experiment.get(key, [])] for key in INPUT_KEYS},
+    }
+    manifest["experiments"][os.path.normpath(path)] = entry
+    manifest["dirty"] = True
+    return entry
+
+
+def get_experiment_entry(manifest, path):
+    """
+    Return the manifest entry of an experiment, re-reading the file only if it changed.
+
+    A file counts as changed when its modification time or size differs from the indexed
+    ones, so hand-edited experiments are picked up.
+
+    Args:
+        manifest: Manifest from load_experiment_manifest().
+        path: Path to the experiment JSON file.
+
+    Returns:
+        The entry as described in index_experiment().
+
+    Raises:
+        OSError or ValueError if the file cannot be read or parsed.
+    """
+
+    entry = manifest["experiments"].get(os.path.normpath(path))
+    if entry is not None and entry["stamp"] == get_file_stamp(path):
+        return entry
+    return index_experiment(manifest, path)
+
+
+def get_topology_entry(manifest, path):
+    """
+    Return the manifest entry of a topology file, re-reading it only if it changed.
+
+    Returns:
+        Dictionary with the file 'stamp', content 'hash', host count and 'carbon_traces',
+        or None if the topology does not exist.
+    """
+
+    if not path or not os.path.exists(path):
+        return None
+
+    key = os.path.normpath(path)
+    stamp = get_file_stamp(path)
+    entry = manifest["topologies"].get(key)
+    if entry is not None and entry["stamp"] == stamp:
+        return entry
+
+    entry = {"stamp": stamp, "hash": None, "hosts": 0, "carbon_traces": []}
+    try:
+        topology, entry["hash"] = read_json_with_hash(path)
+        clusters = topology.get("clusters", [])
+        entry["hosts"] = sum(int(host.get("count", 1)) for cluster in clusters for host in cluster.get("hosts", []))
+        entry["carbon_traces"] = [
+            cluster.get("powerSource", {}).get("carbonTracePath")
+            for cluster in clusters
+            if cluster.get("powerSource", {}).get("carbonTracePath")
+        ]
+    except Exception as e:
+        print(f"Warning: Failed to parse topology {path}: {e}")
+
+    manifest["topologies"][key] = entry
+    manifest["dirty"] = True
+    return entry
+
+
+def get_carbon_traces(manifest, entry):
+    """
+    List the carbon traces referenced by the topologies of an experiment entry.
+    """
+
+    traces = []
+    for topology_path in entry["inputs"]["topologies"]:
+        topology = get_topology_entry(manifest, topology_path)
+        if topology:
+            traces += topology["carbon_traces"]
+    return traces
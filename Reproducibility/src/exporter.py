@@ -3,32 +3,45 @@ import zipfile
 import json
 
 from src.summary_generator import *
+from src.experiment_aliases import ALIAS_MANIFEST_PATH
+from src.experiment_manifest import *
+from src.topology_store import *
+from src.output_checksums import *
+from src.topology_generator import prepare_experiment_topologies
 
-def collect_experiment_files(selections_list, experiments_dir="experiments"):
+def collect_experiment_files(selections_list, experiments_dir="experiments", manifest=None):
 
     """
     Gather all necessary files based on the queued experiments.
 
-    Looks through the experiment JSONs and collects paths to all referenced
-    topology, workload, failure, and carbon trace files.
+    Looks up the experiments in the experiment manifest and collects paths to all
+    referenced topology, workload, failure, and carbon trace files. Only experiments
+    and topologies changed since they were indexed are parsed again. Parametric topologies
+    must be materialized first (see prepare_experiment_topologies()), so their carbon traces
+    are found; callers do this once per queue.
 
     Args:
         selections_list: List of queued experiment selection dictionaries.
         experiments_dir: Directory where experiment files are stored.
+        manifest: Experiment manifest from load_experiment_manifest(), for callers collecting the
+            files of many experiments one by one; they save it once done. Loaded and saved here
+            if not given.
 
     Returns:
         A set of file paths required to reproduce the experiments.
     """
 
     required_files = set()
+    owns_manifest = manifest is None
+    if owns_manifest:
+        manifest = load_experiment_manifest()
 
     for selection in selections_list:
         experiment_path = os.path.join(experiments_dir, selection["name"])
         required_files.add(experiment_path)
 
         try:
-            with open(experiment_path) as f:
-                exp_data = json.load(f)
+            entry = get_experiment_entry(manifest, experiment_path)
         except Exception as e:
             print(f"Failed to load {experiment_path}: {e}")
             continue
@@ -44,29 +57,42 @@ def collect_experiment_files(selections_list, experiments_dir="experiments"):
                 for entry in entries:
                     required_files.add(os.path.join(folder, entry))
             else:  
-                entries = exp_data.get(json_path, [])
-                for entry in entries:
-                    path = entry.get("pathToFile")
+                for path in entry["inputs"][json_path]:
                     if path:
                         required_files.add(path)
 
-        for topo_entry in exp_data.get("topologies", []):
-            topo_path = topo_entry.get("pathToFile")
-            if topo_path and os.path.exists(topo_path):
-                try:
-                    with open(topo_path, 'r') as f:
-                        topo_data = json.load(f)
-                        for cluster in topo_data.get("clusters", []):
-                            power_source = cluster.get("powerSource", {})
-                            trace = power_source.get("carbonTracePath")
-                            if trace and os.path.exists(trace):
-                                required_files.add(trace)
-                except Exception as e:
-                    print(f"Warning: Failed to parse topology {topo_path}: {e}")
-
+        for trace in get_carbon_traces(manifest, entry):
+            if os.path.exists(trace):
+                required_files.add(trace)
 
+    if owns_manifest:
+        save_experiment_manifest(manifest)
     return required_files
 
+def collect_checksum_manifests(selections_list, experiments_dir="experiments"):
+    """
+    Gather the output checksum manifests of the queued experiments that have one.
+
+    Kept apart from collect_experiment_files(), as the manifests are outputs of a run and must
+    not change the cache key of its inputs.
+
+    Returns:
+        A set of checksum manifest paths.
+    """
+
+    paths = set()
+    manifest = load_experiment_manifest()
+    for selection in selections_list:
+        try:
+            entry = get_experiment_entry(manifest, os.path.join(experiments_dir, selection["name"]))
+        except Exception:
+            continue
+        path = get_checksum_manifest_path(os.path.join(entry["outputFolder"] or "output", entry["name"] or ""))
+        if os.path.exists(path):
+            paths.add(path)
+    save_experiment_manifest(manifest)
+    return paths
+
 def recursive_zip(file_path, zipf):
     """
     Recursively add all files within a directory to the zip archive.
@@ -82,33 +108,64 @@ def recursive_zip(file_path, zipf):
             rel_path = os.path.relpath(full_path)
             zipf.write(full_path, arcname=rel_path)
 
-def create_reproducibility_zip(queue, readme_path="README.md", output_name="reproducibility_capsule.zip"):
+def create_reproducibility_zip(queue, readme_path="README.md", output_name="reproducibility_capsule.zip",
+                               include_outputs=True):
 
     """
     Create a reproducibility zip archive containing only required files.
 
     Includes selected experiments, referenced inputs, code, README, and main notebook.
+    Topologies linked to the topology store are added once per unique content, together with
+    the links needed to restore their paths (see restore_topology_links()). Parametric
+    topologies are added as their base topology and values only.
+
+    The output checksum manifests of the experiments are always added, so a reproduction can
+    be verified against them even if the original outputs are left out.
 
     Args:
         queue: The list of experiment selections.
         readme_path: Path to the README file.
         output_name: Output zip filename.
+        include_outputs: Add the original output folder (default True).
     """
 
-    files_to_zip = collect_experiment_files(queue)
+    prepare_experiment_topologies(queue)
+    files_to_zip = collect_experiment_files(queue) | collect_checksum_manifests(queue)
     
 
-    static_includes = ["main.ipynb", readme_path]
-    source_dirs = ["src", "OpenDCExperimentRunner", "output"]
+    static_includes = ["main.ipynb", readme_path, ALIAS_MANIFEST_PATH]
+    source_dirs = ["src", "OpenDCExperimentRunner"] + (["output"] if include_outputs else [])
+    topology_links = load_topology_links()
+    links, parametric = topology_links["links"], topology_links["parametric"]
+    zipped_links = {}
+    zipped_parametric = {}
+    zipped_digests = set()
+
+    def zip_store_file(zipf, digest):
+        if digest not in zipped_digests:
+            zipped_digests.add(digest)
+            zipf.write(get_store_path(digest), arcname=get_store_path(digest))
 
     with zipfile.ZipFile(output_name, 'w', zipfile.ZIP_DEFLATED, allowZip64=True) as zipf:
         
         for file_path in files_to_zip:
-            if os.path.isdir(file_path):
+            path = os.path.normpath(file_path)
+            digest = links.get(path)
+            if path in parametric and os.path.isfile(get_store_path(parametric[path]["base"])):
+                zip_store_file(zipf, parametric[path]["base"])
+                zipped_parametric[path] = parametric[path]
+            elif digest is not None and os.path.isfile(get_store_path(digest)):
+                zip_store_file(zipf, digest)
+                zipped_links[path] = digest
+            elif os.path.isdir(file_path):
                 recursive_zip(file_path, zipf)
             elif os.path.isfile(file_path):
                 zipf.write(file_path, arcname=file_path)
 
+        if zipped_links or zipped_parametric:
+            zipf.writestr(TOPOLOGY_LINKS_PATH, json.dumps(
+                {"links": zipped_links, "parametric": zipped_parametric, "sweeps": {}}, separators=(",", ":")
+            ))
 
         for file in static_includes:
             if os.path.exists(file):
@@ -119,23 +176,31 @@ def create_reproducibility_zip(queue, readme_path="README.md", output_name="repr
             recursive_zip(file_path, zipf)
 
     
-def quick_export_all_zip(output_name="reproducibility_capsule.zip"):
+def quick_export_all_zip(output_name="reproducibility_capsule.zip", include_outputs=True):
 
     """
     Export a zip with all relevant directories and files for fast packaging.
 
-    Includes experiments, topologies, traces, output, source code, README, and notebook.
+    Includes experiments, topologies, traces, output checksums, output, source code, README,
+    and notebook.
+    Topology paths linked to the topology store and materialized parametric topologies are
+    left out, as the store and link manifest hold their content.
 
     Args:
         output_name: Name of the resulting zip archive.
+        include_outputs: Add the output folder (default True); without it, reproductions are
+            verified against the output checksums.
     """
 
     roots = [
         "experiments", "README.md",
-        "topologies", "workload_traces", "failure_traces", "carbon_traces",
-        "output", "src", "OpenDCExperimentRunner",
-        "main.ipynb"
-    ]
+        "topologies", "workload_traces", "failure_traces", "carbon_traces", CHECKSUMS_DIR,
+        "src", "OpenDCExperimentRunner",
+        "main.ipynb", ALIAS_MANIFEST_PATH
+    ] + (["output"] if include_outputs else [])
+
+    topology_links = load_topology_links()
+    links = {**topology_links["links"], **topology_links["parametric"]}
 
     with zipfile.ZipFile(output_name, "w", zipfile.ZIP_STORED) as z:
         for path in roots:
@@ -145,5 +210,7 @@ def quick_export_all_zip(output_name="reproducibility_capsule.zip"):
                 for root, _, files in os.walk(path):
                     for f in files:
                         full = os.path.join(root, f)
+                        if os.path.normpath(full) in links:
+                            continue
                         z.write(full, arcname=full)
 
@@ -0,0 +1,111 @@
+import os
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Files serialized and written per thread pool task, so large sweeps do not create a future per file.
+WRITE_BATCH_SIZE = 256
+
+# Writer threads; writing is I/O bound, so more threads than cores help on slow or network disks.
+WRITE_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+
+def new_json_writer(compact=False, max_workers=WRITE_WORKERS, batch_size=WRITE_BATCH_SIZE, atomic=False):
+    """
+    Create a batched JSON writer that serializes and writes files on a thread pool.
+
+    Args:
+        compact: Write JSON without indentation or whitespace (smaller and faster to write).
+        max_workers: Number of writer threads.
+        batch_size: Number of files handed to a thread at once.
+        atomic: Write to a temporary file first and rename it, so processes writing the same
+            file concurrently never leave a partially written file.
+
+    Returns:
+        Writer dictionary to pass to write_json() and close_json_writer().
+    """
+
+    return {
+        "executor": ThreadPoolExecutor(max_workers=max_workers),
+        "compact": compact,
+        "atomic": atomic,
+        "batch_size": batch_size,
+        "batch": [],
+        "futures": [],
+        "directories": set(),
+        "written": [],
+        "started": time.perf_counter(),
+    }
+
+
+def write_json_batch(batch, compact, atomic):
+    written = []
+    for path, content in batch:
+        try:
+            target_path = f"{path}.{os.getpid()}.tmp" if atomic else path
+            with open(target_path, "w", encoding="utf-8") as f:
+                if compact:
+                    f.write(json.dumps(content, separators=(",", ":")))
+                else:
+                    f.write(json.dumps(content, indent=4))
+            if atomic:
+                os.replace(target_path, path)
+            written.append(path)
+        except Exception as e:
+            print(f"Error saving {path}: {e}")
+    return written
+
+
+def write_json(writer, path, content):
+    """
+    Queue a JSON file for writing.
+
+    Parent folders are created right away, once per folder. The content is serialized later on
+    a writer thread, so it must not be modified after it is queued.
+
+    Args:
+        writer: Writer from new_json_writer().
+        path: Path of the file to write.
+        content: JSON-serializable content.
+    """
+
+    directory = os.path.dirname(path)
+    if directory and directory not in writer["directories"]:
+        os.makedirs(directory, exist_ok=True)
+        writer["directories"].add(directory)
+
+    writer["batch"].append((path, content))
+    if len(writer["batch"]) >= writer["batch_size"]:
+        flush_json_writer(writer)
+
+
+def flush_json_writer(writer):
+    if writer["batch"]:
+        writer["futures"].append(writer["executor"].submit(write_json_batch, writer["batch"], writer["compact"], writer["atomic"]))
+        writer["batch"] = []
+
+
+def close_json_writer(writer, label="files", report=True):
+    """
+    Wait for all queued files to be written and report the write rate.
+
+    Args:
+        writer: Writer from new_json_writer().
+        label: Name of the written files in the report (e.g. 'topologies').
+        report: Print the number of files written and the write rate.
+
+    Returns:
+        List of paths that were written successfully, in the order they were queued.
+    """
+
+    flush_json_writer(writer)
+    for future in writer["futures"]:
+        writer["written"].extend(future.result())
+    writer["futures"] = []
+    writer["executor"].shutdown()
+
+    elapsed = time.perf_counter() - writer["started"]
+    count = len(writer["written"])
+    if count and report:
+        print(f"Wrote {count} {label} in {elapsed:.2f}s ({count / max(elapsed, 1e-9):.0f} files/sec)")
+    return writer["written"]
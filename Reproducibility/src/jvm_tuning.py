@@ -0,0 +1,151 @@
+import os
+import threading
+
+import pyarrow.parquet as pq
+
+from src.utils import get_system_info
+from src.scheduler import count_topology_hosts
+
+# Heap every runner gets regardless of the experiment (JVM, OpenDC classes, parquet writers).
+# A rough lower bound, not a measurement; tuning is opt-in (tune_jvm) for this reason.
+BASE_HEAP_MB = 512
+
+# Estimated heap per (host x task) pair, covering scheduler state and per-host task bookkeeping.
+# Not calibrated against OpenDC; an underestimate is corrected by the heap doubling on OOM retries.
+HEAP_BYTES_PER_HOST_TASK = 64
+
+# Memory left to the OS, the notebook and the JVM's off-heap memory.
+RESERVED_SYSTEM_MB = 2048
+
+# Heap sizes up to which the serial collector, and from which G1, is used; ParallelGC in between.
+SERIAL_GC_MAX_HEAP_MB = 1024
+G1_MIN_HEAP_MB = 8192
+
+_workload_tasks = {}
+
+
+def count_workload_tasks(path):
+    """
+    Count the tasks of a workload trace from the parquet footer, without reading any rows.
+
+    Args:
+        path: Workload trace folder (containing tasks.parquet) or a parquet file.
+
+    Returns:
+        Number of tasks, or 0 if the trace cannot be read.
+    """
+
+    if path not in _workload_tasks:
+        tasks_path = os.path.join(path, "tasks.parquet") if os.path.isdir(path) else path
+        try:
+            _workload_tasks[path] = pq.ParquetFile(tasks_path).metadata.num_rows
+        except Exception:
+            _workload_tasks[path] = 0
+    return _workload_tasks[path]
+
+
+def estimate_heap_mb(experiment):
+    """
+    Estimate the heap an experiment needs from its largest topology and workload.
+
+    Topologies and workloads of one experiment are simulated one after another, so the
+    footprint is driven by the largest host count times the largest task count.
+
+    Args:
+        experiment: Parsed experiment JSON.
+
+    Returns:
+        Estimated heap size in MB.
+    """
+
+    hosts = max([count_topology_hosts(t.get("pathToFile")) for t in experiment.get("topologies", [])] or [0])
+    tasks = max([count_workload_tasks(w.get("pathToFile")) for w in experiment.get("workloads", [])] or [0])
+    return BASE_HEAP_MB + int(max(hosts, 1) * max(tasks, 1) * HEAP_BYTES_PER_HOST_TASK / (1024 ** 2))
+
+
+def new_jvm_budget(max_workers, system_info=None):
+    """
+    Create the memory and CPU budget shared by the concurrent runner JVMs of a queue run.
+
+    Args:
+        max_workers: Number of concurrent runners.
+        system_info: Output of get_system_info() (collected if not provided).
+
+    Returns:
+        Budget dictionary, safe to use from several runner threads.
+    """
+
+    system_info = system_info or get_system_info()
+    memory_mb = int(system_info.get("memory_gb", 0) * 1024) - RESERVED_SYSTEM_MB
+    return {
+        "memory_mb": max(memory_mb, BASE_HEAP_MB * max_workers),
+        "cpus": system_info.get("threads") or system_info.get("cores") or 1,
+        "max_workers": max_workers,
+        "reserved_mb": 0,
+        "active": 0,
+        "lock": threading.Lock(),
+    }
+
+
+def reserve_jvm_settings(budget, heap_estimate_mb):
+    """
+    Choose the heap size, garbage collector and GC thread count of a runner about to start.
+
+    The heap is the estimate, capped by the memory not reserved by running JVMs while keeping
+    the minimum heap free for every idle runner slot. Small heaps use the serial collector,
+    large ones G1 and everything in between the throughput-oriented parallel collector, with
+    the GC threads limited to this runner's share of the CPUs. The heap is reserved until
+    release_jvm_settings() is called.
+
+    Args:
+        budget: Budget from new_jvm_budget() (settings are not chosen if None).
+        heap_estimate_mb: Heap estimate from estimate_heap_mb().
+
+    Returns:
+        Dictionary with 'heap_mb', 'gc' and 'gc_threads', or None without a budget.
+    """
+
+    if budget is None:
+        return None
+
+    with budget["lock"]:
+        idle_slots = max(budget["max_workers"] - budget["active"] - 1, 0)
+        available_mb = budget["memory_mb"] - budget["reserved_mb"] - idle_slots * BASE_HEAP_MB
+        heap_mb = max(BASE_HEAP_MB, min(int(heap_estimate_mb), available_mb))
+        budget["reserved_mb"] += heap_mb
+        budget["active"] += 1
+
+    if heap_mb <= SERIAL_GC_MAX_HEAP_MB:
+        gc, gc_threads = "SerialGC", 1
+    else:
+        gc = "G1GC" if heap_mb >= G1_MIN_HEAP_MB else "ParallelGC"
+        gc_threads = max(1, budget["cpus"] // budget["max_workers"])
+
+    return {"heap_mb": heap_mb, "gc": gc, "gc_threads": gc_threads}
+
+
+def release_jvm_settings(budget, settings):
+    if budget is None or settings is None:
+        return
+    with budget["lock"]:
+        budget["reserved_mb"] -= settings["heap_mb"]
+        budget["active"] -= 1
+
+
+def get_jvm_options(settings):
+    """
+    Turn chosen JVM settings into command-line options.
+
+    Args:
+        settings: Settings from reserve_jvm_settings() (no options if None).
+
+    Returns:
+        List of JVM options.
+    """
+
+    if settings is None:
+        return []
+    options = [f"-Xmx{settings['heap_mb']}m", f"-XX:+Use{settings['gc']}"]
+    if settings["gc"] != "SerialGC":
+        options.append(f"-XX:ParallelGCThreads={settings['gc_threads']}")
+    return options
@@ -0,0 +1,193 @@
+import os
+import json
+import hashlib
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from src.parquet_compare import COMPARE_BATCH_ROWS
+
+# Per-experiment checksum manifests, mirroring the output folders, e.g. checksums/output/exp1.json.
+# They live outside output/ so a capsule can ship them without the outputs themselves.
+CHECKSUMS_DIR = "checksums"
+
+# Bytes read at once when hashing a whole file.
+CHECKSUM_CHUNK_BYTES = 1 << 20
+
+
+def get_checksum_manifest_path(output_dir):
+    return os.path.join(CHECKSUMS_DIR, os.path.normpath(output_dir) + ".json")
+
+
+def hash_output_file(path):
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHECKSUM_CHUNK_BYTES), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def new_column_hashers():
+    return {"validity": hashlib.sha256(), "lengths": hashlib.sha256(), "values": hashlib.sha256()}
+
+
+def hash_column_batch(hashers, column):
+    """
+    Feed the values of a column batch into the hashers from new_column_hashers().
+
+    Validity, value lengths and values are hashed separately, so the result depends only on
+    the values and their nulls, not on the batch boundaries or the parquet encoding.
+    """
+
+    hashers["validity"].update(pc.is_valid(column).to_numpy(zero_copy_only=False).tobytes())
+    values = column.drop_null()
+    if (pa.types.is_integer(values.type) or pa.types.is_floating(values.type)
+            or pa.types.is_boolean(values.type) or pa.types.is_temporal(values.type)):
+        hashers["values"].update(values.to_numpy(zero_copy_only=False).tobytes())
+    elif pa.types.is_string(values.type) or pa.types.is_binary(values.type) or pa.types.is_large_string(values.type):
+        values = values.cast(pa.large_binary())
+        offsets = np.frombuffer(values.buffers()[1], dtype=np.int64)[values.offset:values.offset + len(values) + 1]
+        hashers["lengths"].update(np.diff(offsets).tobytes())
+        if len(values):
+            hashers["values"].update(values.buffers()[2][offsets[0]:offsets[-1]])
+    else:
+        for value in values.to_pylist():
+            hashers["values"].update(json.dumps(value, default=str).encode())
+            hashers["values"].update(b"\n")
+
+
+def hash_parquet_columns(path, batch_rows=COMPARE_BATCH_ROWS):
+    """
+    Hash every column of a parquet file, streaming it in batches.
+
+    Returns:
+        Tuple of (row count, {column name: hex digest}); each digest also covers the column type.
+    """
+
+    parquet_file = pq.ParquetFile(path)
+    hashers = {field.name: new_column_hashers() for field in parquet_file.schema_arrow}
+    for batch in parquet_file.iter_batches(batch_size=batch_rows):
+        for name, column_hashers in hashers.items():
+            hash_column_batch(column_hashers, batch.column(name))
+
+    columns = {}
+    for field in parquet_file.schema_arrow:
+        hasher = hashlib.sha256(str(field.type).encode())
+        for component in hashers[field.name].values():
+            hasher.update(component.digest())
+        columns[field.name] = hasher.hexdigest()
+    return parquet_file.metadata.num_rows, columns
+
+
+def get_output_checksums(output_dir):
+    """
+    Compute the checksums of all parquet files in an experiment output folder.
+
+    Returns:
+        Checksum manifest with the 'outputFolder' and per relative file path under 'files' its
+        'sha256', 'bytes', 'rows' and per-column hashes under 'columns'.
+    """
+
+    files = {}
+    for root, dirs, filenames in os.walk(output_dir):
+        dirs.sort()
+        for filename in sorted(filenames):
+            if not filename.endswith(".parquet"):
+                continue
+            path = os.path.join(root, filename)
+            rows, columns = hash_parquet_columns(path)
+            files[os.path.relpath(path, output_dir).replace("\\", "/")] = {
+                "sha256": hash_output_file(path),
+                "bytes": os.path.getsize(path),
+                "rows": rows,
+                "columns": columns,
+            }
+    return {"outputFolder": os.path.normpath(output_dir), "files": files}
+
+
+def write_output_checksums(output_dir):
+    """
+    Write the checksum manifest of an experiment output folder (see get_output_checksums()).
+
+    Returns:
+        Path of the manifest, or None if the folder does not exist or could not be hashed.
+    """
+
+    if not os.path.isdir(output_dir):
+        return None
+    path = get_checksum_manifest_path(output_dir)
+    try:
+        checksums = get_output_checksums(output_dir)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(checksums, f, indent=4)
+        os.replace(tmp_path, path)
+        return path
+    except Exception as e:
+        print(f"Failed to write checksums of {output_dir}: {e}")
+        return None
+
+
+def load_output_checksums(output_dir):
+    """
+    Load the checksum manifest of an experiment output folder.
+
+    Returns:
+        Manifest as described in get_output_checksums(), or None if there is none.
+    """
+
+    path = get_checksum_manifest_path(output_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Failed to load checksums {path}: {e}")
+        return None
+
+
+def verify_output_file(rel_path, expected, repr_file):
+    """
+    Verify a reproduced output file against the checksums of the original one.
+
+    Only the reproduced file is read. If its file hash differs, its columns are hashed to find
+    the differing ones; a file whose bytes differ but whose values are all equal (e.g. written
+    with different encoding settings) still matches.
+
+    Args:
+        rel_path: Path of the file relative to the output folder.
+        expected: Checksum entry of the original file, or None if it had no such file.
+        repr_file: Path to the reproduced file, or None if it is missing.
+
+    Returns:
+        Report like compare_output_file(), with status 'match', 'mismatch', 'missing', 'extra'
+        or 'error'; a mismatch has the 'reason' 'row_count' or 'columns' with the differing
+        'columns'.
+    """
+
+    if repr_file is None:
+        return {"file": rel_path, "status": "missing"}
+    if expected is None:
+        return {"file": rel_path, "status": "extra"}
+    try:
+        if hash_output_file(repr_file) == expected["sha256"]:
+            return {"file": rel_path, "status": "match", "rows": expected["rows"]}
+
+        rows, columns = hash_parquet_columns(repr_file)
+        if rows != expected["rows"]:
+            return {"file": rel_path, "status": "mismatch", "rows": 0, "reason": "row_count",
+                    "original": expected["rows"], "reproduced": rows}
+        differing = [
+            column for column in dict.fromkeys([*expected["columns"], *columns])
+            if expected["columns"].get(column) != columns.get(column)
+        ]
+        if differing:
+            return {"file": rel_path, "status": "mismatch", "rows": rows, "reason": "columns",
+                    "columns": differing}
+        return {"file": rel_path, "status": "match", "rows": rows}
+    except Exception as e:
+        return {"file": rel_path, "status": "error", "reason": str(e)}
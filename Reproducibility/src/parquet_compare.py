@@ -0,0 +1,269 @@
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+# Rows read per batch from each file; bounds the memory of a comparison regardless of file size.
+COMPARE_BATCH_ROWS = 65536
+
+
+def get_footer_summary(parquet_file):
+    """
+    Summarize the footer metadata of a parquet file: schema, row counts and column statistics.
+
+    Args:
+        parquet_file: An open pq.ParquetFile.
+
+    Returns:
+        Dictionary with the 'schema', 'num_rows' and per row group 'row_groups' entries of
+        (num_rows, {column: (min, max, null_count)}).
+    """
+
+    metadata = parquet_file.metadata
+    row_groups = []
+    for index in range(metadata.num_row_groups):
+        row_group = metadata.row_group(index)
+        statistics = {}
+        for column_index in range(row_group.num_columns):
+            column = row_group.column(column_index)
+            stats = column.statistics
+            if stats is not None and stats.has_min_max:
+                statistics[column.path_in_schema] = (stats.min, stats.max, stats.null_count)
+        row_groups.append((row_group.num_rows, statistics))
+    return {"schema": parquet_file.schema_arrow, "num_rows": metadata.num_rows, "row_groups": row_groups}
+
+
+def get_schema_label(schema):
+    return ", ".join(f"{field.name}: {field.type}" for field in schema)
+
+
+def compare_footers(orig_footer, repr_footer):
+    """
+    Compare the footer summaries of two parquet files.
+
+    Returns:
+        None if schema and row count match, otherwise a mismatch description with the 'reason'.
+        Differing row group statistics are reported under 'statistics' but are not a mismatch
+        by themselves, as the rows still have to be compared to locate the difference.
+    """
+
+    if not orig_footer["schema"].equals(repr_footer["schema"]):
+        return {"reason": "schema", "original": get_schema_label(orig_footer["schema"]),
+                "reproduced": get_schema_label(repr_footer["schema"])}
+    if orig_footer["num_rows"] != repr_footer["num_rows"]:
+        return {"reason": "row_count", "original": orig_footer["num_rows"], "reproduced": repr_footer["num_rows"]}
+    return None
+
+
+def get_statistics_mismatch(orig_footer, repr_footer):
+    """
+    Find the first row group and column whose footer statistics differ, if row groups line up.
+    """
+
+    if len(orig_footer["row_groups"]) != len(repr_footer["row_groups"]):
+        return None
+    for index, (orig_group, repr_group) in enumerate(zip(orig_footer["row_groups"], repr_footer["row_groups"])):
+        if orig_group[0] != repr_group[0]:
+            return None
+        for column, orig_stats in orig_group[1].items():
+            if column in repr_group[1] and repr_group[1][column] != orig_stats:
+                return {"row_group": index, "column": column}
+    return None
+
+
+def iter_aligned_batches(orig_file, repr_file, batch_rows=COMPARE_BATCH_ROWS):
+    """
+    Stream two parquet files as pairs of equally long record batches.
+
+    Batch boundaries of the two files can differ (e.g. with different row group sizes), so
+    batches are re-sliced to the shorter of the two pending batches.
+
+    Yields:
+        Tuples of (row offset, original batch, reproduced batch).
+    """
+
+    orig_batches = orig_file.iter_batches(batch_size=batch_rows)
+    repr_batches = repr_file.iter_batches(batch_size=batch_rows)
+    orig_pending = repr_pending = None
+    offset = 0
+
+    while True:
+        if orig_pending is None or orig_pending.num_rows == 0:
+            orig_pending = next(orig_batches, None)
+        if repr_pending is None or repr_pending.num_rows == 0:
+            repr_pending = next(repr_batches, None)
+        if orig_pending is None or repr_pending is None:
+            return
+
+        length = min(orig_pending.num_rows, repr_pending.num_rows)
+        yield offset, orig_pending.slice(0, length), repr_pending.slice(0, length)
+        orig_pending = orig_pending.slice(length)
+        repr_pending = repr_pending.slice(length)
+        offset += length
+
+
+def get_difference_mask(orig_column, repr_column):
+    """
+    Mark the rows where two columns differ. Nulls and NaNs are equal to each other, like in
+    DataFrame.equals().
+
+    Returns:
+        Boolean pyarrow array, True where the values differ.
+    """
+
+    try:
+        differs = pc.fill_null(pc.not_equal(orig_column, repr_column), False)
+        if pa.types.is_floating(orig_column.type):
+            both_nan = pc.and_(pc.is_nan(orig_column), pc.is_nan(repr_column))
+            differs = pc.and_not(differs, pc.fill_null(both_nan, False))
+    except pa.ArrowNotImplementedError:
+        # Nested types have no comparison kernel.
+        differs = pa.array([a != b for a, b in zip(orig_column.to_pylist(), repr_column.to_pylist())])
+    return pc.or_(differs, pc.xor(pc.is_null(orig_column), pc.is_null(repr_column)))
+
+
+def get_column_tolerance(tolerances, column):
+    """
+    Look up the tolerance of a column; the '*' entry applies to columns without their own.
+
+    Returns:
+        Tuple of (absolute, relative) tolerance, 0 where not given.
+    """
+
+    tolerance = tolerances.get(column, tolerances.get("*", {}))
+    return tolerance.get("abs", 0), tolerance.get("rel", 0)
+
+
+def new_column_stats(abs_tol, rel_tol):
+    return {"abs": abs_tol, "rel": rel_tol, "max_abs_diff": 0.0, "squared_diff": 0.0, "compared": 0,
+            "out_of_tolerance": 0, "first_row": None}
+
+
+def update_column_stats(stats, orig_column, repr_column, offset):
+    """
+    Add a batch of a column to its tolerance statistics.
+
+    Numeric values are within tolerance if |original - reproduced| <= abs + rel * |original|,
+    like numpy.isclose(). Other columns must be equal. Nulls and NaNs are equal to each other,
+    a null or NaN against a value is out of tolerance.
+    """
+
+    length = len(orig_column)
+    if orig_column.equals(repr_column):
+        stats["compared"] += length
+        return
+
+    if pa.types.is_integer(orig_column.type) or pa.types.is_floating(orig_column.type):
+        orig_valid = pc.is_valid(orig_column).to_numpy(zero_copy_only=False)
+        repr_valid = pc.is_valid(repr_column).to_numpy(zero_copy_only=False)
+        orig_values = pc.fill_null(pc.cast(orig_column, pa.float64(), safe=False), 0.0).to_numpy()
+        repr_values = pc.fill_null(pc.cast(repr_column, pa.float64(), safe=False), 0.0).to_numpy()
+
+        with np.errstate(invalid="ignore", over="ignore"):
+            equal = (orig_values == repr_values) | (np.isnan(orig_values) & np.isnan(repr_values))
+            diff = np.where(equal, 0.0, np.abs(orig_values - repr_values))
+            within = equal | (diff <= stats["abs"] + stats["rel"] * np.abs(orig_values))
+        both_valid = orig_valid & repr_valid
+        out = (both_valid & ~within) | (orig_valid != repr_valid)
+        finite = both_valid & np.isfinite(diff)
+        if finite.any():
+            stats["max_abs_diff"] = max(stats["max_abs_diff"], float(diff[finite].max()))
+            stats["squared_diff"] += float(np.square(diff[finite]).sum())
+        stats["compared"] += int(finite.sum())
+    else:
+        out = get_difference_mask(orig_column, repr_column).to_numpy(zero_copy_only=False)
+        stats["compared"] += length
+
+    out_count = int(out.sum())
+    if out_count and stats["first_row"] is None:
+        stats["first_row"] = offset + int(np.argmax(out))
+    stats["out_of_tolerance"] += out_count
+
+
+def compare_parquet_files(orig_path, repr_path, batch_rows=COMPARE_BATCH_ROWS, tolerances=None):
+    """
+    Compare two parquet files, footer first and then streamed batch by batch.
+
+    Schema and row count mismatches are reported from the footers without reading any rows.
+    Otherwise the files are streamed in batches of batch_rows rows, so memory stays bounded,
+    and the comparison stops at the first differing value.
+
+    With tolerances, numeric values only have to agree within a per-column tolerance (see
+    update_column_stats()), which absorbs floating-point differences between platforms. All
+    rows are then compared, and every column gets summary statistics.
+
+    Args:
+        orig_path: Path to the original parquet file.
+        repr_path: Path to the reproduced parquet file.
+        batch_rows: Rows per streamed batch.
+        tolerances: Optional {column: {'abs': absolute tolerance, 'rel': relative tolerance}},
+            where a '*' column applies to all columns without their own entry.
+
+    Returns:
+        Dictionary with the 'status' ('match' or 'mismatch'), the number of 'rows' compared
+        (up to and including the first differing one if the comparison stopped there) and, for
+        a mismatch, the 'reason' and where applicable the 'first_mismatch_row' and 'column'
+        with the 'original' and 'reproduced' values. With tolerances, a value mismatch has the
+        reason 'tolerance', and 'columns' holds per column the 'abs' and 'rel' tolerance, the
+        'max_abs_diff', 'rmse' and the fraction of rows 'out_of_tolerance', with the
+        'first_row' out of tolerance.
+    """
+
+    orig_file = pq.ParquetFile(orig_path)
+    repr_file = pq.ParquetFile(repr_path)
+    orig_footer = get_footer_summary(orig_file)
+    repr_footer = get_footer_summary(repr_file)
+
+    mismatch = compare_footers(orig_footer, repr_footer)
+    if mismatch:
+        return {"status": "mismatch", "rows": 0, **mismatch}
+
+    if tolerances is not None:
+        return compare_with_tolerances(orig_file, repr_file, orig_footer["num_rows"], batch_rows, tolerances)
+
+    statistics = get_statistics_mismatch(orig_footer, repr_footer)
+    for offset, orig_batch, repr_batch in iter_aligned_batches(orig_file, repr_file, batch_rows):
+        for column in orig_batch.schema.names:
+            orig_column = orig_batch.column(column)
+            repr_column = repr_batch.column(column)
+            if orig_column.equals(repr_column):
+                continue
+            row = pc.index(get_difference_mask(orig_column, repr_column), True).as_py()
+            if row < 0:
+                continue
+            return {
+                "status": "mismatch",
+                "rows": offset + row + 1,
+                "reason": "value",
+                "first_mismatch_row": offset + row,
+                "column": column,
+                "original": orig_column[row].as_py(),
+                "reproduced": repr_column[row].as_py(),
+                "statistics": statistics,
+            }
+
+    return {"status": "match", "rows": orig_footer["num_rows"]}
+
+
+def compare_with_tolerances(orig_file, repr_file, num_rows, batch_rows, tolerances):
+    stats = {
+        column: new_column_stats(*get_column_tolerance(tolerances, column))
+        for column in orig_file.schema_arrow.names
+    }
+    for offset, orig_batch, repr_batch in iter_aligned_batches(orig_file, repr_file, batch_rows):
+        for column, column_stats in stats.items():
+            update_column_stats(column_stats, orig_batch.column(column), repr_batch.column(column), offset)
+
+    columns = {}
+    for column, column_stats in stats.items():
+        columns[column] = {
+            "abs": column_stats["abs"],
+            "rel": column_stats["rel"],
+            "max_abs_diff": column_stats["max_abs_diff"],
+            "rmse": float(np.sqrt(column_stats["squared_diff"] / column_stats["compared"])) if column_stats["compared"] else 0.0,
+            "out_of_tolerance": column_stats["out_of_tolerance"] / num_rows if num_rows else 0.0,
+            "first_row": column_stats["first_row"],
+        }
+    if any(column["first_row"] is not None for column in columns.values()):
+        return {"status": "mismatch", "rows": num_rows, "reason": "tolerance", "columns": columns}
+    return {"status": "match", "rows": num_rows, "columns": columns}
@@ -0,0 +1,168 @@
+import re
+import time
+import threading
+
+# Progress lines printed by OpenDC per scenario, per seed and every `printFrequency` export intervals.
+SCENARIO_PATTERN = re.compile(r"Running scenario: ")
+SEED_PATTERN = re.compile(r"Starting seed: (\d+)")
+TASK_COUNT_PATTERN = re.compile(r"Tasks (Total|Completed|Terminated): (\d+)")
+
+# Experiment fields OpenDC runs one scenario per combination of (see ExperimentSpec.getCartesian()).
+SCENARIO_FIELDS = ("topologies", "workloads", "allocationPolicies", "exportModels", "failureModels",
+                   "checkpointModels", "maxNumFailures")
+
+# Minimum number of seconds between two progress reports.
+REPORT_INTERVAL_SEC = 1.0
+
+
+def count_experiment_scenarios(experiment):
+    """
+    Count the scenarios OpenDC runs for an experiment: one per combination of the entries of
+    its SCENARIO_FIELDS, each repeated for every run.
+
+    Args:
+        experiment: Parsed experiment JSON.
+
+    Returns:
+        Number of scenarios (at least 1).
+    """
+
+    scenarios = 1
+    for field in SCENARIO_FIELDS:
+        entries = experiment.get(field)
+        if isinstance(entries, list) and entries:
+            scenarios *= len(entries)
+    return scenarios
+
+
+def new_queue_progress(experiments, callback=None):
+    """
+    Create the shared progress state of a queue run.
+
+    Args:
+        experiments: Dictionary mapping experiment names to (weight, runs, scenarios). The weight
+            is the predicted duration, so long experiments count more towards the queue progress;
+            scenarios comes from count_experiment_scenarios().
+        callback: Called with (fraction, eta_sec) on progress; prints a text bar if None.
+
+    Returns:
+        Progress state dictionary, safe to update from several runner threads.
+    """
+
+    total_weight = sum(max(weight, 0) for weight, *_ in experiments.values())
+    return {
+        "experiments": {
+            name: {
+                "weight": max(weight, 0) / total_weight if total_weight else 1 / len(experiments),
+                "runs": max(int(runs or 1), 1),
+                "scenarios": max(int(scenarios or 1), 1),
+                "fraction": 0.0,
+                "scenarios_started": 0,
+                "seed": 0,
+                "tasks": {},
+            }
+            for name, (weight, runs, scenarios) in experiments.items()
+        },
+        "start": time.time(),
+        "last_report": 0.0,
+        "lock": threading.Lock(),
+        "callback": callback or print_progress,
+    }
+
+
+def get_queue_fraction(progress):
+    return sum(e["weight"] * e["fraction"] for e in progress["experiments"].values())
+
+
+def report_progress(progress, force=False):
+    now = time.time()
+    if not force and now - progress["last_report"] < REPORT_INTERVAL_SEC:
+        return
+    progress["last_report"] = now
+
+    fraction = get_queue_fraction(progress)
+    elapsed = now - progress["start"]
+    eta = elapsed * (1 - fraction) / fraction if fraction > 0 else None
+    progress["callback"](fraction, eta)
+
+
+def print_progress(fraction, eta_sec):
+    width = 30
+    filled = int(width * fraction)
+    eta = f"{int(eta_sec)}s" if eta_sec is not None else "unknown"
+    print(f"[{'#' * filled}{'.' * (width - filled)}] {fraction * 100:5.1f}%  ETA {eta}")
+
+
+def handle_progress_line(progress, name, line):
+    """
+    Update the progress of an experiment from one line of OpenDC output.
+
+    OpenDC runs the scenarios of an experiment one after another and every scenario for all
+    its seeds, so progress advances per scenario and, within it, per seed; within a run the
+    fraction of finished tasks (completed + terminated over total) is taken from the periodic
+    metrics print.
+
+    Args:
+        progress: State from new_queue_progress().
+        name: Experiment the line belongs to.
+        line: Output line of the runner.
+    """
+
+    if progress is None or name not in progress["experiments"]:
+        return
+
+    scenario_match = SCENARIO_PATTERN.search(line)
+    seed_match = SEED_PATTERN.search(line)
+    task_match = TASK_COUNT_PATTERN.search(line)
+    if not scenario_match and not seed_match and not task_match:
+        return
+
+    with progress["lock"]:
+        experiment = progress["experiments"][name]
+        if scenario_match:
+            experiment["scenarios_started"] += 1
+            experiment["seed"] = 0
+            experiment["tasks"] = {}
+        elif seed_match:
+            experiment["seed"] = int(seed_match.group(1))
+            experiment["tasks"] = {}
+        else:
+            experiment["tasks"][task_match.group(1)] = int(task_match.group(2))
+
+        tasks = experiment["tasks"]
+        task_fraction = 0.0
+        if tasks.get("Total"):
+            task_fraction = min((tasks.get("Completed", 0) + tasks.get("Terminated", 0)) / tasks["Total"], 1.0)
+
+        scenario = max(experiment["scenarios_started"] - 1, 0)
+        fraction = (scenario * experiment["runs"] + experiment["seed"] + task_fraction) / (
+            experiment["scenarios"] * experiment["runs"]
+        )
+        experiment["fraction"] = max(experiment["fraction"], min(fraction, 1.0))
+        report_progress(progress)
+
+
+def mark_experiment_done(progress, name):
+    if progress is None or name not in progress["experiments"]:
+        return
+    with progress["lock"]:
+        progress["experiments"][name]["fraction"] = 1.0
+        report_progress(progress, force=True)
+
+
+def widget_progress_callback(bar, label=None):
+    """
+    Create a progress callback that drives notebook widgets.
+
+    Args:
+        bar: Widget with a numeric 'value' in [0, 1], e.g. widgets.FloatProgress(min=0, max=1).
+        label: Widget with a 'value' string showing percentage and ETA (optional).
+    """
+
+    def callback(fraction, eta_sec):
+        bar.value = fraction
+        if label is not None:
+            eta = f"{int(eta_sec)}s" if eta_sec is not None else "unknown"
+            label.value = f"{fraction * 100:.1f}% - ETA {eta}"
+
+    return callback
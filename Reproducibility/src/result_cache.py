@@ -0,0 +1,212 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+
+from src.exporter import collect_experiment_files
+
+CACHE_DIR = ".cache/results"
+DEFAULT_CACHE_SIZE_GB = 10
+RUNNER_LIB_DIR = "OpenDCExperimentRunner/lib"
+
+# Content hashes of input files, reused while their size and mtime are unchanged.
+_file_hashes = {}
+
+
+def hash_file(path):
+    """
+    Compute the SHA-256 content hash of a file, reusing earlier results for unchanged files.
+
+    Args:
+        path: Path to the file.
+
+    Returns:
+        Hex digest of the file content.
+    """
+
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if memo_key in _file_hashes:
+        return _file_hashes[memo_key]
+
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            hasher.update(chunk)
+
+    _file_hashes[memo_key] = hasher.hexdigest()
+    return _file_hashes[memo_key]
+
+
+def hash_path(path, hasher):
+    """
+    Feed the relative name and content hash of a file, or of every file in a directory, into a hasher.
+
+    Args:
+        path: File or directory path.
+        hasher: hashlib object to update.
+    """
+
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for fn in sorted(files):
+                hash_path(os.path.join(root, fn), hasher)
+    elif os.path.isfile(path):
+        hasher.update(os.path.normpath(path).replace("\\", "/").encode())
+        hasher.update(hash_file(path).encode())
+    else:
+        hasher.update(f"missing:{path}".encode())
+
+
+def hash_runner_jars(lib_dir=RUNNER_LIB_DIR):
+    """
+    Compute a hash identifying the set of OpenDC runner jars.
+
+    Returns:
+        Hex digest over the names and contents of all jars in lib_dir.
+    """
+
+    hasher = hashlib.sha256()
+    if os.path.isdir(lib_dir):
+        for fn in sorted(os.listdir(lib_dir)):
+            if fn.endswith(".jar"):
+                hash_path(os.path.join(lib_dir, fn), hasher)
+    return hasher.hexdigest()
+
+
+def compute_cache_key(selection, runner_hash, experiments_dir="experiments", manifest=None):
+    """
+    Compute the cache key of a queued experiment.
+
+    The key covers the experiment JSON, every input file the exporter would collect for it
+    (topologies, workloads, failure and carbon traces) and the runner jar set.
+
+    Args:
+        selection: Queued experiment metadata dict with a 'name' field.
+        runner_hash: Result of hash_runner_jars().
+        experiments_dir: Directory where experiment files are stored.
+        manifest: Experiment manifest shared by the keys of a whole queue (see
+            collect_experiment_files()).
+
+    Returns:
+        Hex digest identifying the experiment inputs.
+    """
+
+    hasher = hashlib.sha256(runner_hash.encode())
+    for path in sorted(collect_experiment_files([selection], experiments_dir, manifest)):
+        hash_path(path, hasher)
+    return hasher.hexdigest()
+
+
+def get_output_dir(experiment):
+    """
+    Return the folder OpenDC writes the outputs of an experiment to.
+
+    Args:
+        experiment: Parsed experiment JSON.
+    """
+
+    return os.path.join(experiment.get("outputFolder", "output"), experiment.get("name", ""))
+
+
+def lookup_cached_result(key, output_dir, cache_dir=CACHE_DIR):
+    """
+    Restore the outputs of a cached experiment run.
+
+    Args:
+        key: Cache key from compute_cache_key().
+        output_dir: Folder to restore the outputs into.
+        cache_dir: Root of the result cache.
+
+    Returns:
+        The cached run record, or None on a cache miss.
+    """
+
+    entry_dir = os.path.join(cache_dir, key)
+    entry_path = os.path.join(entry_dir, "entry.json")
+    if not os.path.exists(entry_path):
+        return None
+
+    try:
+        with open(entry_path) as f:
+            entry = json.load(f)
+        shutil.copytree(os.path.join(entry_dir, "output"), output_dir, dirs_exist_ok=True)
+    except Exception as e:
+        print(f"Failed to restore cached result {key}: {e}")
+        return None
+
+    os.utime(entry_dir)
+    return entry["record"]
+
+
+def store_result(key, output_dir, record, cache_dir=CACHE_DIR):
+    """
+    Store the outputs of a finished experiment run in the cache.
+
+    Args:
+        key: Cache key from compute_cache_key().
+        output_dir: Folder containing the experiment outputs.
+        record: Run record to return on later cache hits.
+        cache_dir: Root of the result cache.
+    """
+
+    if not os.path.isdir(output_dir):
+        return
+
+    entry_dir = os.path.join(cache_dir, key)
+    tmp_dir = f"{entry_dir}.tmp"
+    try:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        shutil.copytree(output_dir, os.path.join(tmp_dir, "output"))
+        with open(os.path.join(tmp_dir, "entry.json"), "w") as f:
+            json.dump({"record": record, "created": time.time()}, f)
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        os.replace(tmp_dir, entry_dir)
+    except Exception as e:
+        print(f"Failed to cache result of {record.get('name')}: {e}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def get_dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for fn in files:
+            total += os.path.getsize(os.path.join(root, fn))
+    return total
+
+
+def evict_cache(max_size_gb=DEFAULT_CACHE_SIZE_GB, cache_dir=CACHE_DIR):
+    """
+    Remove least recently used cache entries until the cache fits in max_size_gb.
+
+    Args:
+        max_size_gb: Maximum total size of the cache in GB.
+        cache_dir: Root of the result cache.
+
+    Returns:
+        Number of evicted entries.
+    """
+
+    if not os.path.isdir(cache_dir):
+        return 0
+
+    entries = []
+    for key in os.listdir(cache_dir):
+        entry_dir = os.path.join(cache_dir, key)
+        if os.path.isdir(entry_dir):
+            entries.append((os.path.getmtime(entry_dir), get_dir_size(entry_dir), entry_dir))
+
+    total = sum(size for _, size, _ in entries)
+    max_size = max_size_gb * (1024 ** 3)
+    evicted = 0
+
+    for _, size, entry_dir in sorted(entries):
+        if total <= max_size:
+            break
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        total -= size
+        evicted += 1
+
+    return evicted
@@ -0,0 +1,102 @@
+import os
+import json
+import time
+import threading
+
+JOURNAL_PATH = "logs/run_journal.jsonl"
+
+# States an experiment goes through; only 'done' experiments are skipped on resume.
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+def open_journal(path=JOURNAL_PATH, resume=False):
+    """
+    Open the run journal for appending events.
+
+    The journal is an append-only JSON-lines file with one event per state change, so
+    recording an event never rewrites earlier ones and survives a crashed kernel.
+
+    Args:
+        path: Journal file path.
+        resume: Keep the existing events instead of starting a new journal.
+
+    Returns:
+        Journal handle for append_journal_event().
+    """
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    return {
+        "file": open(path, "a" if resume else "w", encoding="utf-8"),
+        "lock": threading.Lock(),
+    }
+
+
+def append_journal_event(journal, name, state, **fields):
+    """
+    Append a state change of an experiment to the journal.
+
+    Args:
+        journal: Handle from open_journal() (ignored if None).
+        name: Experiment name.
+        state: One of QUEUED, RUNNING, DONE or FAILED.
+        fields: Additional event fields, e.g. exit_code and duration_sec.
+    """
+
+    if journal is None:
+        return
+    line = json.dumps({"name": name, "state": state, "time": round(time.time(), 3), **fields})
+    with journal["lock"]:
+        journal["file"].write(line + "\n")
+        journal["file"].flush()
+
+
+def close_journal(journal):
+    if journal is not None:
+        journal["file"].close()
+
+
+def load_journal(path=JOURNAL_PATH):
+    """
+    Replay the journal into the latest state of every experiment.
+
+    A partially written last line (from a crash mid-write) is ignored.
+
+    Args:
+        path: Journal file path.
+
+    Returns:
+        Dictionary mapping experiment names to their latest event, in queue order.
+        The 'selection' of the queued event is kept so the queue can be rebuilt.
+    """
+
+    states = {}
+    if not os.path.exists(path):
+        return states
+
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            previous = states.get(event["name"], {})
+            states[event["name"]] = {**event, "selection": event.get("selection", previous.get("selection"))}
+    return states
+
+
+def get_unfinished_experiments(path=JOURNAL_PATH):
+    """
+    Rebuild the queue of experiments that did not finish successfully.
+
+    Args:
+        path: Journal file path.
+
+    Returns:
+        List of queued experiment selections whose latest state is not 'done'.
+    """
+
+    return [
+        event["selection"] or {"name": name}
+        for name, event in load_journal(path).items()
+        if event["state"] != DONE
+    ]
@@ -1,26 +1,103 @@
 import os
+import re
 import sys
-import subprocess
+import json
 import time
+import shutil
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-def run_experiment(path):
+from src.utils import get_system_info
+from src.result_cache import *
+from src.scheduler import *
+from src.streaming import *
+from src.progress import *
+from src.run_journal import *
+from src.jvm_tuning import *
+from src.experiment_aliases import *
+from src.experiment_manifest import *
+from src.json_writer import *
+from src.topology_store import *
+from src.output_checksums import *
+from src.topology_generator import prepare_experiment_topologies
+
+# Rough memory budget of one OpenDCExperimentRunner JVM, used to bound the default pool size.
+JVM_MEMORY_GB = 4
+
+# Exit codes of a JVM killed by SIGKILL (e.g. by the OOM killer), directly or through the start script.
+OOM_KILLED_CODES = (-9, 137)
+
+# Stderr markers of a JVM that could not get the memory it needed.
+OOM_MARKERS = ("java.lang.OutOfMemoryError", "Could not reserve enough space", "Cannot allocate memory")
+
+# Line printed by the OpenDC runner after each experiment of a batch.
+FINISHED_PATTERN = re.compile(r"^Experiment finished: (?P<path>.+) in (?P<ms>\d+) ms$", re.MULTILINE)
+
+# Scratch folder for experiments generated in memory, which the runner JVM can only read from a file.
+GENERATED_EXPERIMENTS_DIR = ".cache/generated_experiments"
+
+# Jar and class of the runner command line; runners built before batching lack the finished message.
+RUNNER_CLI_JAR = "opendc-experiments-base.jar"
+RUNNER_CLI_CLASS = "org/opendc/experiments/base/runner/ExperimentCommand.class"
+
+
+def default_max_workers(system_info=None):
     """
-    Executes a single OpenDC experiment.
+    Derive the default number of concurrent OpenDC runners for this machine.
 
-    Detects platform (Windows or Linux) and invokes the appropriate runner.
-    Prints output and any errors encountered.
+    Uses one JVM per physical core, capped by how many JVMs fit in memory.
 
     Args:
-        path: Path to the experiment JSON file.
+        system_info: Output of get_system_info() (collected if not provided).
+
+    Returns:
+        Number of experiments to run concurrently (at least 1).
     """
 
-    print("Running simulation...")
+    system_info = system_info or get_system_info()
+    cores = system_info.get("cores") or system_info.get("threads") or 1
+    memory_slots = int(system_info.get("memory_gb", 0) // JVM_MEMORY_GB)
+    return max(1, min(cores, memory_slots))
 
-    if not os.path.exists(path):
-        print(f"ERROR: Experiment file not found at {path}")
-        return
 
-    experiment_path = os.path.abspath(path)
+def runner_supports_batches(lib_dir=RUNNER_LIB_DIR):
+    """
+    Check whether the bundled runner can run several experiments in one process.
+
+    Older runners keep only the last --experiment-path, which would silently run one experiment
+    per batch. Runners supporting batches print 'Experiment finished: ...' after each one, so
+    the message is looked up in the compiled command class.
+
+    Returns:
+        True if the runner reports finished experiments, False otherwise.
+    """
+
+    try:
+        with zipfile.ZipFile(os.path.join(lib_dir, RUNNER_CLI_JAR)) as jar:
+            return b"Experiment finished" in jar.read(RUNNER_CLI_CLASS)
+    except (OSError, KeyError, zipfile.BadZipFile):
+        return False
+
+
+def build_runner_command(experiment_paths, jvm_options=None):
+    """
+    Builds the command that runs one or more experiments in a single OpenDC runner process.
+
+    Detects platform (Windows or Linux) and targets the appropriate runner.
+    Every experiment is passed with its own '--experiment-path' argument. JVM options are
+    passed to java directly on Windows and through JAVA_OPTS to the Linux start script.
+
+    Args:
+        experiment_paths: List of paths to experiment JSON files.
+        jvm_options: List of JVM options, e.g. from get_jvm_options() (optional).
+
+    Returns:
+        The command as a list of arguments, or None if no runner is available.
+    """
+
+    path_args = []
+    for path in experiment_paths:
+        path_args += ["--experiment-path", os.path.abspath(path)]
 
     if sys.platform.startswith("win"):
         lib_dir = os.path.abspath("OpenDCExperimentRunner/lib")
@@ -28,75 +105,736 @@ def run_experiment(path):
             os.path.join(lib_dir, f) for f in os.listdir(lib_dir) if f.endswith(".jar")
         ])
 
-        java_cmd = [
+        return [
             "java",
+            *(jvm_options or []),
             "-classpath", classpath,
-            "org.opendc.experiments.base.runner.ExperimentCli",
-            "--experiment-path", experiment_path
-        ]
-
-        try:
-            result = subprocess.run(java_cmd, capture_output=True, text=True)
-            if result.stderr is not "":
-                print("STDERR:\n", result.stderr)
-        except Exception as e:
-            print(f"Failed to run experiment: {e}")
-
+            "org.opendc.experiments.base.runner.ExperimentCli"
+        ] + path_args
 
     elif sys.platform.startswith("linux"):
         runner_path = "OpenDCExperimentRunner/bin/OpenDCExperimentRunner"
         if not os.path.exists(runner_path):
             print(f"ERROR: Runner not found at {runner_path}")
-            return
+            return None
+
+        if jvm_options:
+            java_opts = " ".join([os.environ.get("JAVA_OPTS", "")] + jvm_options).strip()
+            return ["env", f"JAVA_OPTS={java_opts}", runner_path] + path_args
+        return [runner_path] + path_args
+
+    print("ERROR: Unsupported OS. This runner supports Windows and Linux")
+    return None
+
+
+def run_runner_command(runner_cmd, log_path=None, on_line=None, timeout_sec=None, idle_timeout_sec=None):
+    """
+    Runs an OpenDC runner command to completion while sampling its resource usage.
+
+    Output is streamed line by line to the log file and on_line instead of being buffered,
+    so long simulations report progress while they run.
+
+    Args:
+        runner_cmd: Command from build_runner_command().
+        log_path: File the runner output is written to (optional).
+        on_line: Callable receiving (stream_name, line) for every output line (optional).
+        timeout_sec: Wall-clock limit in seconds after which the runner is killed (optional).
+        idle_timeout_sec: Time in seconds without output after which the runner is killed (optional).
+
+    Returns:
+        Dictionary with the 'returncode', 'stderr_tail', resource 'usage' and 'timeout'
+        ('timeout' or 'idle_timeout' if the runner was killed, else None).
+    """
+
+    returncode, stderr_tail, usage, timeout = run_coroutine(
+        stream_runner_command(runner_cmd, log_path, on_line, timeout_sec, idle_timeout_sec)
+    )
+    return {
+        "returncode": returncode,
+        "stderr_tail": stderr_tail,
+        "usage": usage,
+        "timeout": timeout,
+    }
+
+
+def get_log_path(log_dir, name, attempt=1):
+    if not log_dir:
+        return None
+    suffix = f".attempt{attempt}" if attempt > 1 else ""
+    return os.path.join(log_dir, f"{os.path.splitext(name)[0]}{suffix}.log")
+
+
+def make_line_handler(names, output=None, progress=None):
+    """
+    Creates the output handler of a runner process executing the given experiments in order.
+
+    Lines are forwarded to the output widget prefixed with the experiment name and parsed
+    for progress. In a batch, the 'Experiment finished' line moves on to the next experiment.
+
+    Args:
+        names: Names of the experiments run by the process.
+        output: Object with an append_stdout method, e.g. a notebook widgets.Output (optional).
+        progress: Queue progress state from new_queue_progress() (optional).
+    """
+
+    current = {"index": 0}
+
+    def on_line(stream_name, line):
+        name = names[min(current["index"], len(names) - 1)]
+        if output is not None:
+            output.append_stdout(f"[{name}] {line}\n")
+        handle_progress_line(progress, name, line)
+        if FINISHED_PATTERN.match(line):
+            mark_experiment_done(progress, name)
+            current["index"] += 1
+
+    return on_line
+
+
+def run_experiment(path, log_path=None, on_line=None, timeout_sec=None, idle_timeout_sec=None, jvm_options=None):
+    """
+    Executes a single OpenDC experiment.
+
+    Detects platform (Windows or Linux) and invokes the appropriate runner.
+    Prints any errors encountered.
+
+    Args:
+        path: Path to the experiment JSON file.
+        log_path: File the runner output is written to (optional).
+        on_line: Callable receiving (stream_name, line) for every output line (optional).
+        timeout_sec: Wall-clock limit in seconds after which the runner is killed (optional).
+        idle_timeout_sec: Time in seconds without output after which the runner is killed (optional).
+        jvm_options: List of JVM options for the runner (optional).
+
+    Returns:
+        The attempt as returned by run_runner_command(); 'returncode' is None if the runner
+        could not be started.
+    """
+
+    print("Running simulation...")
+    not_started = {"returncode": None, "stderr_tail": [], "usage": None, "timeout": None}
+
+    if not os.path.exists(path):
+        print(f"ERROR: Experiment file not found at {path}")
+        return not_started
+
+    runner_cmd = build_runner_command([path], jvm_options)
+    if runner_cmd is None:
+        return not_started
+
+    try:
+        attempt = run_runner_command(runner_cmd, log_path, on_line, timeout_sec, idle_timeout_sec)
+    except Exception as e:
+        print(f"Failed to run experiment: {e}")
+        return {**not_started, "stderr_tail": [str(e)]}
+
+    if attempt["timeout"]:
+        print(f"ERROR: {path} was killed after hitting its {attempt['timeout'].replace('_', ' ')}")
+    elif attempt["returncode"] != 0 and attempt["stderr_tail"]:
+        print(f"STDERR ({path}):\n", "\n".join(attempt["stderr_tail"]))
+    return attempt
+
+
+def run_experiment_batch(paths, log_path=None, on_line=None, timeout_sec=None, idle_timeout_sec=None,
+                         jvm_options=None):
+    """
+    Executes several OpenDC experiments in one runner process.
+
+    This avoids paying JVM startup and class loading once per experiment.
+    Experiments the runner did not report as finished are missing from the durations.
+
+    Args:
+        paths: List of paths to experiment JSON files.
+        log_path: File the runner output is written to (optional).
+        on_line: Callable receiving (stream_name, line) for every output line (optional).
+        timeout_sec: Wall-clock limit in seconds for the whole batch (optional).
+        idle_timeout_sec: Time in seconds without output after which the runner is killed (optional).
+        jvm_options: List of JVM options for the runner (optional).
+
+    Returns:
+        The attempt as returned by run_runner_command(), with 'durations' mapping each
+        finished path to its simulation time in seconds.
+    """
+
+    print(f"Running batch of {len(paths)} simulations...")
+    not_started = {"returncode": None, "stderr_tail": [], "usage": None, "timeout": None, "durations": {}}
+
+    existing = []
+    for path in paths:
+        if os.path.exists(path):
+            existing.append(path)
+        else:
+            print(f"ERROR: Experiment file not found at {path}")
+
+    if not existing:
+        return not_started
+
+    runner_cmd = build_runner_command(existing, jvm_options)
+    if runner_cmd is None:
+        return not_started
+
+    finished = {}
+
+    def collect_finished(stream_name, line):
+        match = FINISHED_PATTERN.match(line)
+        if match:
+            finished[match.group("path")] = int(match.group("ms")) / 1000
+        if on_line:
+            on_line(stream_name, line)
+
+    try:
+        attempt = run_runner_command(runner_cmd, log_path, collect_finished, timeout_sec, idle_timeout_sec)
+    except Exception as e:
+        print(f"Failed to run experiment batch: {e}")
+        return {**not_started, "stderr_tail": [str(e)]}
+
+    if attempt["timeout"]:
+        print(f"ERROR: batch of {len(existing)} was killed after hitting its {attempt['timeout'].replace('_', ' ')}")
+    elif attempt["returncode"] != 0 and attempt["stderr_tail"]:
+        print(f"STDERR (batch of {len(existing)}):\n", "\n".join(attempt["stderr_tail"]))
+
+    durations = {}
+    for path in existing:
+        duration = finished.get(os.path.abspath(path))
+        if duration is None:
+            print(f"WARNING: Runner did not report {path} as finished")
+        else:
+            durations[path] = duration
+    return {**attempt, "durations": durations}
+
+
+def is_transient_failure(attempt):
+    """
+    Decides whether a failed attempt is worth retrying.
+
+    JVMs killed by the OOM killer (SIGKILL) or failing to allocate memory may succeed once
+    concurrent runs have freed memory. Timeouts and ordinary errors are not retried.
+
+    Args:
+        attempt: Attempt as returned by run_experiment() or run_experiment_batch().
+    """
+
+    if attempt["timeout"] or attempt["returncode"] in (0, None):
+        return False
+    if attempt["returncode"] in OOM_KILLED_CODES:
+        return True
+    return any(marker in line for line in attempt["stderr_tail"] for marker in OOM_MARKERS)
+
+
+def get_run_status(attempt, completed):
+    if completed:
+        return "completed"
+    if attempt["timeout"]:
+        return attempt["timeout"]
+    if attempt["returncode"] is None:
+        return "not_started"
+    return "failed"
+
 
+def new_run_context(log_dir=None, output=None, progress=None, journal=None, timeout_sec=None,
+                    idle_timeout_sec=None, max_retries=0, retry_backoff_sec=0, jvm_budget=None,
+                    heap_estimates=None, experiments_dir="experiments"):
+    """
+    Bundles the settings shared by all runner processes of a queue run.
+
+    Args:
+        log_dir: Folder receiving one log file per runner process (optional).
+        output: Widget the runner output is streamed to (optional).
+        progress: Queue progress state from new_queue_progress() (optional).
+        journal: Run journal from open_journal() (optional).
+        timeout_sec: Wall-clock limit per experiment in seconds (optional).
+        idle_timeout_sec: Limit on the time without runner output in seconds (optional).
+        max_retries: Number of retries after a transient failure.
+        retry_backoff_sec: Delay before the first retry, doubled for every further one.
+        jvm_budget: Budget from new_jvm_budget() the JVM settings are chosen from (optional).
+        heap_estimates: Dictionary mapping experiment names to estimate_heap_mb() (optional).
+        experiments_dir: Directory where experiment files are stored.
+    """
+
+    return {
+        "log_dir": log_dir,
+        "output": output,
+        "progress": progress,
+        "journal": journal,
+        "timeout_sec": timeout_sec,
+        "idle_timeout_sec": idle_timeout_sec,
+        "max_retries": max_retries,
+        "retry_backoff_sec": retry_backoff_sec,
+        "jvm_budget": jvm_budget,
+        "heap_estimates": heap_estimates or {},
+        "experiments_dir": experiments_dir,
+    }
+
+
+def reserve_attempt_jvm(context, names, attempts):
+    """
+    Chooses the JVM settings of one runner attempt for the given experiments.
+
+    The largest heap estimate of the experiments is used and doubled for every retry,
+    since transient failures are mostly caused by running out of memory.
+    """
+
+    estimate = max(context["heap_estimates"].get(name, BASE_HEAP_MB) for name in names)
+    return reserve_jvm_settings(context["jvm_budget"], estimate * 2 ** (attempts - 1))
+
+
+def get_jvm_fields(settings):
+    if settings is None:
+        return {}
+    return {
+        "jvm_heap_mb": settings["heap_mb"],
+        "jvm_gc": settings["gc"],
+        "jvm_gc_threads": settings["gc_threads"],
+    }
+
+
+def wait_before_retry(context, names, attempt, attempts):
+    delay = context["retry_backoff_sec"] * 2 ** (attempts - 1)
+    print(f"Transient failure of {', '.join(names)} (exit code {attempt['returncode']}), "
+          f"retrying in {delay}s ({attempts}/{context['max_retries']} retries)")
+    time.sleep(delay)
+
+
+def journal_finished_run(journal, record):
+    append_journal_event(
+        journal,
+        record["name"],
+        DONE if record["completed"] else FAILED,
+        status=record["status"],
+        attempts=record["attempts"],
+        exit_code=record["returncode"],
+        duration_sec=record["duration_sec"]
+    )
+
+
+def run_timed_experiment(exp, context):
+    """
+    Runs a single queued experiment, retrying transient failures, and measures its execution time.
+
+    Args:
+        exp: Queued experiment metadata dict with a 'name' field.
+        context: Settings from new_run_context().
+
+    Returns:
+        Run result dictionary with the experiment name, 'status' (completed, failed, timeout,
+        idle_timeout or not_started), number of 'attempts', exit code, stderr tail, execution
+        duration of the last attempt, its log file, the JVM heap, garbage collector and GC threads
+        chosen for it and the peak memory, CPU time, I/O and thread usage of the runner process.
+    """
+
+    filename = exp["name"]
+    print(f"Running: {filename}")
+    exec_path = os.path.join(context["experiments_dir"], filename)
+    on_line = make_line_handler([filename], context["output"], context["progress"])
+    attempts = 0
+
+    while True:
+        attempts += 1
+        append_journal_event(context["journal"], filename, RUNNING, attempt=attempts)
+        log_path = get_log_path(context["log_dir"], filename, attempts)
+        jvm_settings = reserve_attempt_jvm(context, [filename], attempts)
+        start_time = time.time()
         try:
-            result = subprocess.run([runner_path, "--experiment-path", experiment_path], capture_output=True, text=True)
-            if result.stderr:
-                print("STDERR:\n", result.stderr)
-                print("Experiment status: ")
-        except Exception as e:
-            print(f"Failed to run experiment: {e}")
+            attempt = run_experiment(
+                exec_path, log_path, on_line, context["timeout_sec"], context["idle_timeout_sec"],
+                get_jvm_options(jvm_settings)
+            )
+        finally:
+            release_jvm_settings(context["jvm_budget"], jvm_settings)
+        duration = time.time() - start_time
 
-    else:
-        print("ERROR: Unsupported OS. This runner supports Windows and Linux")
+        if attempts > context["max_retries"] or not is_transient_failure(attempt):
+            break
+        wait_before_retry(context, [filename], attempt, attempts)
+
+    mark_experiment_done(context["progress"], filename)
+    completed = attempt["returncode"] == 0
+
+    record = {
+        "name": filename,
+        "status": get_run_status(attempt, completed),
+        "attempts": attempts,
+        "duration_sec": round(duration, 2) if duration else None,
+        "returncode": attempt["returncode"],
+        "completed": completed,
+        "stderr_tail": [] if completed else attempt["stderr_tail"],
+        "log_path": log_path,
+        **get_jvm_fields(jvm_settings),
+        **(attempt["usage"] or {})
+    }
+    journal_finished_run(context["journal"], record)
+    return record
+
+
+def run_timed_batch(batch, context):
+    """
+    Runs a batch of queued experiments in one runner process and reports each one's execution time.
+
+    Durations come from the runner itself, so the JVM startup is not attributed to any experiment.
+    Resource usage is measured for the whole runner process, so every record of the batch carries
+    the same values together with the batch size. After a transient failure only the experiments
+    the runner did not finish are retried, and the wall-clock timeout scales with the batch size.
 
-def run_all_experiments(experiment_queue):
+    Args:
+        batch: List of queued experiment metadata dicts with a 'name' field.
+        context: Settings from new_run_context().
 
+    Returns:
+        List of run result dictionaries, as described in run_timed_experiment().
     """
-    Runs all experiments in the queue sequentially and measures execution time.
 
-    Clears the queue after execution and returns timing stats.
+    if len(batch) == 1:
+        return [run_timed_experiment(batch[0], context)]
+
+    names = [exp["name"] for exp in batch]
+    print(f"Running: {', '.join(names)}")
+    exec_paths = {name: os.path.join(context["experiments_dir"], name) for name in names}
+    records = {}
+    remaining = names
+    attempts = 0
+
+    while True:
+        attempts += 1
+        for name in remaining:
+            append_journal_event(context["journal"], name, RUNNING, attempt=attempts)
+        log_path = get_log_path(context["log_dir"], f"{os.path.splitext(remaining[0])[0]}_batch{len(remaining)}", attempts)
+        on_line = make_line_handler(remaining, context["output"], context["progress"])
+        timeout_sec = context["timeout_sec"] * len(remaining) if context["timeout_sec"] else None
+        jvm_settings = reserve_attempt_jvm(context, remaining, attempts)
+        try:
+            attempt = run_experiment_batch(
+                [exec_paths[name] for name in remaining], log_path, on_line, timeout_sec,
+                context["idle_timeout_sec"], get_jvm_options(jvm_settings)
+            )
+        finally:
+            release_jvm_settings(context["jvm_budget"], jvm_settings)
+
+        if attempt["returncode"] == 0 and not attempt["durations"]:
+            # A runner without batch support ran only the last experiment; rerun them one by one.
+            print("WARNING: Runner does not report finished experiments, running the batch one by one")
+            for exp in batch:
+                if exp["name"] in remaining:
+                    records[exp["name"]] = run_timed_experiment(exp, context)
+            for name in names:
+                if name not in remaining:
+                    mark_experiment_done(context["progress"], name)
+                    journal_finished_run(context["journal"], records[name])
+            return [records[name] for name in names]
+
+        for name in remaining:
+            path = exec_paths[name]
+            completed = path in attempt["durations"]
+            records[name] = {
+                "name": name,
+                "status": get_run_status(attempt, completed),
+                "attempts": attempts,
+                "duration_sec": round(attempt["durations"][path], 2) if completed else None,
+                "returncode": 0 if completed else attempt["returncode"],
+                "completed": completed,
+                "stderr_tail": [] if completed else attempt["stderr_tail"],
+                "batch_size": len(remaining),
+                "log_path": log_path,
+                **get_jvm_fields(jvm_settings),
+                **(attempt["usage"] or {})
+            }
+
+        remaining = [name for name in remaining if not records[name]["completed"]]
+        if not remaining or attempts > context["max_retries"] or not is_transient_failure(attempt):
+            break
+        wait_before_retry(context, remaining, attempt, attempts)
+
+    for name in names:
+        mark_experiment_done(context["progress"], name)
+        journal_finished_run(context["journal"], records[name])
+    return [records[name] for name in names]
+
+
+def run_all_experiments(experiment_queue, max_workers=None, batch_size=1, force=False,
+                        cache_size_gb=DEFAULT_CACHE_SIZE_GB, longest_first=True, log_dir="logs",
+                        output=None, progress_callback=None, journal_path=JOURNAL_PATH, resume=False,
+                        timeout_sec=None, idle_timeout_sec=None, max_retries=2, retry_backoff_sec=5,
+                        tune_jvm=False, experiments_dir="experiments"):
+
+    """
+    Runs all experiments in the queue and measures execution time.
+
+    Experiments are executed by a bounded pool of concurrent OpenDC runners. With
+    max_workers=1 they run sequentially. With batch_size > 1 each runner
+    process executes several experiments to amortize JVM startup, while timings are still
+    reported per experiment. On Ctrl-C no new experiments are started and the running ones
+    are allowed to finish.
+
+    Experiments whose JSON, input files and runner jars are unchanged since an earlier
+    completed run are not simulated again; their outputs are restored from the result cache.
+
+    By default experiments are dispatched longest-first, so a long run does not start last and
+    hold up the whole queue. Durations are predicted from the run history of experiments with
+    the same signature, or from the workload size and host count for unseen ones.
+
+    Runner output is streamed line by line to one log file per runner process in log_dir and,
+    if given, to an output widget. OpenDC's progress prints are turned into a progress and ETA
+    estimate for the whole queue.
+
+    Runners exceeding timeout_sec, or silent for longer than idle_timeout_sec, are killed so a
+    hung simulation cannot block the queue. Transient failures such as OOM-killed JVMs are
+    retried up to max_retries times with exponential backoff.
+
+    With tune_jvm, every runner gets a heap size, garbage collector and GC thread count chosen
+    from the experiment's estimated footprint (largest host count times largest workload task
+    count) and the memory and CPUs not taken by the other concurrent runners. A retry after a
+    transient failure doubles the heap estimate. Without it, runners keep the JVM defaults.
+
+    After every completed run a checksum manifest of the experiment outputs is written (see
+    write_output_checksums()), so reproductions can be verified without the original outputs.
+
+    Experiments recorded as aliases of a completed experiment (see register_experiment()) get
+    its outputs hard-linked into their own output folders. Topology links missing from the
+    topology store (e.g. in an unpacked capsule) are restored and parametric topologies are
+    materialized before anything runs.
+
+    Every state change (queued, running, done, failed) is appended to a journal on disk, so a
+    run interrupted by a crashed kernel can be continued with resume_experiments().
+
+    Removes the successfully completed experiments from the queue, so failed and unstarted
+    ones stay queued, and returns timing stats.
 
     Args:
         experiment_queue: List of queued experiments.
+        max_workers: Maximum number of concurrent runners (default derived from get_system_info()).
+        batch_size: Number of experiments handed to one runner process (default 1); ignored with a
+            warning if the bundled runner does not support batches (see runner_supports_batches()).
+        force: Rerun every experiment even if a cached result exists (default False).
+        cache_size_gb: Maximum size of the result cache, least recently used results are evicted first.
+        longest_first: Dispatch by decreasing predicted duration instead of queue order (default True).
+        log_dir: Folder for the runner log files (default 'logs', None disables logging).
+        output: Object with an append_stdout method (e.g. widgets.Output) receiving the runner output.
+        progress_callback: Called with (fraction, eta_sec) as the queue progresses; prints a text bar if None.
+        journal_path: Journal file recording the state of every experiment (None disables it).
+        resume: Append to the existing journal instead of starting a new one (used by resume_experiments()).
+        timeout_sec: Wall-clock limit per experiment in seconds (default no limit).
+        idle_timeout_sec: Limit on the time without runner output in seconds (default no limit).
+        max_retries: Number of retries after a transient failure (default 2).
+        retry_backoff_sec: Delay before the first retry in seconds, doubled for every further one (default 5).
+        tune_jvm: Choose JVM heap and GC settings per experiment instead of the JVM defaults (default False).
+        experiments_dir: Directory the queued experiment files are read from (default 'experiments').
 
     Returns:
-        A list of dictionaries with experiment names and execution durations.
+        A dictionary with one run result per experiment under 'experiments' (see run_timed_experiment()),
+        the total wall-clock time under 'total_duration_sec' and the pool size under 'max_workers'.
     """
     
     if not experiment_queue:
         print("No experiments added")
         return
-        
-    print("Running all queued experiments...")
-    
-    experiment_times = []
+
+    journal = open_journal(journal_path, resume) if journal_path else None
+    if not resume:
+        for exp in experiment_queue:
+            append_journal_event(journal, exp["name"], QUEUED, selection=exp)
+
+    cached_times = []
+    cache_entries = {}
+    profiles = {}
+    run_counts = {}
+    heap_estimates = {}
+    output_dirs = {}
+    pending = []
+    runner_hash = hash_runner_jars()
+    history = load_run_history()
+    prepare_experiment_topologies(experiment_queue, experiments_dir)
+    manifest = load_experiment_manifest()
 
     for exp in experiment_queue:
-                
-        filename = exp["name"]
-        print(f"Running: {filename}")
-        exec_path = f"experiments/{filename}"
-        start_time = time.time()
-        run_experiment(exec_path)
-        duration = time.time() - start_time
+        try:
+            with open(os.path.join(experiments_dir, exp["name"])) as f:
+                experiment = json.load(f)
+            key = compute_cache_key(exp, runner_hash, experiments_dir, manifest)
+            output_dir = get_output_dir(experiment)
+            output_dirs[exp["name"]] = output_dir
+            profiles[exp["name"]] = get_experiment_profile(experiment)
+            run_counts[exp["name"]] = (experiment.get("runs", 1), count_experiment_scenarios(experiment))
+            heap_estimates[exp["name"]] = estimate_heap_mb(experiment)
+        except Exception as e:
+            print(f"Failed to inspect {exp['name']}: {e}")
+            pending.append(exp)
+            continue
+
+        record = None if force else lookup_cached_result(key, output_dir)
+        if record:
+            print(f"Cached: {exp['name']}")
+            if not os.path.exists(get_checksum_manifest_path(output_dir)):
+                write_output_checksums(output_dir)
+            cached_times.append({**record, "status": "cached", "cached": True})
+            append_journal_event(journal, exp["name"], DONE, cached=True, duration_sec=record.get("duration_sec"))
+        else:
+            cache_entries[exp["name"]] = (key, output_dir)
+            pending.append(exp)
+    save_experiment_manifest(manifest)
+
+    if longest_first:
+        pending = order_longest_first(
+            [(exp, *profiles.get(exp["name"], (None, 0))) for exp in pending], history
+        )
+
+    progress = None
+    if pending:
+        progress = new_queue_progress(
+            {
+                exp["name"]: (predict_duration(history, *profiles.get(exp["name"], (None, 0))),
+                              *run_counts.get(exp["name"], (1, 1)))
+                for exp in pending
+            },
+            progress_callback
+        )
+    batch_size = max(1, int(batch_size))
+    if batch_size > 1 and not runner_supports_batches():
+        print("WARNING: The bundled OpenDC runner does not support batches (rebuild "
+              f"{RUNNER_CLI_JAR} from ExperimentCli.kt), running one experiment per process")
+        batch_size = 1
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+
+    if max_workers is None:
+        max_workers = default_max_workers()
+    max_workers = max(1, min(int(max_workers), len(batches)))
+
+    context = new_run_context(
+        log_dir, output, progress, journal, timeout_sec, idle_timeout_sec, max_retries, retry_backoff_sec,
+        new_jvm_budget(max_workers) if tune_jvm else None, heap_estimates, experiments_dir
+    )
+
+    print(f"Running all queued experiments with {max_workers} concurrent runner(s)...")
+    
+    finished = set()
+    interrupted = False
+    start_time = time.time()
+
+    def handle_finished(future):
+        for record in future.result():
+            if not record["completed"]:
+                continue
+            if record["name"] in cache_entries:
+                key, output_dir = cache_entries[record["name"]]
+                write_output_checksums(output_dir)
+                store_result(key, output_dir, record)
+            if record["name"] in profiles and record["duration_sec"] is not None:
+                output_dir = cache_entries.get(record["name"], (None, None))[1]
+                output_bytes = get_path_size(output_dir) if output_dir else None
+                update_run_history(history, *profiles[record["name"]], record["duration_sec"], output_bytes)
+        finished.add(future)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    futures = [executor.submit(run_timed_batch, batch, context) for batch in batches]
+
+    try:
+        for future in as_completed(futures):
+            handle_finished(future)
+    except KeyboardInterrupt:
+        interrupted = True
+        print("Interrupted: no new experiments will be started, waiting for running ones to finish...")
+        executor.shutdown(wait=True, cancel_futures=True)
+        for future in futures:
+            if future not in finished and future.done() and not future.cancelled():
+                handle_finished(future)
+    finally:
+        executor.shutdown(wait=True)
+        close_journal(journal)
+
+    total_duration = time.time() - start_time
+    experiment_times = cached_times + [
+        record for future in futures if future in finished for record in future.result()
+    ]
+    evict_cache(cache_size_gb)
+    save_run_history(history)
+
+    aliases = load_alias_manifest()
+    aliases_changed = False
+    for record in experiment_times:
+        if record.get("completed") and record["name"] in output_dirs:
+            aliases_changed |= link_alias_outputs(aliases, record["name"], output_dirs[record["name"]], experiments_dir)
+    if aliases_changed:
+        save_alias_manifest(aliases)
+
+    completed = {record["name"] for record in experiment_times if record.get("completed")}
+    experiment_queue[:] = [exp for exp in experiment_queue if exp["name"] not in completed]
+
+    if interrupted:
+        print(f"Stopped after {len(experiment_times)} experiment(s), {len(experiment_queue)} left in the queue.")
+    elif experiment_queue:
+        print(f"{len(experiment_queue)} experiment(s) failed and stay in the queue.")
+    else:
+        print("All experiments completed.")
+    print(f"Total wall-clock time: {round(total_duration, 2)} seconds")
+
+    return {
+        "experiments": experiment_times,
+        "total_duration_sec": round(total_duration, 2),
+        "max_workers": max_workers
+    }
 
-        experiment_times.append({
-            "name": filename,
-            "duration_sec": round(duration, 2) if duration else None
-        })
 
+def resume_experiments(journal_path=JOURNAL_PATH, **kwargs):
+    """
+    Continues an interrupted run_all_experiments() call from its journal.
+
+    Only experiments that are not recorded as done are run again; their events are
+    appended to the same journal.
+
+    Args:
+        journal_path: Journal file written by the interrupted run.
+        kwargs: Further arguments passed to run_all_experiments().
+
+    Returns:
+        Timing stats of the resumed experiments, or None if nothing is left to run.
+    """
+
+    queue = get_unfinished_experiments(journal_path)
+    if not queue:
+        print("Nothing to resume, all journaled experiments are done.")
+        return None
+
+    print(f"Resuming {len(queue)} unfinished experiment(s)...")
+    return run_all_experiments(queue, journal_path=journal_path, resume=True, **kwargs)
+
+
+def write_generated_experiments(experiments, experiments_dir=GENERATED_EXPERIMENTS_DIR):
+    """
+    Writes lazily generated experiments as compact JSON, in batches, for the runner to read.
+
+    Args:
+        experiments: Iterable of (filename, experiment) tuples, e.g. from iter_experiment_values().
+        experiments_dir: Scratch folder the files are written to.
+
+    Returns:
+        Experiment queue referencing the written files.
+    """
+
+    writer = new_json_writer(compact=True)
+    names = {}
+    for name, experiment in experiments:
+        path = os.path.join(experiments_dir, name)
+        names[path] = name
+        write_json(writer, path, experiment)
+    return [{"name": names[path]} for path in close_json_writer(writer, "experiments")]
+
+
+def run_generated_experiments(experiments, experiments_dir=GENERATED_EXPERIMENTS_DIR, **kwargs):
+    """
+    Runs generated experiments directly, without saving them to 'experiments/' first.
+
+    The experiments are consumed one by one from the iterator and written in compact form to a
+    scratch folder, which replaces the previous generated run. Use save_experiments() to write
+    them to 'experiments/' for exporting. To resume an interrupted generated run, pass the same
+    experiments_dir to resume_experiments().
+
+    Args:
+        experiments: Iterable of (filename, experiment) tuples, e.g. from iter_experiment_values().
+        experiments_dir: Scratch folder for the experiment files.
+        kwargs: Further arguments passed to run_all_experiments().
+
+    Returns:
+        Timing stats as returned by run_all_experiments().
+    """
 
-    experiment_queue.clear()
-    print("All experiments completed.")
-    return experiment_times
\ No newline at end of file
+    shutil.rmtree(experiments_dir, ignore_errors=True)
+    queue = write_generated_experiments(experiments, experiments_dir)
+    return run_all_experiments(queue, experiments_dir=experiments_dir, **kwargs)
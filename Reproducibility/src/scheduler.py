@@ -0,0 +1,218 @@
+import os
+import json
+
+HISTORY_PATH = ".cache/run_history.json"
+
+# Seconds per (workload byte x host x run), used until the history has been calibrated.
+DEFAULT_SECONDS_PER_COST = 1e-7
+
+# Output bytes per (workload byte x host x run), used until the history has been calibrated.
+DEFAULT_OUTPUT_BYTES_PER_COST = 1e-2
+
+_topology_hosts = {}
+
+
+def count_topology_hosts(path):
+    """
+    Count the hosts of a topology file, taking the 'count' field of each host entry into account.
+
+    Args:
+        path: Path to the topology JSON file.
+
+    Returns:
+        Total number of hosts, or 0 if the topology cannot be read (not cached, as a dry run
+        may refer to uploaded topologies that are only saved later).
+    """
+
+    if path not in _topology_hosts:
+        try:
+            with open(path) as f:
+                topology = json.load(f)
+            _topology_hosts[path] = sum(
+                int(host.get("count", 1))
+                for cluster in topology.get("clusters", [])
+                for host in cluster.get("hosts", [])
+            )
+        except Exception:
+            return 0
+    return _topology_hosts[path]
+
+
+def get_path_size(path):
+    if os.path.isdir(path):
+        return sum(
+            os.path.getsize(os.path.join(root, fn))
+            for root, _, files in os.walk(path) for fn in files
+        )
+    return os.path.getsize(path) if os.path.isfile(path) else 0
+
+
+def get_experiment_profile(experiment):
+    """
+    Describe an experiment by the properties that drive its simulation time.
+
+    Args:
+        experiment: Parsed experiment JSON.
+
+    Returns:
+        Tuple of (signature, cost). The signature identifies experiments expected to take
+        equally long (host count, workload trace, failure trace, export interval and runs).
+        The cost is a size estimate used when no history exists for the signature.
+    """
+
+    hosts = sum(count_topology_hosts(t.get("pathToFile")) for t in experiment.get("topologies", []))
+    workloads = [w.get("pathToFile") for w in experiment.get("workloads", [])]
+    failures = [f.get("pathToFile") for f in experiment.get("failureModels", [])]
+    export_models = experiment.get("exportModels") or [{}]
+    export_interval = export_models[0].get("exportInterval")
+    runs = int(experiment.get("runs", 1))
+
+    signature = json.dumps([hosts, workloads, failures, export_interval, runs])
+    cost = sum(get_path_size(w) for w in workloads) * max(hosts, 1) * runs
+    return signature, cost
+
+
+def load_run_history(path=HISTORY_PATH):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Failed to load run history: {e}")
+        return {}
+
+
+def save_run_history(history, path=HISTORY_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(history, f)
+    os.replace(tmp_path, path)
+
+
+def update_run_history(history, signature, cost, duration, output_bytes=None):
+    """
+    Add a measured duration to the history, keeping the running mean per signature.
+
+    Args:
+        history: History dictionary from load_run_history().
+        signature: Experiment signature from get_experiment_profile().
+        cost: Experiment cost from get_experiment_profile().
+        duration: Measured duration in seconds.
+        output_bytes: Size of the experiment outputs in bytes (optional).
+    """
+
+    entry = history.setdefault(signature, {"duration_sec": 0.0, "runs": 0, "cost": cost})
+    if output_bytes is not None:
+        previous = entry.get("output_bytes", output_bytes)
+        entry["output_bytes"] = (previous * entry["runs"] + output_bytes) / (entry["runs"] + 1)
+    entry["duration_sec"] = (entry["duration_sec"] * entry["runs"] + duration) / (entry["runs"] + 1)
+    entry["runs"] += 1
+    entry["cost"] = cost
+
+
+def predict_duration(history, signature, cost):
+    """
+    Predict the duration of an experiment.
+
+    Uses the mean historical duration of the signature if known. Otherwise the cost
+    is converted to seconds with the rate observed over the whole history.
+
+    Returns:
+        Predicted duration in seconds.
+    """
+
+    if signature in history:
+        return history[signature]["duration_sec"]
+
+    total_cost = sum(entry.get("cost", 0) for entry in history.values())
+    total_duration = sum(entry["duration_sec"] for entry in history.values() if entry.get("cost"))
+    rate = total_duration / total_cost if total_cost else DEFAULT_SECONDS_PER_COST
+    return cost * rate
+
+
+def predict_output_bytes(history, signature, cost):
+    """
+    Predict the size of an experiment's outputs, like predict_duration() does for its duration.
+
+    Returns:
+        Predicted output size in bytes.
+    """
+
+    if "output_bytes" in history.get(signature, {}):
+        return history[signature]["output_bytes"]
+
+    measured = [entry for entry in history.values() if "output_bytes" in entry and entry.get("cost")]
+    total_cost = sum(entry["cost"] for entry in measured)
+    total_bytes = sum(entry["output_bytes"] for entry in measured)
+    rate = total_bytes / total_cost if total_cost else DEFAULT_OUTPUT_BYTES_PER_COST
+    return cost * rate
+
+
+def estimate_experiments(experiments, max_workers=1, history=None):
+    """
+    Dry-run a set of generated experiments: count them and estimate their disk footprint and runtime.
+
+    Nothing is written. Estimates come from the trace sizes and host counts of each experiment,
+    calibrated by the run history of earlier experiments when available.
+
+    Args:
+        experiments: Iterable of (filename, experiment) tuples, e.g. from iter_experiment_sweep().
+        max_workers: Number of concurrent runners the wall-clock estimate assumes.
+        history: History dictionary from load_run_history() (loaded if not provided).
+
+    Returns:
+        Dictionary with the number of 'experiments', the 'json_bytes' of their files, the predicted
+        'output_bytes', 'runtime_sec' (sum over all experiments) and 'wall_clock_sec'.
+    """
+
+    history = load_run_history() if history is None else history
+    count = 0
+    json_bytes = 0
+    output_bytes = 0
+    durations = []
+
+    for _, experiment in experiments:
+        signature, cost = get_experiment_profile(experiment)
+        count += 1
+        json_bytes += len(json.dumps(experiment, indent=4))
+        output_bytes += predict_output_bytes(history, signature, cost)
+        durations.append(predict_duration(history, signature, cost))
+
+    max_workers = max(1, int(max_workers))
+    runtime = sum(durations)
+    wall_clock = max(max(durations, default=0), runtime / max_workers)
+
+    estimate = {
+        "experiments": count,
+        "json_bytes": json_bytes,
+        "output_bytes": int(output_bytes),
+        "runtime_sec": round(runtime, 1),
+        "wall_clock_sec": round(wall_clock, 1),
+    }
+    print(f"Dry run: {count} experiment(s)")
+    print(f"  Experiment files: {round(json_bytes / 1024 ** 2, 2)} MB")
+    print(f"  Estimated outputs: {round(output_bytes / 1024 ** 3, 2)} GB")
+    print(f"  Estimated runtime: {round(runtime)} s in total, ~{round(wall_clock)} s with {max_workers} concurrent runner(s)")
+    return estimate
+
+
+def order_longest_first(profiles, history):
+    """
+    Sort experiments so the ones predicted to take longest are dispatched first.
+
+    Args:
+        profiles: List of (item, signature, cost) tuples.
+        history: History dictionary from load_run_history().
+
+    Returns:
+        The items ordered by decreasing predicted duration.
+    """
+
+    predicted = [
+        (predict_duration(history, signature, cost), index, item)
+        for index, (item, signature, cost) in enumerate(profiles)
+    ]
+    predicted.sort(key=lambda p: (-p[0], p[1]))
+    return [item for _, _, item in predicted]
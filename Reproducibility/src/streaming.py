@@ -0,0 +1,203 @@
+import os
+import re
+import time
+import asyncio
+import threading
+from collections import deque
+
+import psutil
+
+from src.telemetry import *
+
+# Number of trailing stderr lines kept in memory for error reporting.
+STDERR_TAIL_LINES = 50
+
+# Seconds between two timeout checks of a running experiment.
+WATCHDOG_INTERVAL_SEC = 1.0
+
+LINE_SPLIT = re.compile(r"[\r\n]")
+
+
+async def pump_stream(stream, stream_name, on_line, tail=None):
+    """
+    Read a child process stream chunk by chunk and hand every complete line to on_line.
+
+    Lines are split on both '\\n' and '\\r', because the OpenDC progress bar redraws itself
+    with carriage returns and never ends its line until the run finishes.
+
+    Args:
+        stream: asyncio StreamReader of the child process.
+        stream_name: 'stdout' or 'stderr'.
+        on_line: Callable receiving (stream_name, line).
+        tail: Optional deque collecting the last lines of the stream.
+    """
+
+    buffer = ""
+    while True:
+        chunk = await stream.read(1 << 16)
+        if not chunk:
+            break
+        buffer += chunk.decode(errors="replace")
+        *lines, buffer = LINE_SPLIT.split(buffer)
+        for line in lines:
+            if line.strip():
+                on_line(stream_name, line)
+                if tail is not None:
+                    tail.append(line)
+
+    if buffer.strip():
+        on_line(stream_name, buffer)
+        if tail is not None:
+            tail.append(buffer)
+
+
+async def sample_until_done(process, usage):
+    last_seen = {}
+    while process.returncode is None:
+        sample_process_tree(process.pid, usage, last_seen)
+        await asyncio.sleep(SAMPLE_INTERVAL_SEC)
+
+
+def kill_process_tree(pid):
+    """
+    Kill a process and all its children.
+
+    Returns:
+        True if the process was still running and has been killed, False if it had already exited.
+    """
+
+    try:
+        root = psutil.Process(pid)
+        if root.status() == psutil.STATUS_ZOMBIE:
+            return False
+        processes = root.children(recursive=True) + [root]
+    except psutil.Error:
+        return False
+    killed = False
+    for process in processes:
+        try:
+            process.kill()
+            killed = killed or process is root
+        except psutil.Error:
+            continue
+    return killed
+
+
+async def watch_timeouts(process, activity, timeout_sec, idle_timeout_sec):
+    """
+    Kill the process tree once it exceeds its wall-clock time or stops producing output.
+
+    Args:
+        process: asyncio child process.
+        activity: Dictionary with 'start' and 'last_output' timestamps; 'timeout' is set if the
+            process is killed on expiry.
+        timeout_sec: Maximum run time in seconds (None for no limit).
+        idle_timeout_sec: Maximum time without any output in seconds (None for no limit).
+    """
+
+    while process.returncode is None:
+        await asyncio.sleep(WATCHDOG_INTERVAL_SEC)
+        if process.returncode is not None:
+            break
+        now = time.time()
+        if timeout_sec and now - activity["start"] > timeout_sec:
+            timeout = "timeout"
+        elif idle_timeout_sec and now - activity["last_output"] > idle_timeout_sec:
+            timeout = "idle_timeout"
+        else:
+            continue
+        # The process may exit between the checks above and the kill; only a kill is a timeout.
+        if kill_process_tree(process.pid):
+            activity["timeout"] = timeout
+        return
+
+
+async def stream_runner_command(runner_cmd, log_path=None, on_line=None, timeout_sec=None, idle_timeout_sec=None):
+    """
+    Run an OpenDC runner command, streaming its output line by line instead of buffering it.
+
+    Every line is appended to the log file (if given) and passed to on_line. Resource
+    usage is sampled concurrently while the process runs, and the process tree is killed
+    if it runs longer than timeout_sec or stays silent for longer than idle_timeout_sec.
+
+    Args:
+        runner_cmd: Command from build_runner_command().
+        log_path: File the combined stdout/stderr is written to.
+        on_line: Optional callable receiving (stream_name, line).
+        timeout_sec: Wall-clock limit in seconds (None for no limit).
+        idle_timeout_sec: Limit in seconds on the time between two output lines (None for no limit).
+
+    Returns:
+        Tuple of (return code, last stderr lines, resource usage record,
+        'timeout' or 'idle_timeout' if the process was killed, else None).
+    """
+
+    usage = new_usage()
+    stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+    activity = {"start": time.time(), "last_output": time.time(), "timeout": None}
+    log_file = None
+
+    if log_path:
+        os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+        log_file = open(log_path, "w", encoding="utf-8")
+
+    def handle_line(stream_name, line):
+        activity["last_output"] = time.time()
+        if log_file:
+            log_file.write(f"{line}\n" if stream_name == "stdout" else f"[stderr] {line}\n")
+        if on_line:
+            on_line(stream_name, line)
+
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *runner_cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        sampler = asyncio.create_task(sample_until_done(process, usage))
+        watchdog = asyncio.create_task(watch_timeouts(process, activity, timeout_sec, idle_timeout_sec))
+        await asyncio.gather(
+            pump_stream(process.stdout, "stdout", handle_line),
+            pump_stream(process.stderr, "stderr", handle_line, stderr_tail),
+        )
+        returncode = await process.wait()
+        await sampler
+        watchdog.cancel()
+    finally:
+        if log_file:
+            log_file.close()
+
+    return returncode, list(stderr_tail), usage, activity["timeout"]
+
+
+def run_coroutine(coroutine):
+    """
+    Run a coroutine to completion from synchronous code.
+
+    asyncio.run() refuses to run in a thread whose event loop is already running, such as
+    the main thread of a notebook kernel; the coroutine then gets its own thread and loop.
+
+    Args:
+        coroutine: Coroutine to run, e.g. stream_runner_command(...).
+
+    Returns:
+        The result of the coroutine.
+    """
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+
+    result = {}
+
+    def run():
+        try:
+            result["value"] = asyncio.run(coroutine)
+        except BaseException as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+    if "error" in result:
+        raise result["error"]
+    return result["value"]
@@ -1,8 +1,9 @@
 
-import os
-import json
 import datetime as dt
 
+from src.experiment_aliases import *
+from src.experiment_manifest import *
+
 
 def generate_metadata_section():
     """
@@ -20,6 +21,56 @@ def generate_metadata_section():
         ""
     ]
 
+def get_gc_label(experiment_stat):
+    gc = experiment_stat.get("jvm_gc")
+    if gc is None:
+        return "default"
+    return gc if gc == "SerialGC" else f"{gc} ({experiment_stat.get('jvm_gc_threads')} threads)"
+
+
+def generate_resource_section(experiment_stats, max_workers=1):
+    """
+    Returns a list of lines with the measured resource usage of each experiment run.
+
+    Runs without telemetry (e.g. from older capsules) are skipped. Batched runs share one
+    runner process, so their rows show the usage of the whole batch.
+
+    Args:
+        experiment_stats: List of per-experiment run records.
+        max_workers: Number of runners that were executed concurrently.
+    """
+
+    measured = [e for e in experiment_stats if e.get("peak_rss_mb") is not None]
+    if not measured:
+        return []
+
+    lines = [
+        "",
+        "## Resource Usage per Experiment",
+        "",
+        "| Experiment | Peak RSS (MB) | CPU user (s) | CPU sys (s) | Read (MB) | Written (MB) | Peak threads | JVM heap (MB) | GC |",
+        "|------------|---------------|--------------|-------------|-----------|--------------|--------------|---------------|----|"
+    ]
+    for e in measured:
+        name = e.get("name", "unknown")
+        if e.get("batch_size", 1) > 1:
+            name += f" (batch of {e['batch_size']})"
+        lines.append(
+            f"| {name} | {e['peak_rss_mb']} | {e.get('cpu_user_sec', 'N/A')} | {e.get('cpu_sys_sec', 'N/A')} "
+            f"| {round(e.get('read_bytes', 0) / (1024 ** 2), 1)} | {round(e.get('write_bytes', 0) / (1024 ** 2), 1)} "
+            f"| {e.get('peak_threads', 'N/A')} | {e.get('jvm_heap_mb', 'default')} | {get_gc_label(e)} |"
+        )
+
+    peak_rss_gb = max(e["peak_rss_mb"] for e in measured) / 1024
+    lines += [
+        "",
+        f"- **Largest peak memory of a single run**: {round(peak_rss_gb, 2)} GB",
+        f"- **Memory needed to rerun with {max_workers} concurrent runners**: "
+        f"{round(peak_rss_gb * max_workers, 2)} GB",
+    ]
+    return lines
+
+
 def generate_readme_from_queue(experiment_queue, stats, output_path="README.md", experiments_dir="experiments"):
     """
     Generates a README.md file summarizing the experiments and system context.
@@ -44,22 +95,28 @@ def generate_readme_from_queue(experiment_queue, stats, output_path="README.md",
     ]
 
     readme_lines += generate_metadata_section()
+    alias_manifest = load_alias_manifest()
+    manifest = load_experiment_manifest()
 
     for i, exp in enumerate(experiment_queue, start=1):
         name = exp["name"]
         readme_lines.append(f"### Experiment {i}: `{name}`")
 
+        aliases = get_aliases(alias_manifest, name)
+        if aliases:
+            alias_names = ", ".join(f"`{alias['name']}`" for alias in aliases)
+            readme_lines.append(f"- **Aliases** (identical configuration, run once): {alias_names}")
+
         exp_path = f"{experiments_dir}/{name}"
         try:
-            with open(exp_path) as f:
-                data = json.load(f)
+            inputs = get_experiment_entry(manifest, exp_path)["inputs"]
         except Exception:
             readme_lines.append("")
             continue
 
-        topologies = [t["pathToFile"] for t in data.get("topologies", [])]
-        workloads = [w["pathToFile"] for w in data.get("workloads", [])]
-        failures = [f["pathToFile"] for f in data.get("failureModels", [])]
+        topologies = [t for t in inputs["topologies"] if t]
+        workloads = [w for w in inputs["workloads"] if w]
+        failures = [f for f in inputs["failureModels"] if f]
 
         if topologies:
             readme_lines.append(f"- **Topologies**: {len(topologies)} files")
@@ -81,19 +138,31 @@ def generate_readme_from_queue(experiment_queue, stats, output_path="README.md",
 
         readme_lines.append("")
 
-
+    save_experiment_manifest(manifest)
 
     readme_lines += [
         "## Execution Time per Experiment",
         "",
-        "| Experiment | Duration (seconds) |",
-        "|------------|--------------------|"
+        "| Experiment | Duration (seconds) | Status | Attempts |",
+        "|------------|--------------------|--------|----------|"
     ]
     for exp_stat in stats.get("experiments", []):
         name = exp_stat.get("name", "unknown")
         duration = exp_stat.get("duration_sec", "N/A")
-        readme_lines.append(f"| {name} | {duration} |")
-
+        if exp_stat.get("cached"):
+            duration = f"{duration} (cached)"
+        status = exp_stat.get("status", "N/A")
+        attempts = exp_stat.get("attempts", "N/A")
+        readme_lines.append(f"| {name} | {duration} | {status} | {attempts} |")
+
+    if stats.get("total_duration_sec") is not None:
+        readme_lines += [
+            "",
+            f"- **Total wall-clock time**: {stats['total_duration_sec']} seconds "
+            f"({stats.get('max_workers', 1)} concurrent runners)"
+        ]
+
+    readme_lines += generate_resource_section(stats.get("experiments", []), stats.get("max_workers", 1))
 
     sysinfo = stats.get("system_info", {})
     readme_lines += [
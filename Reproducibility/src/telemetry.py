@@ -0,0 +1,66 @@
+import psutil
+
+# Seconds between two resource samples of a running experiment.
+SAMPLE_INTERVAL_SEC = 0.5
+
+
+def new_usage():
+    """
+    Create an empty resource usage record.
+
+    Returns:
+        Dictionary with peak RSS, CPU times, I/O bytes and peak thread count.
+    """
+
+    return {
+        "peak_rss_mb": 0.0,
+        "cpu_user_sec": 0.0,
+        "cpu_sys_sec": 0.0,
+        "read_bytes": 0,
+        "write_bytes": 0,
+        "peak_threads": 0,
+    }
+
+
+def sample_process_tree(pid, usage, last_seen):
+    """
+    Sample the resources of a process and all of its children.
+
+    Memory and threads are summed over the tree and kept as peaks. CPU time and I/O are
+    cumulative, so the last sample of each process is remembered in last_seen and the
+    totals are recomputed from it; processes that already exited keep their last value.
+
+    Args:
+        pid: Process id of the runner.
+        usage: Usage record from new_usage() to update.
+        last_seen: Dictionary of per-process cumulative counters, kept between samples.
+    """
+
+    try:
+        root = psutil.Process(pid)
+        processes = [root] + root.children(recursive=True)
+    except psutil.Error:
+        return
+
+    rss = 0
+    threads = 0
+    for process in processes:
+        try:
+            with process.oneshot():
+                rss += process.memory_info().rss
+                threads += process.num_threads()
+                cpu = process.cpu_times()
+                counters = {"cpu_user_sec": cpu.user, "cpu_sys_sec": cpu.system}
+                if hasattr(process, "io_counters"):
+                    io = process.io_counters()
+                    counters["read_bytes"] = io.read_bytes
+                    counters["write_bytes"] = io.write_bytes
+            last_seen[process.pid] = counters
+        except psutil.Error:
+            continue
+
+    usage["peak_rss_mb"] = max(usage["peak_rss_mb"], round(rss / (1024 ** 2), 1))
+    usage["peak_threads"] = max(usage["peak_threads"], threads)
+    for field in ("cpu_user_sec", "cpu_sys_sec", "read_bytes", "write_bytes"):
+        total = sum(counters.get(field, 0) for counters in last_seen.values())
+        usage[field] = round(total, 2) if isinstance(total, float) else total
@@ -32,3 +32,30 @@ def save_uploaded_file(upload_widget, folder):
         f.write(fileinfo['content'])
     
     return [fname]
+
+
+def get_uploaded_names(upload_widget):
+    """
+    Names of the uploaded files, as save_uploaded_file() would return them, without saving anything.
+    """
+
+    if not upload_widget.value:
+        return None
+    return [upload_widget.value[0]['name']]
+
+
+def load_uploaded_json(upload_widget):
+    """
+    Parse an uploaded JSON file from memory, without saving it.
+
+    Returns:
+        The parsed JSON, or None if nothing was uploaded or it cannot be parsed.
+    """
+
+    if not upload_widget.value:
+        return None
+    try:
+        return json.loads(bytes(upload_widget.value[0]['content']))
+    except Exception as e:
+        print(f"Error loading uploaded file: {e}")
+        return None
@@ -1,73 +1,61 @@
 from src.utils import *
-from itertools import product
+from src.json_writer import *
+from src.topology_store import *
+from src.experiment_manifest import *
 import json
+import time
+from concurrent.futures import ProcessPoolExecutor
 
-def generate_with_named_pairs(new_topology, pairs, inputs, other_params):
+# Arguments of build_one_topology() that make up the values of a parametric topology.
+TOPOLOGY_VALUE_KEYS = (
+    "core_count", "core_speed", "memory_size", "carbon", "NoH", "battery_capacity", "starting_CI",
+    "charging_speed", "expected_lifetime", "include_battery", "name", "power_model_type",
+    "power_model_idle", "power_model_max", "power_model_power", "add_power_model", "prepend"
+)
+
+# Base topology and settings of a worker process of a parallel generation (see init_topology_worker()).
+_worker_job = {}
+
+def generate_with_named_pairs(new_topology, pairs, inputs, other_params, store=None, shard=None):
     """
     Generate and save topologies using zipped parameter pairs and Cartesian product with remaining parameters.
     It treats one pair as one distinct variable that is later combined with other variables using product.
+    Without pairs, every combination of the inputs is generated.
+
+    Combinations are streamed from iter_combinations(), so the combination space is never held in memory.
 
     Args:
         new_topology: Base topology structure to clone and modify.
         pairs: List of parameter name pairs to zip together (e.g., [('carbon', 'starting_CI')]).
         inputs: Dictionary mapping parameter names to value lists.
         other_params : Constant or additional metadata fields passed to `build_one_topology`.
+        store: Optional store from new_topology_store() the topologies are added to.
+        shard: Optional (index, count) tuple to only generate one shard of the combinations.
     """
 
-    if not pairs:
-        return
-
-    zipped_groups = []
-    zipped_keys = set()
-
-    for param1, param2 in pairs:
-        if param1 not in inputs or param2 not in inputs:
-            print(f"[Skipped] Pair ({param1}, {param2}) not found in inputs.")
-            continue
-        list1, list2 = inputs[param1], inputs[param2]
-        if len(list1) != len(list2):
-            print(f"[Skipped] Pair ({param1}, {param2}) has unequal lengths.")
-            continue
-        zipped_groups.append(list(zip(list1, list2)))
-        zipped_keys.update([param1, param2])
-
-    zipped_product = list(product(*zipped_groups)) 
-
-    product_inputs = {k: v for k, v in inputs.items() if k not in zipped_keys and v}
-    product_keys = list(product_inputs.keys())
-    product_values = [product_inputs[k] for k in product_keys]
-
-    for zipped_combo in zipped_product:
-        base_args = {}
-        for (k1, k2), (v1, v2) in zip(pairs, zipped_combo):
-            base_args[k1] = v1
-            base_args[k2] = v2
-
-        for combo in product(*product_values) if product_values else [()]:
-            args = base_args.copy()
-            args.update(dict(zip(product_keys, combo)))
-
-            topology_copy = json.loads(json.dumps(new_topology))
-            build_one_topology(
-                new_topology=topology_copy,
-                core_count=args.get("core_count"),
-                core_speed=args.get("core_speed"),
-                memory_size=args.get("memory_size"),
-                carbon=args.get("carbon"),
-                NoH=args.get("NoH"),
-                battery_capacity=args.get("battery_capacity"),
-                starting_CI=args.get("starting_CI"),
-                charging_speed=args.get("charging_speed"),
-                expected_lifetime=args.get("expected_lifetime"),
-                include_battery=other_params.get("include_battery"),
-                name=other_params.get("name"),
-                power_model_type=other_params.get("power_model_type"),
-                power_model_idle=other_params.get("power_model_idle"),
-                power_model_max=other_params.get("power_model_max"),
-                power_model_power=other_params.get("power_model_power"),
-                add_power_model=other_params.get("add_power_model"),
-                prepend=other_params.get("prepend")
-            )
+    for args in iter_combinations(inputs, pairs, shard):
+        topology_copy = copy_base_topology(new_topology, store)
+        build_one_topology(
+            new_topology=topology_copy,
+            core_count=args.get("core_count"),
+            core_speed=args.get("core_speed"),
+            memory_size=args.get("memory_size"),
+            carbon=args.get("carbon"),
+            NoH=args.get("NoH"),
+            battery_capacity=args.get("battery_capacity"),
+            starting_CI=args.get("starting_CI"),
+            charging_speed=args.get("charging_speed"),
+            expected_lifetime=args.get("expected_lifetime"),
+            include_battery=other_params.get("include_battery"),
+            name=other_params.get("name"),
+            power_model_type=other_params.get("power_model_type"),
+            power_model_idle=other_params.get("power_model_idle"),
+            power_model_max=other_params.get("power_model_max"),
+            power_model_power=other_params.get("power_model_power"),
+            add_power_model=other_params.get("add_power_model"),
+            prepend=other_params.get("prepend"),
+            store=store
+        )
 
 
 
@@ -92,7 +80,12 @@ def update_topology_values(
     add_power_model=False,
     generate_combinations=False,
     pairs=None,
-    prepend=False
+    prepend=False,
+    compact_json=False,
+    prune=False,
+    shard=None,
+    workers=None,
+    parametric=False
 ):
     """
     Generate and save new topology files based on provided variations.
@@ -106,8 +99,24 @@ def update_topology_values(
     - Only non-empty inputs are used in combination generation.
     - Carbon traces and battery configs are added to clusters if provided.
     - Power model is added to hosts if enabled.
+    - If compact_json is True, files are written without indentation.
+    - If prune is True, topologies generated by an earlier run with the same name that this
+      run no longer generates are deleted.
+    - If shard is an (index, count) tuple, only every count-th topology starting at index is
+      generated, so several processes can each generate one shard of the same sweep.
+    - If workers is larger than 1, the topologies are generated by that many processes, each
+      receiving the base topology once and generating one shard; the result is the same as
+      a serial run.
+    - If parametric is True, only the base topology and the values of every variant are
+      stored; a variant is written out when an experiment using it is validated, run or
+      exported (see materialize_topologies()). Useful for sweeps over large templates.
 
     Saves each generated topology under a structured path reflecting its parameters.
+    Topologies are stored once per unique content in topologies/.store/ and the structured
+    paths are hard links to the stored files. New files are written in batches on a thread
+    pool and the write rate is reported. Regeneration is incremental: the generated set is
+    compared with the content hashes recorded in the store's link manifest, and only new or
+    changed topologies are written and relinked.
     """
 
     if topology_file:
@@ -124,122 +133,218 @@ def update_topology_values(
         }
 
     
-    carbon_list = carbon_list or []
-    NoH_list = NoH_list or []
-    battery_capacity_list = battery_capacity_list or []
-    starting_CI_list = starting_CI_list or []
-    charging_speed_list = charging_speed_list or []
-    expected_lifetime_list = expected_lifetime_list or []
-    core_count_list = core_count_list or []
-    core_speed_list = core_speed_list or []
-    memory_size_list = memory_size_list or []
+    inputs = {
+        "carbon": carbon_list or [],
+        "NoH": NoH_list or [],
+        "battery_capacity": battery_capacity_list or [],
+        "starting_CI": starting_CI_list or [],
+        "charging_speed": charging_speed_list or [],
+        "expected_lifetime": expected_lifetime_list or [],
+        "core_count": core_count_list or [],
+        "core_speed": core_speed_list or [],
+        "memory_size": memory_size_list or []
+    }
+    other_params = {
+        "include_battery": include_battery,
+        "name": name,
+        "power_model_type": power_model_type,
+        "power_model_idle": power_model_idle,
+        "power_model_max": power_model_max,
+        "power_model_power": power_model_power,
+        "add_power_model": add_power_model,
+        "prepend": prepend
+    }
+
+    sweep = name or "topology"
+    if shard:
+        sweep += f"#shard{shard[0]}of{shard[1]}"
+
+    if parametric:
+        store = new_topology_store(sweep=sweep)
+        set_parametric_base(store, original_topology)
+        generate_topologies(original_topology, inputs, other_params, generate_combinations, pairs, store, shard)
+    elif workers and workers > 1:
+        store = new_topology_store(sweep=sweep)
+        index, count = shard or (0, 1)
+        started = time.perf_counter()
+        written = 0
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_topology_worker,
+            initargs=(original_topology, inputs, other_params, generate_combinations, pairs, compact_json)
+        ) as pool:
+            shards = [(index + worker * count, count * workers) for worker in range(workers)]
+            for pending, digests, worker_written in pool.map(generate_topology_shard, shards):
+                store["pending"].update(pending)
+                store["digests"].update(digests)
+                written += worker_written
+        elapsed = time.perf_counter() - started
+        if written:
+            print(f"Wrote {written} unique topologies in {elapsed:.2f}s "
+                  f"({written / max(elapsed, 1e-9):.0f} files/sec, {workers} workers)")
+    else:
+        writer = new_json_writer(compact=compact_json)
+        store = new_topology_store(writer, sweep=sweep)
+        generate_topologies(original_topology, inputs, other_params, generate_combinations, pairs, store, shard)
+        close_json_writer(writer, "unique topologies")
+
+    close_topology_store(store, prune=prune)
+
+
+def generate_topologies(base_topology, inputs, other_params, generate_combinations, pairs, store, shard=None):
+    """
+    Generate the topologies of update_topology_values() into a topology store.
+
+    Args:
+        base_topology: Base topology structure to clone and modify.
+        inputs: Dictionary mapping parameter names to value lists.
+        other_params: Constant fields passed to `build_one_topology`.
+        generate_combinations: Combine the inputs instead of aligning them by index.
+        pairs: List of parameter name pairs to zip together when combining.
+        store: Store from new_topology_store() the topologies are added to.
+        shard: Optional (index, count) tuple to only generate one shard of the topologies.
+    """
 
     if generate_combinations:
-        inputs = {
-            "carbon": carbon_list,
-            "NoH": NoH_list,
-            "battery_capacity": battery_capacity_list,
-            "starting_CI": starting_CI_list,
-            "charging_speed": charging_speed_list,
-            "expected_lifetime": expected_lifetime_list,
-            "core_count": core_count_list,
-            "core_speed": core_speed_list,
-            "memory_size": memory_size_list
-        }
+        generate_with_named_pairs(
+            new_topology=base_topology,
+            pairs=pairs,
+            inputs=inputs,
+            other_params=other_params,
+            store=store,
+            shard=shard
+        )
+        return
 
-        if pairs:
-            generate_with_named_pairs(
-                new_topology=original_topology,
-                pairs=pairs,
-                inputs=inputs,
-                other_params={
-                    "include_battery": include_battery,
-                    "name": name,
-                    "power_model_type": power_model_type,
-                    "power_model_idle": power_model_idle,
-                    "power_model_max": power_model_max,
-                    "power_model_power": power_model_power,
-                    "add_power_model": add_power_model,
-                    "prepend": prepend
-                }
-            )
-
-        else:
-            active = {key: value for key, value in inputs.items() if value}
-
-            keys, lists = zip(*active.items())
-
-            seen = set()
-            for combo in product(*lists):
-                if None in combo:
-                    continue
-                if combo in seen:
-                    continue
-                seen.add(combo)
-            
-                values = dict(zip(keys, combo))
-
-                new_topology = json.loads(json.dumps(original_topology))
-                build_one_topology(
-                    new_topology=new_topology,
-                    core_count=values.get("core_count"),
-                    core_speed=values.get("core_speed"),
-                    memory_size=values.get("memory_size"),
-                    carbon=values.get("carbon"),
-                    NoH=values.get("NoH"),
-                    battery_capacity=values.get("battery_capacity"),
-                    starting_CI=values.get("starting_CI"),
-                    charging_speed=values.get("charging_speed"),
-                    expected_lifetime=values.get("expected_lifetime"),
-                    include_battery=include_battery,
-                    name=name,
-                    power_model_type=power_model_type,
-                    power_model_idle=power_model_idle,
-                    power_model_max=power_model_max,
-                    power_model_power=power_model_power,
-                    add_power_model=add_power_model,
-                    prepend=prepend
-                )
-    else:
-        max_len = max(
-            len(core_count_list), len(core_speed_list), len(memory_size_list),
-            len(carbon_list), len(NoH_list),
-            len(battery_capacity_list), len(starting_CI_list), len(charging_speed_list),
-            1
+    max_len = max([len(values) for key, values in inputs.items() if key != "expected_lifetime"] + [1])
+
+    index, count = shard or (0, 1)
+    for i in range(index, max_len, count):
+        new_topology = copy_base_topology(base_topology, store)
+        build_one_topology(
+            new_topology=new_topology,
+            core_count=get_val(inputs["core_count"], i),
+            core_speed=get_val(inputs["core_speed"], i),
+            memory_size=get_val(inputs["memory_size"], i),
+            carbon=get_val(inputs["carbon"], i),
+            NoH=get_val(inputs["NoH"], i),
+            battery_capacity=get_val(inputs["battery_capacity"], i),
+            starting_CI=get_val(inputs["starting_CI"], i),
+            charging_speed=get_val(inputs["charging_speed"], i),
+            expected_lifetime=get_val(inputs["expected_lifetime"], i),
+            include_battery=other_params["include_battery"],
+            name=other_params["name"],
+            power_model_type=other_params["power_model_type"],
+            power_model_idle=other_params["power_model_idle"],
+            power_model_max=other_params["power_model_max"],
+            power_model_power=other_params["power_model_power"],
+            add_power_model=other_params["add_power_model"],
+            prepend=other_params["prepend"],
+            store=store
         )
 
-        for i in range(max_len):
-            core_count = get_val(core_count_list, i)
-            core_speed = get_val(core_speed_list, i)
-            memory_size = get_val(memory_size_list, i)
-            NoH = get_val(NoH_list, i)
-            carbon = get_val(carbon_list, i)
-            battery_capacity = get_val(battery_capacity_list, i)
-            starting_CI = get_val(starting_CI_list, i)
-            charging_speed = get_val(charging_speed_list, i)
-            expected_lifetime = get_val(expected_lifetime_list, i)
-
-            new_topology = json.loads(json.dumps(original_topology))
-            build_one_topology(
-                new_topology=new_topology,
-                core_count=core_count,
-                core_speed=core_speed,
-                memory_size=memory_size,
-                carbon=carbon,
-                NoH=NoH,
-                battery_capacity=battery_capacity,
-                starting_CI=starting_CI,
-                charging_speed=charging_speed,
-                expected_lifetime=expected_lifetime,
-                include_battery=include_battery,
-                name=name,
-                power_model_type=power_model_type,
-                power_model_idle=power_model_idle,
-                power_model_max=power_model_max,
-                power_model_power=power_model_power,
-                add_power_model=add_power_model,
-                prepend=prepend
-            )
+
+def copy_base_topology(base_topology, store=None):
+    # Parametric stores only record values, so the base is not copied for every variant.
+    if store is not None and store["base"] is not None:
+        return base_topology
+    return json.loads(json.dumps(base_topology))
+
+
+def materialize_topologies(paths):
+    """
+    Write out the parametric topologies among the given paths that do not exist yet.
+
+    The values recorded by a parametric generation are applied to the stored base topology,
+    giving the same file a regular generation produces. The file is linked from the store
+    like any generated topology and stays parametric in the link manifest.
+
+    Args:
+        paths: Topology paths, e.g. the 'pathToFile' entries of experiments.
+
+    Returns:
+        Number of topologies materialized.
+    """
+
+    parametric = load_topology_links()["parametric"]
+    missing = {os.path.normpath(path) for path in paths if path}
+    missing = [path for path in missing if path in parametric and not os.path.exists(path)]
+    if not missing:
+        return 0
+
+    store = new_topology_store(materialize=True)
+    bases = {}
+    for path in missing:
+        entry = parametric[path]
+        if entry["base"] not in bases:
+            with open(get_store_path(entry["base"])) as f:
+                bases[entry["base"]] = json.load(f)
+        values = dict.fromkeys(TOPOLOGY_VALUE_KEYS)
+        values.update(entry["values"])
+        build_one_topology(new_topology=json.loads(json.dumps(bases[entry["base"]])), **values, store=store)
+    close_topology_store(store)
+    return len(missing)
+
+
+def prepare_experiment_topologies(experiment_queue, experiments_dir="experiments"):
+    """
+    Make sure the topologies of queued experiments exist before they are validated or run.
+
+    Restores missing topology links from the store and materializes parametric topologies.
+
+    Args:
+        experiment_queue: List of experiment metadata dicts with 'name' field.
+        experiments_dir: Directory where experiment files are stored.
+    """
+
+    restore_topology_links()
+
+    manifest = load_experiment_manifest()
+    paths = []
+    for exp in experiment_queue:
+        try:
+            paths += get_experiment_entry(manifest, os.path.join(experiments_dir, exp["name"]))["inputs"]["topologies"]
+        except Exception:
+            continue
+    save_experiment_manifest(manifest)
+    materialize_topologies(paths)
+
+
+def init_topology_worker(base_topology, inputs, other_params, generate_combinations, pairs, compact_json):
+    """
+    Receive the base topology and generation settings once per worker process.
+    """
+
+    _worker_job.update(
+        base_topology=base_topology,
+        inputs=inputs,
+        other_params=other_params,
+        generate_combinations=generate_combinations,
+        pairs=pairs,
+        compact_json=compact_json
+    )
+
+
+def generate_topology_shard(shard):
+    """
+    Generate one shard of the topologies in a worker process.
+
+    New store files are written by the worker; linking and the link manifest are left to the
+    parent process, so the result is one manifest.
+
+    Returns:
+        Tuple of the queued links (path -> content hash), the content hashes generated and the
+        number of store files written.
+    """
+
+    writer = new_json_writer(compact=_worker_job["compact_json"], atomic=True)
+    store = new_topology_store(writer)
+    generate_topologies(
+        _worker_job["base_topology"], _worker_job["inputs"], _worker_job["other_params"],
+        _worker_job["generate_combinations"], _worker_job["pairs"], store, shard
+    )
+    written = close_json_writer(writer, report=False)
+    return store["pending"], store["digests"], len(written)
 
         
 def build_one_topology(new_topology,
@@ -248,15 +353,32 @@ def build_one_topology(new_topology,
                         battery_capacity, starting_CI, charging_speed, expected_lifetime,
                         include_battery, name,
                         power_model_type, power_model_idle,
-                        power_model_max, power_model_power, add_power_model, prepend):
+                        power_model_max, power_model_power, add_power_model, prepend, store=None):
     
     """
     Populate and save a single topology configuration based on inputs.
 
     Applies cluster-level and host-level settings including carbon trace, battery,
     power model, and compute specs. Naming is handled automatically.
+    If a store is given, the topology is added to it instead of written right away. If the
+    store is parametric (see new_topology_store()), only the values are recorded, to be
+    applied to the base topology by materialize_topologies() when the topology is needed.
 
     """
+
+    if store is not None and store["base"] is not None:
+        values = {
+            "core_count": core_count, "core_speed": core_speed, "memory_size": memory_size,
+            "carbon": carbon, "NoH": NoH, "battery_capacity": battery_capacity, "starting_CI": starting_CI,
+            "charging_speed": charging_speed, "expected_lifetime": expected_lifetime,
+            "include_battery": include_battery, "name": name, "power_model_type": power_model_type,
+            "power_model_idle": power_model_idle, "power_model_max": power_model_max,
+            "power_model_power": power_model_power, "add_power_model": add_power_model, "prepend": prepend
+        }
+        path = build_topology_path(carbon, NoH, battery_capacity, charging_speed, include_battery,
+                                   core_count, core_speed, memory_size, name, prepend)
+        store_parametric_topology(store, {k: v for k, v in values.items() if v is not None}, f"topologies/{path}")
+        return
     
     if "clusters" in new_topology:
             for cluster in new_topology["clusters"]:
@@ -330,7 +452,7 @@ def build_one_topology(new_topology,
                                 )
                                                 
 
-    save_topology(new_topology, path)
+    save_topology(new_topology, path, store)
   
         
 
@@ -416,16 +538,23 @@ def create_new_cluster(core_count, core_speed, memory_size, host_count, index):
     }
 
 
-def save_topology(topology: dict, rel_path: str):
+def save_topology(topology: dict, rel_path: str, store=None):
 
     """
     Save a topology dictionary to disk under the topologies/ directory.
 
-    Creates subfolders as necessary.
+    Creates subfolders as necessary. With a store from new_topology_store(), the topology
+    is added to the content-addressed store and linked to its path instead.
     """
     
     full_path = f"topologies/{rel_path}"
+    if store is not None:
+        store_topology(store, topology, full_path)
+        return
     os.makedirs(os.path.dirname(full_path), exist_ok=True)  
+    # Never write through a link, which would change every topology sharing the stored file.
+    if os.path.lexists(full_path):
+        os.remove(full_path)
     with open(full_path, "w", encoding="utf-8") as f:
         json.dump(topology, f, indent=4)
     #print(f"Generated {rel_path}") disabled for large scale experiments
\ No newline at end of file
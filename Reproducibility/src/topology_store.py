@@ -0,0 +1,367 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+
+from src.utils import list_files
+from src.json_writer import *
+
+# Content-addressed store of generated topologies; readable topology paths are hard links into it.
+TOPOLOGY_STORE_DIR = "topologies/.store"
+
+# Manifest mapping every linked topology path to the hash of its content in the store, every
+# parametric topology path to its base topology and values, and every sweep (topology name)
+# to the paths it generated.
+TOPOLOGY_LINKS_PATH = "topologies/.store/links.json"
+
+# Seconds to wait for the link manifest lock of another generator process before breaking it.
+LINKS_LOCK_TIMEOUT_SEC = 60
+
+
+def get_topology_hash(topology):
+    """
+    Hash the content of a topology, independent of key order and formatting.
+    """
+
+    return hashlib.sha256(json.dumps(topology, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def get_store_path(digest):
+    return f"{TOPOLOGY_STORE_DIR}/{digest}.json"
+
+
+def load_topology_links(path=TOPOLOGY_LINKS_PATH):
+    """
+    Load the manifest of linked topologies.
+
+    Returns:
+        Dictionary with 'links' (topology path, e.g. 'topologies/hosts4/topology.json' -> content
+        hash), 'parametric' (topology path -> {'base': content hash of the base topology,
+        'values': values applied to it}) and 'sweeps' (sweep name -> list of topology paths it
+        generated).
+    """
+
+    if os.path.exists(path):
+        try:
+            with open(path) as f:
+                manifest = json.load(f)
+            return {
+                "links": manifest["links"],
+                "parametric": manifest.get("parametric", {}),
+                "sweeps": manifest.get("sweeps", {}),
+            }
+        except Exception as e:
+            print(f"Failed to load topology links: {e}")
+    return {"links": {}, "parametric": {}, "sweeps": {}}
+
+
+def save_topology_links(manifest, path=TOPOLOGY_LINKS_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def update_topology_links(update, path=TOPOLOGY_LINKS_PATH, lock_timeout_sec=LINKS_LOCK_TIMEOUT_SEC):
+    """
+    Apply a change to the link manifest on disk while holding a lock file.
+
+    The manifest is re-read under the lock, so concurrent generator processes (e.g. the
+    shards of one sweep) do not overwrite each other's links. A lock older than
+    lock_timeout_sec is assumed to be left by a crashed process and is broken.
+
+    Args:
+        update: Function modifying the manifest from load_topology_links() in place.
+        path: Path of the link manifest.
+        lock_timeout_sec: Time to wait for the lock.
+
+    Returns:
+        The updated manifest.
+    """
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    lock_path = f"{path}.lock"
+    deadline = time.time() + lock_timeout_sec
+    while True:
+        try:
+            lock = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            if time.time() > deadline:
+                print(f"Breaking stale lock {lock_path}")
+                try:
+                    os.remove(lock_path)
+                except FileNotFoundError:
+                    pass
+                deadline = time.time() + lock_timeout_sec
+            time.sleep(0.05)
+
+    try:
+        manifest = load_topology_links(path)
+        update(manifest)
+        save_topology_links(manifest, path)
+        return manifest
+    finally:
+        os.close(lock)
+        os.remove(lock_path)
+
+
+def link_or_copy_file(src, dst):
+    """
+    Hard-link src to dst, replacing dst; falls back to a copy where links are not supported.
+    """
+
+    os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+    if os.path.lexists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def is_linked_topology(path, digest):
+    """
+    Check whether a topology path holds the store file of a content hash: a link to it or, where
+    the store fell back to copying (e.g. across devices), a copy with the same content.
+    """
+
+    if not os.path.exists(path):
+        return False
+    if os.path.samefile(path, get_store_path(digest)):
+        return True
+    try:
+        with open(path) as f:
+            return get_topology_hash(json.load(f)) == digest
+    except Exception:
+        return False
+
+
+def new_topology_store(writer=None, sweep=None, materialize=False):
+    """
+    Start writing topologies into the content-addressed store.
+
+    Args:
+        writer: Optional writer from new_json_writer() that new store files are queued to.
+        sweep: Name under which the generated paths are recorded, so topologies a later run of
+            the same sweep no longer generates can be pruned.
+        materialize: The store links materialized parametric topologies, which stay parametric.
+
+    Returns:
+        Store dictionary to pass to store_topology() and close_topology_store().
+    """
+
+    return {
+        "writer": writer,
+        "sweep": sweep,
+        "base": None,
+        "materialize": materialize,
+        "manifest": load_topology_links(),
+        "digests": set(),
+        "pending": {},
+        "parametric": {},
+    }
+
+
+def add_store_file(store, topology):
+    """
+    Write a topology to the store unless its content is already stored.
+
+    Returns:
+        The content hash of the topology.
+    """
+
+    digest = get_topology_hash(topology)
+    if digest not in store["digests"]:
+        store["digests"].add(digest)
+        store_path = get_store_path(digest)
+        if not os.path.exists(store_path):
+            if store["writer"] is not None:
+                write_json(store["writer"], store_path, topology)
+            else:
+                os.makedirs(TOPOLOGY_STORE_DIR, exist_ok=True)
+                with open(store_path, "w", encoding="utf-8") as f:
+                    json.dump(topology, f, indent=4)
+    return digest
+
+
+def store_topology(store, topology, path):
+    """
+    Add a topology to the store and queue a link to it under its readable path.
+
+    Topologies whose content is already stored are not written again. The link itself is
+    created by close_topology_store(), once queued store files have been written.
+
+    Args:
+        store: Store from new_topology_store().
+        topology: Topology dictionary; it must not be modified afterwards.
+        path: Readable topology path, e.g. 'topologies/hosts4/topology.json'.
+
+    Returns:
+        The content hash of the topology.
+    """
+
+    digest = add_store_file(store, topology)
+    store["pending"][os.path.normpath(path)] = digest
+    return digest
+
+
+def set_parametric_base(store, topology):
+    """
+    Make a store parametric: generators record per-topology values over the given base
+    topology with store_parametric_topology() instead of full topologies.
+
+    Returns:
+        The content hash of the base topology.
+    """
+
+    store["base"] = add_store_file(store, topology)
+    return store["base"]
+
+
+def store_parametric_topology(store, values, path):
+    """
+    Record a topology as the base topology of a parametric store plus the values applied to it.
+
+    Nothing is written until the topology is materialized (see materialize_topologies()).
+
+    Args:
+        store: Parametric store from new_topology_store().
+        values: Generation values, as passed to build_one_topology().
+        path: Readable topology path, e.g. 'topologies/hosts4/topology.json'.
+    """
+
+    store["parametric"][os.path.normpath(path)] = {"base": store["base"], "values": values}
+
+
+def close_topology_store(store, prune=False):
+    """
+    Create the links queued by store_topology() and save the link manifest.
+
+    The queued paths are the target set of the run. They are compared with the hashes in the
+    link manifest, and only new or changed paths are linked; unchanged ones are left untouched.
+    Parametric topologies are recorded in the manifest instead, removing materialized copies
+    whose values changed. Any writer passed to new_topology_store() must be closed first.
+
+    Args:
+        store: Store from new_topology_store().
+        prune: Delete the topologies an earlier run of the same sweep generated that are neither
+            in the target set nor generated by another sweep, and the store files no longer
+            linked from anywhere.
+
+    Returns:
+        Dictionary with the number of 'changed', 'unchanged' and 'pruned' topology paths.
+    """
+
+    links = store["manifest"]["links"]
+    stats = {"changed": 0, "unchanged": 0, "pruned": 0}
+    linked = {}
+
+    for path, digest in store["pending"].items():
+        store_path = get_store_path(digest)
+        if not os.path.exists(store_path):
+            print(f"Error saving {path}: missing store file {store_path}")
+            continue
+        linked[path] = digest
+        if links.get(path) == digest and is_linked_topology(path, digest):
+            stats["unchanged"] += 1
+            continue
+        link_or_copy_file(store_path, path)
+        stats["changed"] += 1
+
+    def apply(manifest):
+        links, parametric, sweeps = manifest["links"], manifest["parametric"], manifest["sweeps"]
+        links.update(linked)
+        if not store["materialize"]:
+            for path in linked:
+                parametric.pop(path, None)
+
+        for path, entry in store["parametric"].items():
+            if parametric.get(path) == entry:
+                stats["unchanged"] += 1
+                continue
+            # A materialized earlier version no longer matches the values.
+            if links.pop(path, None) is not None:
+                remove_topology_file(path)
+            parametric[path] = entry
+            stats["changed"] += 1
+
+        if store["sweep"] is None:
+            return
+
+        target = set(store["pending"]) | set(store["parametric"])
+        stale = set(sweeps.get(store["sweep"], [])) - target
+        if not prune:
+            sweeps[store["sweep"]] = sorted(target | stale)
+            return
+
+        for sweep, paths in sweeps.items():
+            if sweep != store["sweep"]:
+                stale.difference_update(paths)
+        stale_digests = {links.pop(path, None) for path in stale}
+        stale_digests.update(parametric.pop(path, {}).get("base") for path in stale)
+        for path in stale:
+            remove_topology_file(path)
+        referenced = set(links.values()) | {entry["base"] for entry in parametric.values()}
+        for digest in stale_digests - referenced - {None}:
+            if os.path.exists(get_store_path(digest)):
+                os.remove(get_store_path(digest))
+        stats["pruned"] = len(stale)
+        sweeps[store["sweep"]] = sorted(target)
+
+    store["manifest"] = update_topology_links(apply)
+
+    if store["pending"] or store["parametric"] or stats["pruned"]:
+        detail = "parametric" if store["parametric"] else f"{len(store['digests'])} unique topology files"
+        print(f"Topologies: {stats['changed']} new or changed, {stats['unchanged']} unchanged, "
+              f"{stats['pruned']} pruned ({detail})")
+    store["pending"] = {}
+    store["parametric"] = {}
+    return stats
+
+
+def remove_topology_file(path):
+    if os.path.lexists(path):
+        os.remove(path)
+        try:
+            os.removedirs(os.path.dirname(path))
+        except OSError:
+            pass
+
+
+def list_topologies(root="topologies"):
+    """
+    List topology files and parametric topologies not materialized yet.
+
+    Returns:
+        List of topology paths relative to root, like list_files().
+    """
+
+    topologies = list_files(root)
+    listed = set(topologies)
+    for path in load_topology_links()["parametric"]:
+        relative = os.path.relpath(path, root)
+        if relative not in listed:
+            topologies.append(relative)
+    return topologies
+
+
+def restore_topology_links(path=TOPOLOGY_LINKS_PATH):
+    """
+    Recreate missing topology links from the store, e.g. after unpacking a capsule.
+
+    Returns:
+        Number of links restored.
+    """
+
+    restored = 0
+    for topology_path, digest in load_topology_links(path)["links"].items():
+        store_path = get_store_path(digest)
+        if not os.path.exists(topology_path) and os.path.exists(store_path):
+            link_or_copy_file(store_path, topology_path)
+            restored += 1
+    if restored:
+        print(f"Restored {restored} topology links from {TOPOLOGY_STORE_DIR}")
+    return restored
@@ -109,7 +109,7 @@ def parse_input(input_str):
 
 def list_files(root):
     """
-    Recursively list all topology JSON files under a folder.
+    Recursively list all topology JSON files under a folder, skipping hidden folders.
 
     Args:
         root: Root directory to search.
@@ -119,7 +119,8 @@ def list_files(root):
     """
 
     topo_files = []
-    for dirpath, _, filenames in os.walk(root):
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith(".")]
         for fn in filenames:
             if fn.endswith(".json"):
                 rel = os.path.relpath(os.path.join(dirpath, fn), root)
@@ -174,4 +175,76 @@ def get_system_info():
 
 def filter_files_by_keyword(files, keyword):
     keyword = keyword.strip().lower()
-    return [f for f in files if keyword in f.lower()] if keyword else files
\ No newline at end of file
+    return [f for f in files if keyword in f.lower()] if keyword else files
+
+def get_unique_values(values):
+    """
+    Drop duplicate and None values from a list, keeping the first occurrence of each value.
+    """
+
+    seen = set()
+    unique = []
+    for value in values:
+        if value is not None and value not in seen:
+            seen.add(value)
+            unique.append(value)
+    return unique
+
+
+def iter_combinations(inputs, pairs=None, shard=None):
+    """
+    Lazily combine value lists: zipped pairs vary together, everything else as a Cartesian product.
+
+    Each pair is treated as one axis of value tuples. Duplicate values are removed per axis,
+    so every combination is unique without tracking the combinations already yielded, and
+    combinations are decoded from their index instead of being materialized. With a shard,
+    only every n-th combination is yielded, so several processes can split one sweep by
+    each taking a different shard index.
+
+    Args:
+        inputs: Dictionary mapping axis names to value lists; empty lists are left out.
+        pairs: List of axis name pairs to zip together (e.g. [('carbon', 'starting_CI')]).
+        shard: Optional (index, count) tuple; yields the combinations index, index + count, ...
+
+    Yields:
+        Dictionaries mapping the active axes to one value each, in product order (the last
+        axis varies fastest).
+    """
+
+    axes = []
+    zipped_keys = set()
+
+    for axis1, axis2 in pairs or []:
+        if not inputs.get(axis1) or not inputs.get(axis2):
+            print(f"[Skipped] Pair ({axis1}, {axis2}) not found in inputs.")
+            continue
+        list1, list2 = inputs[axis1], inputs[axis2]
+        if len(list1) != len(list2):
+            print(f"[Skipped] Pair ({axis1}, {axis2}) has unequal lengths.")
+            continue
+        axes.append(((axis1, axis2), get_unique_values(zip(list1, list2))))
+        zipped_keys.update([axis1, axis2])
+
+    for axis, values in inputs.items():
+        if axis not in zipped_keys and values:
+            axes.append(((axis,), [(value,) for value in get_unique_values(values)]))
+
+    index, count = shard or (0, 1)
+    if not 0 <= index < count:
+        print(f"[Skipped] Invalid shard {index} of {count}.")
+        return
+
+    total = 1
+    for _, options in axes:
+        total *= len(options)
+
+    for position in range(index, total, count):
+        choices = []
+        for _, options in reversed(axes):
+            position, choice = divmod(position, len(options))
+            choices.append(options[choice])
+
+        values = {}
+        for (keys, _), option in zip(axes, reversed(choices)):
+            values.update(zip(keys, option))
+        yield values
@@ -1,67 +1,115 @@
 import os
 import json
-import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
+import pyarrow.parquet as pq
 
-def validate_experiments(experiment_queue):
+from src.experiment_manifest import *
+from src.parquet_compare import *
+from src.output_checksums import *
+from src.topology_generator import prepare_experiment_topologies
+
+# Machine-readable report of the last comparison of reproduced and original outputs.
+COMPARISON_REPORT_PATH = "comparison_report.json"
+
+# Threads checking input paths; checks wait on the filesystem, so more threads than cores help on network disks.
+VALIDATE_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+
+def validate_experiments(experiment_queue, max_workers=VALIDATE_WORKERS, check_parquet=True):
     """
-    Checks whether topologies, workloads, and failure models exist in each experiment file.
+    Checks whether topologies, workloads, failure models and carbon traces exist for each experiment.
 
-    Loops over all experiments in the queue and verifies that all referenced files exist.
-    Can be extended for more robust validation in the future.
+    The references are taken from the experiment manifest, so only experiment files changed
+    since they were indexed are parsed again. Topology links missing from the topology store are
+    restored and parametric topologies materialized first. Every referenced path is checked once,
+    however many experiments share it, and the checks run concurrently, which matters most on
+    network filesystems. All problems are reported, not just the first one.
 
     Args:
         experiment_queue: List of experiment metadata dicts with 'name' field.
+        max_workers: Number of threads checking paths.
+        check_parquet: Also check that parquet traces are readable, by reading their footers
+            only; this catches truncated uploads before a long run fails on them.
 
     Returns:
         True if all files are valid and exist, False otherwise.
     """
 
+    manifest = load_experiment_manifest()
+    prepare_experiment_topologies(experiment_queue)
+    references = {}
+    problems = []
+
     for exp in experiment_queue:
         name = exp["name"]
         exp_path = f"experiments/{name}"
 
         try:
-            with open(exp_path, "r") as f:
-                data = json.load(f)
+            entry = get_experiment_entry(manifest, exp_path)
         except Exception as e:
-            print(f"Failed to read '{name}': {e}")
+            problems.append(f"Failed to read '{name}': {e}")
             continue
 
-        try:
-            check_files("topologies", data, name)
-            check_files("workloads", data, name)
-            check_files("failureModels", data, name)
-        except Exception as e:
-            print(f"Validation failed for '{name}': {e}")
-            return False
-    
-    print(f"Validation Passed")
+        for json_key in INPUT_KEYS:
+            for index, file_path in enumerate(entry["inputs"][json_key]):
+                if not file_path:
+                    problems.append(f"Missing 'pathToFile' in {json_key} entry {index} of '{name}'")
+                    continue
+                references.setdefault(os.path.normpath(file_path), (json_key, []))[1].append(name)
+        for trace in get_carbon_traces(manifest, entry):
+            references.setdefault(os.path.normpath(trace), ("carbon traces", []))[1].append(name)
+
+    save_experiment_manifest(manifest)
+
+    paths = sorted(references)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(paths)))) as executor:
+        errors = executor.map(lambda path: check_input_path(path, check_parquet), paths)
+        for path, error in zip(paths, errors):
+            if error:
+                json_key, names = references[path]
+                shown = ", ".join(f"'{name}'" for name in names[:3])
+                if len(names) > 3:
+                    shown += f" and {len(names) - 3} more"
+                problems.append(f"{error} for {json_key}: {path} (used by {shown})")
+
+    if problems:
+        for problem in problems:
+            print(problem)
+        print(f"Validation failed: {len(problems)} problem(s) in {len(paths)} referenced file(s)")
+        return False
+
+    print(f"Validation Passed ({len(paths)} referenced file(s))")
     return True
 
 
-def check_files(json_key, data, name):
+def check_input_path(path, check_parquet=True):
     """
-    Helper function that checks whether a file exists at the path specified in a given key.
+    Check that an input file or folder exists and, optionally, that its parquet files are readable.
 
-    Args:
-        json_key: Key in the experiment file to inspect (e.g., 'topologies').
-        data: Parsed JSON contents of the experiment file.
-        name: Name of the experiment (used for error messages).
+    Parquet files are checked by reading their footer only; for a folder (e.g. a workload
+    trace) the parquet files directly inside it are checked.
 
-    Raises:
-        ValueError: If an entry under the key is missing 'pathToFile'.
-        FileNotFoundError: If the file path specified doesn't exist.
+    Returns:
+        None if the path is valid, otherwise a description of the problem.
     """
 
-    if json_key not in data:
-        return 
-    for entry in data[json_key]:
-        file_path = entry.get("pathToFile")
-        if not file_path:
-            raise ValueError(f"Missing 'pathToFile' in {json_key} entry of '{name}': {entry}")
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"File not found for {json_key} in '{name}': {file_path}")
+    if not os.path.exists(path):
+        return "File not found"
+    if not check_parquet:
+        return None
+
+    if os.path.isdir(path):
+        parquet_paths = [entry.path for entry in os.scandir(path) if entry.name.endswith(".parquet") and entry.is_file()]
+    else:
+        parquet_paths = [path] if path.endswith(".parquet") else []
+
+    for parquet_path in parquet_paths:
+        try:
+            pq.read_metadata(parquet_path)
+        except Exception as e:
+            return f"Unreadable parquet file {os.path.basename(parquet_path)} ({e})"
+    return None
 
 
 def get_parquet_files_recursive(root_dir):
@@ -84,64 +132,232 @@ def get_parquet_files_recursive(root_dir):
     return parquet_files
 
 
-def compare_experiment_outputs(orig_path, repr_path):
+def compare_output_file(rel_path, orig_file, repr_file, tolerances=None):
+    """
+    Compare one output file of an experiment pair; either file may be None if it is missing.
+    Numeric values are compared within tolerances if given (see compare_parquet_files()).
+
+    Returns:
+        Report with the relative 'file' path and the fields returned by compare_parquet_files();
+        files present on one side only have status 'missing' or 'extra', unreadable files
+        status 'error'.
+    """
+
+    if repr_file is None:
+        return {"file": rel_path, "status": "missing"}
+    if orig_file is None:
+        return {"file": rel_path, "status": "extra"}
+    try:
+        return {"file": rel_path, **compare_parquet_files(orig_file, repr_file, tolerances=tolerances)}
+    except Exception as e:
+        return {"file": rel_path, "status": "error", "reason": str(e)}
+
+
+def compare_experiment_outputs(orig_path, repr_path, tolerances=None):
     """
-    Compares whether the experiment output files from two directories match.
+    Compares the experiment output files from two directories, file by file.
 
-    Checks for file presence and compares data content using Pandas.
+    Every parquet file is compared with compare_parquet_files(): footers first, then streamed
+    batch by batch, so memory stays bounded no matter how big the outputs are.
 
     Args:
         orig_path: Path to original experiment output folder.
         repr_path: Path to reproduced experiment output folder.
+        tolerances: Optional per-column numeric tolerances, as in compare_parquet_files().
 
     Returns:
-        True if files exist and dataframes match, False otherwise.
+        List of per-file reports (see compare_output_file()). The outputs match if every
+        status is 'match'.
     """
 
-    try:
-        orig_files = get_parquet_files_recursive(orig_path)
-        repr_files = get_parquet_files_recursive(repr_path)
-
-        missing = set(orig_files.keys()) - set(repr_files.keys())
-        extra = set(repr_files.keys()) - set(orig_files.keys())
-        if missing or extra:
-            return False
-
-        for rel_path in orig_files:
-            df1 = pd.read_parquet(orig_files[rel_path])
-            df2 = pd.read_parquet(repr_files[rel_path])
-            if not df1.equals(df2):
-                return False
-        return True
-    except Exception as e:
-        return False
+    orig_files = get_parquet_files_recursive(orig_path)
+    repr_files = get_parquet_files_recursive(repr_path)
+    return [
+        compare_output_file(rel_path, orig_files.get(rel_path), repr_files.get(rel_path), tolerances)
+        for rel_path in sorted(orig_files.keys() | repr_files.keys())
+    ]
 
 
-def compare_all_experiments_outputs():
+def scan_output_pairs(root_dir="output"):
+    """
+    Find the repr_/original experiment output pairs and their parquet files in a single scan.
+
+    Args:
+        root_dir: Output folder to scan.
+
+    Returns:
+        List of (original folder, reproduced folder, files) tuples, where files maps the
+        relative path of every parquet file of either side to its (original path, reproduced
+        path, bytes) with None for a missing side. Reproductions whose original folder is
+        missing are included if it has a checksum manifest (see write_output_checksums()).
+        Pairs without parquet files or checksums are left out.
+    """
+
+    sizes = {}
+    dirs = set()
+    pending = [root_dir]
+    while pending:
+        try:
+            entries = list(os.scandir(pending.pop()))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                dirs.add(entry.path)
+                pending.append(entry.path)
+            elif entry.name.endswith(".parquet"):
+                sizes[entry.path] = entry.stat().st_size
+
+    by_dir = {}
+    for path in sizes:
+        parent = os.path.dirname(path)
+        while parent and parent != root_dir:
+            by_dir.setdefault(parent, []).append(path)
+            parent = os.path.dirname(parent)
+
     pairs = []
+    for repr_dir in sorted(dirs):
+        name = os.path.basename(repr_dir)
+        orig_dir = os.path.join(os.path.dirname(repr_dir), name[len("repr_"):])
+        if not name.startswith("repr_"):
+            continue
+        has_checksums = os.path.exists(get_checksum_manifest_path(orig_dir))
+        if orig_dir not in dirs and not has_checksums:
+            continue
+        files = {}
+        for side, folder in ((0, orig_dir), (1, repr_dir)):
+            for path in by_dir.get(folder, []):
+                entry = files.setdefault(os.path.relpath(path, folder), [None, None, 0])
+                entry[side] = path
+                entry[2] += sizes[path]
+        if files or has_checksums:
+            pairs.append((orig_dir, repr_dir, files))
+    return pairs
+
+
+def get_output_tasks(orig_dir, files, use_checksums, tolerances=None):
+    """
+    List the file comparisons of an output pair as (pair, file, original, reproduced, bytes,
+    checksums, tolerances) tuples. With use_checksums and a checksum manifest of the original
+    folder, the reproduced files are verified against their original checksums instead, so the
+    original files are not read (and need not exist). Checksums can only be verified exactly,
+    so with tolerances the original files are read where they exist.
+    """
 
-    for parent, dirs, _ in os.walk("output"):
-        for d in dirs:
-            if d.startswith("repr_"):
-                repr_dir = os.path.join(parent, d)
-                orig_dir = os.path.join(parent, d[len("repr_"):])
+    pair = os.path.relpath(orig_dir, "output")
+    checksums = None
+    if not os.path.isdir(orig_dir) or use_checksums and tolerances is None:
+        checksums = load_output_checksums(orig_dir)
+    if checksums is None:
+        return [
+            (pair, rel_path, orig_file, repr_file, size, None, tolerances)
+            for rel_path, (orig_file, repr_file, size) in sorted(files.items())
+        ]
+
+    repr_files = {rel_path.replace(os.sep, "/"): (repr_file, size)
+                  for rel_path, (_, repr_file, size) in files.items() if repr_file}
+    expected = checksums["files"]
+    return [
+        (pair, rel_path, None, *repr_files.get(rel_path, (None, 0)), expected.get(rel_path), None)
+        for rel_path in sorted(expected.keys() | repr_files.keys())
+    ]
+
+
+def compare_output_task(task):
+    pair, rel_path, orig_file, repr_file, size, checksums, tolerances = task
+    if orig_file is None and checksums is not None:
+        report = verify_output_file(rel_path, checksums, repr_file)
+    else:
+        report = compare_output_file(rel_path, orig_file, repr_file, tolerances)
+    return {"pair": pair, **report, "bytes": size if report["status"] not in ("missing", "extra") else 0}
+
+
+def compare_all_experiments_outputs(max_workers=None, report_path=COMPARISON_REPORT_PATH, use_checksums=True,
+                                    tolerances=None):
+    """
+    Compares the outputs of all reproduced experiments (repr_*) with the original ones.
 
-                if os.path.isdir(orig_dir):
-                    if not get_parquet_files_recursive(orig_dir) and not get_parquet_files_recursive(repr_dir):
-                        continue
-                    pairs.append((orig_dir, repr_dir))
+    The output folder is scanned once, and the file comparisons of all pairs are spread over
+    a process pool. A machine-readable report with one entry per compared file is written to
+    report_path.
+
+    Originals with a checksum manifest (written by the runner after every run) are verified by
+    hashing only the reproduced outputs, which halves the I/O and works without the original
+    outputs, e.g. in a capsule exported without them. Differences are then located per column
+    instead of per row.
+
+    Args:
+        max_workers: Number of comparison processes (default: one per CPU).
+        report_path: JSON file the report is written to (None to skip writing it).
+        use_checksums: Verify against checksum manifests where available instead of reading
+            the original outputs (default True); originals that are missing are always
+            verified from their checksums.
+        tolerances: Optional per-column numeric tolerances, e.g. {'*': {'rel': 1e-9}} (see
+            compare_parquet_files()); values differing by less still match, and every file gets
+            per-column statistics (max abs diff, RMSE, fraction of rows out of tolerance).
 
+    Returns:
+        Report dictionary with 'matched', the number of 'pairs', the total 'bytes_compared' and
+        the per-file 'results' ({'pair', 'file', 'status', 'bytes', ...mismatch details}).
+    """
+
+    pairs = scan_output_pairs("output")
     if not pairs:
         print("No experiment pairs found.")
         return
 
-    all_ok = True
-    for orig_path, repr_path in pairs:
-        rel = os.path.relpath(orig_path, "output")
-        if not compare_experiment_outputs(orig_path, repr_path):
-            all_ok = False
-
-    if all_ok:
+    tasks = [
+        task for orig_dir, _, files in pairs
+        for task in get_output_tasks(orig_dir, files, use_checksums, tolerances)
+    ]
+    if not tasks:
+        print("No output files found.")
+        return
+    max_workers = max(1, min(max_workers or os.cpu_count() or 1, len(tasks)))
+    if max_workers == 1:
+        results = [compare_output_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(compare_output_task, tasks, chunksize=max(1, len(tasks) // (max_workers * 4))))
+
+    report = {
+        "matched": all(result["status"] == "match" for result in results),
+        "pairs": len(pairs),
+        "bytes_compared": sum(result["bytes"] for result in results),
+        "results": results,
+    }
+    if report_path:
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=4, default=str)
+
+    for pair in dict.fromkeys(result["pair"] for result in results):
+        mismatches = [result for result in results if result["pair"] == pair and result["status"] != "match"]
+        if mismatches:
+            print(f"{pair} did NOT match:")
+            for result in mismatches:
+                print(f"  {format_file_report(result)}")
+
+    if report["matched"]:
         print("All experiments match successfully.")
     else:
-        print("Some experiments did NOT match.")
\ No newline at end of file
+        print("Some experiments did NOT match.")
+    return report
+
+
+def format_file_report(report):
+    if report["status"] in ("missing", "extra"):
+        return f"{report['file']}: {report['status']} in the reproduction"
+    if report["status"] == "error":
+        return f"{report['file']}: could not be compared ({report['reason']})"
+    if report.get("reason") == "value":
+        return (f"{report['file']}: first difference at row {report['first_mismatch_row']}, column '{report['column']}' "
+                f"({report['original']!r} != {report['reproduced']!r})")
+    if report.get("reason") == "tolerance":
+        return f"{report['file']}: out of tolerance in " + "; ".join(
+            f"column '{column}' ({stats['out_of_tolerance']:.4%} of rows from row {stats['first_row']}, "
+            f"max abs diff {stats['max_abs_diff']:.3g}, RMSE {stats['rmse']:.3g})"
+            for column, stats in report["columns"].items() if stats["first_row"] is not None
+        )
+    if report.get("reason") == "columns":
+        return f"{report['file']}: values differ in column(s) {', '.join(report['columns'])}"
+    return f"{report['file']}: {report['reason']} differs ({report['original']} != {report['reproduced']})"
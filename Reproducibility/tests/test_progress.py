@@ -0,0 +1,37 @@
+from src.progress import count_experiment_scenarios, handle_progress_line, new_queue_progress
+
+
+def run_log(runs, tasks=4):
+    lines = []
+    for seed in range(runs):
+        lines.append(f"\x1b[34m Starting seed: {seed} \x1b[0m")
+        for completed in range(1, tasks + 1):
+            lines += [f"\t\tTasks Total: {tasks}", f"\t\tTasks Completed: {completed}", "\t\tTasks Terminated: 0"]
+    return lines
+
+
+def test_count_experiment_scenarios():
+    experiment = {
+        "topologies": [{"pathToFile": "a.json"}, {"pathToFile": "b.json"}],
+        "workloads": [{"pathToFile": "w"}],
+        "allocationPolicies": [{"policyType": "Mem"}, {"policyType": "CoreMem"}, {"policyType": "ActiveServers"}],
+        "runs": 2,
+    }
+    assert count_experiment_scenarios(experiment) == 6
+    assert count_experiment_scenarios({}) == 1
+
+
+def test_progress_spans_all_scenarios():
+    progress = new_queue_progress({"exp.json": (1.0, 2, 2)}, callback=lambda fraction, eta: None)
+    fractions = []
+
+    for scenario in ("first", "second"):
+        handle_progress_line(progress, "exp.json", f"\x1b[34m Running scenario: {scenario} \x1b[0m")
+        for line in run_log(runs=2):
+            handle_progress_line(progress, "exp.json", line)
+            fractions.append(progress["experiments"]["exp.json"]["fraction"])
+        if scenario == "first":
+            assert progress["experiments"]["exp.json"]["fraction"] == 0.5
+
+    assert fractions == sorted(fractions)
+    assert fractions[-1] == 1.0
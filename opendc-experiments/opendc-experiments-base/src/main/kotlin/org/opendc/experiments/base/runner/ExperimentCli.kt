@@ -25,7 +25,7 @@
 package org.opendc.experiments.base.runner
 
 import com.github.ajalt.clikt.core.CliktCommand
-import com.github.ajalt.clikt.parameters.options.defaultLazy
+import com.github.ajalt.clikt.parameters.options.multiple
 import com.github.ajalt.clikt.parameters.options.option
 import com.github.ajalt.clikt.parameters.types.file
 import org.opendc.experiments.base.experiment.getExperiment
@@ -41,14 +41,20 @@ public fun main(args: Array<String>): Unit = ExperimentCommand().main(args)
  */
 internal class ExperimentCommand : CliktCommand(name = "experiment") {
     /**
-     * The path to the environment directory.
+     * The paths to the experiment files. The option can be repeated to run several experiments in one process.
      */
-    private val scenarioPath by option("--experiment-path", help = "path to experiment file")
+    private val scenarioPaths by option("--experiment-path", help = "path to experiment file (can be repeated)")
         .file(canBeDir = false, canBeFile = true)
-        .defaultLazy { File("resources/experiment.json") }
+        .multiple(default = listOf(File("resources/experiment.json")))
 
     override fun run() {
-        val experiment = getExperiment(scenarioPath)
-        runExperiment(experiment)
+        for (scenarioPath in scenarioPaths) {
+            val startTime = System.nanoTime()
+            val experiment = getExperiment(scenarioPath)
+            runExperiment(experiment)
+
+            val durationMs = (System.nanoTime() - startTime) / 1_000_000
+            println("Experiment finished: ${scenarioPath.path} in $durationMs ms")
+        }
     }
 }